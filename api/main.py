@@ -3,6 +3,7 @@
 from fastapi import APIRouter
 
 from .health import router as health_router
+from .metrics import router as metrics_router
 from .routes.professors import router as professors_router
 from .routes.courses import router as courses_router
 from .routes.attendances import router as attendances_router
@@ -13,6 +14,7 @@ from .routes.students import router as students_router
 router = APIRouter()
 
 router.include_router(health_router)
+router.include_router(metrics_router)
 router.include_router(professors_router)
 router.include_router(courses_router)
 router.include_router(attendances_router)
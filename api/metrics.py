@@ -0,0 +1,13 @@
+"""Metrics endpoint."""
+
+from fastapi import APIRouter, status
+
+from core.metrics import metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", status_code=status.HTTP_200_OK)
+async def read_metrics():
+    """Snapshot of the in-process metrics."""
+    return metrics.snapshot()
@@ -1,15 +1,23 @@
+import json
 from datetime import datetime
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 
-from core.db import get_db
+from core import edge, events, export
+from core.checkin import IdempotencyKeyReused, check_in
+from core.config import get_settings
+from core.db import get_async_db, get_async_session_factory
+from core.pagination import decode_cursor, set_next_cursor
+from core.reader_channel import ReaderChannel, verify_reader_token
+from core.replicas import get_async_read_db, get_async_read_session_factory
+from core.tap_writer import TapQueueFull
 from core.websocket_manager import WebSocketManager
 from models.attendance import AttendanceStatus
-from models.student import Student
 from fastapi import WebSocket, WebSocketDisconnect
-from crud import attendance as attendance_crud
+from fastapi.responses import StreamingResponse
+from crud.aio import attendance as attendance_crud
 
 class AttendanceBase(BaseModel):
     session_id: int
@@ -27,9 +35,15 @@ class AttendanceCheck(BaseModel):
     rfid_card_id: str
     room: str
 
+class AttendanceTap(AttendanceCheck):
+    tapped_at: datetime
+
+class AttendanceTapResult(AttendanceTap):
+    message: str
+
 class AttendanceResponse(AttendanceBase):
     attendance_id: int
-    time: datetime
+    time: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
 
@@ -42,6 +56,28 @@ class AttendanceStats(BaseModel):
     late: int
     absent: int
 
+class SessionAttendanceStats(AttendanceStats):
+    session_id: int
+
+class CourseAttendanceStats(AttendanceStats):
+    course_id: int
+    sessions: int
+
+class AttendanceSummaryResponse(BaseModel):
+    course_id: int
+    student_id: int
+    present: int
+    late: int
+    absent: int
+    total: int
+    attendance_rate: float
+    updated_at: datetime
+
+    class Config:
+        orm_mode = True
+
+MAX_STATS_SESSIONS = 500
+
 router = APIRouter(
     prefix="/attendances",
     tags=["attendances"],
@@ -50,17 +86,25 @@ router = APIRouter(
 
 
 @router.get("/", response_model=List[AttendanceResponse])
-def read_attendances(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    attendances = attendance_crud.get_attendances(db, skip=skip, limit=limit)
+async def read_attendances(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """Pass the ``X-Next-Cursor`` header of a full page as ``after`` to continue from it."""
+    attendances = await attendance_crud.get_attendances(db, skip=skip, limit=limit, after=decode_cursor(after))
+    set_next_cursor(response, attendances, "attendance_id", limit)
     return attendances
 
 @router.get("/session/{session_id}", response_model=List[AttendanceResponse])
-def read_attendances_by_session(session_id: int, db: Session = Depends(get_db)):
-    attendances = attendance_crud.get_attendances_by_session(db, session_id=session_id)
+async def read_attendances_by_session(session_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    attendances = await attendance_crud.get_attendances_by_session(db, session_id=session_id)
     return attendances
 
 @router.get("/session/{session_id}/stats", response_model=AttendanceStats)
-def get_attendance_stats_by_session(session_id: int, db: Session = Depends(get_db)):
+async def get_attendance_stats_by_session(session_id: int, db: AsyncSession = Depends(get_async_read_db)):
     """
     Get attendance statistics for a specific session including:
     - total number of records
@@ -68,40 +112,95 @@ def get_attendance_stats_by_session(session_id: int, db: Session = Depends(get_d
     - count of late students
     - count of absent students
     """
-    attendances = attendance_crud.get_attendances_by_session(db, session_id=session_id)
-    if not attendances and not attendance_crud.session_exists(db, session_id):
+    stats = (await attendance_crud.get_session_stats(db, [session_id]))[session_id]
+    if not stats["total"] and not await attendance_crud.session_exists(db, session_id):
         raise HTTPException(status_code=404, detail="Session not found")
+    return stats
+
+@router.get("/stats", response_model=List[SessionAttendanceStats])
+async def get_attendance_stats_by_sessions(
+    session_ids: List[int] = Query(...),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """Attendance statistics for several sessions (``?session_ids=1&session_ids=2``) in one query."""
+    if len(session_ids) > MAX_STATS_SESSIONS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_STATS_SESSIONS} sessions per request")
+    stats = await attendance_crud.get_session_stats(db, session_ids)
+    return [{"session_id": session_id, **counts} for session_id, counts in stats.items()]
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_attendances(
+    fmt: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    course_id: Optional[int] = None,
+    group_id: Optional[int] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    gzip: bool = False,
+    session_factory=Depends(get_async_read_session_factory),
+):
+    """
+    Stream attendances with student, group, course and session columns as CSV or NDJSON.
+    Rows are read from a server-side cursor, so memory use does not grow with the export.
+    """
+    async def rows():
+        # The stream outlives the request, so it holds its own session.
+        async with session_factory() as db:
+            result = await attendance_crud.stream_export(
+                db, course_id=course_id, group_id=group_id, date_from=date_from, date_to=date_to
+            )
+            async for chunk in export.encode_rows(result, fmt):
+                yield chunk
 
-    total = len(attendances)
-    present_count = sum(1 for a in attendances if a.status == AttendanceStatus.present)
-    late_count = sum(1 for a in attendances if a.status == AttendanceStatus.late)
-    absent_count = sum(1 for a in attendances if a.status == AttendanceStatus.absent)
+    body, media_type, filename = rows(), export.FORMATS[fmt], f"attendances.{fmt}"
+    if gzip:
+        body, media_type, filename = export.gzip_chunks(body), "application/gzip", f"{filename}.gz"
+    return StreamingResponse(
+        body, media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get("/course/{course_id}/stats", response_model=CourseAttendanceStats)
+async def get_attendance_stats_by_course(
+    course_id: int,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """Attendance totals over a course's sessions, optionally limited to a date range."""
+    stats = await attendance_crud.get_course_stats(db, course_id, date_from=date_from, date_to=date_to)
+    if not stats["sessions"] and not await attendance_crud.course_exists(db, course_id):
+        raise HTTPException(status_code=404, detail="Course not found")
+    return {"course_id": course_id, **stats}
+
+@router.get("/course/{course_id}/summaries", response_model=List[AttendanceSummaryResponse])
+async def read_course_summaries(course_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    """Per-student attendance counts and rate for a course, from the summary table."""
+    return await attendance_crud.get_course_summaries(db, course_id)
 
-    return {
-        "total": total,
-        "present": present_count,
-        "late": late_count,
-        "absent": absent_count,
-    }
+@router.get("/course/{course_id}/student/{student_id}/summary", response_model=AttendanceSummaryResponse)
+async def read_student_summary(course_id: int, student_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    summary = await attendance_crud.get_summary(db, course_id, student_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="No attendance recorded for this student in this course")
+    return summary
 
 @router.get("/student/{student_id}", response_model=List[AttendanceResponse])
-def read_attendances_by_student(student_id: int, db: Session = Depends(get_db)):
-    attendances = attendance_crud.get_attendances_by_student(db, student_id=student_id)
+async def read_attendances_by_student(student_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    attendances = await attendance_crud.get_attendances_by_student(db, student_id=student_id)
     return attendances
 
 @router.get("/{attendance_id}", response_model=AttendanceResponse)
-def read_attendance(attendance_id: int, db: Session = Depends(get_db)):
-    db_attendance = attendance_crud.get_attendance(db, attendance_id=attendance_id)
+async def read_attendance(attendance_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    db_attendance = await attendance_crud.get_attendance(db, attendance_id=attendance_id)
     if db_attendance is None:
         raise HTTPException(status_code=404, detail="Attendance not found")
     return db_attendance
 
 @router.put("/{attendance_id}", response_model=AttendanceResponse)
-def update_attendance(attendance_id: int, attendance: AttendanceUpdate, db: Session = Depends(get_db)):
-    db_attendance = attendance_crud.get_attendance(db, attendance_id=attendance_id)
+async def update_attendance(attendance_id: int, attendance: AttendanceUpdate, db: AsyncSession = Depends(get_async_db)):
+    db_attendance = await attendance_crud.get_attendance(db, attendance_id=attendance_id)
     if db_attendance is None:
         raise HTTPException(status_code=404, detail="Attendance not found")
-    return attendance_crud.update_attendance(
+    return await attendance_crud.update_attendance(
         db=db,
         attendance_id=attendance_id,
         status=attendance.status,
@@ -109,48 +208,122 @@ def update_attendance(attendance_id: int, attendance: AttendanceUpdate, db: Sess
     )
 
 @router.delete("/{attendance_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_attendance(attendance_id: int, db: Session = Depends(get_db)):
-    db_attendance = attendance_crud.get_attendance(db, attendance_id=attendance_id)
+async def delete_attendance(attendance_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_attendance = await attendance_crud.get_attendance(db, attendance_id=attendance_id)
     if db_attendance is None:
         raise HTTPException(status_code=404, detail="Attendance not found")
-    attendance_crud.delete_attendance(db, attendance_id=attendance_id)
+    await attendance_crud.delete_attendance(db, attendance_id=attendance_id)
     return {"detail": "Attendance deleted successfully"}
 
-manager = WebSocketManager()
+manager = WebSocketManager(queue_size=get_settings().websocket_send_queue_size)
+
+async def _deliver(event: dict):
+    await manager.publish(event["topics"], event["message"])
+
+events.subscribe(_deliver)
 
 @router.post("/check", status_code=status.HTTP_200_OK)
-async def check_attendance(attendance: AttendanceCheck, db: Session = Depends(get_db)):
-    """ Creates the attendance object and checks attendance based on the student rfid id"""
-    result = attendance_crud.check_attendance(
-        db=db,
-        rfid_card_id=attendance.rfid_card_id,
-        room=attendance.room
-    )
+async def check_attendance(
+    attendance: AttendanceCheck,
+    idempotency_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Creates the attendance object and checks attendance based on the student rfid id.
+    A retried request with the same `Idempotency-Key` header gets the original answer;
+    reusing the key for another card or room is a 422.
+    """
+    try:
+        result = await check_in(db, attendance_crud.Tap(attendance.rfid_card_id, attendance.room), idempotency_key)
+    except TapQueueFull as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    except IdempotencyKeyReused as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
 
-    # Broadcast the attendance event to all connected WebSocket clients
-    if result not in ["Unknown card", "No active session", "Error processing attendance"]:
-        student = db.query(Student).filter(Student.rfid_card_id == attendance.rfid_card_id).first()
-        student_name = student.name if student else "Unknown"
+    # Notify the clients following this room, session or professor on every worker
+    if result.status is not None and not result.repeat:
+        events.publish(events.attendance_event(result, attendance.room, datetime.utcnow()))
 
-        notification = {
-            "type": "attendance",
-            "student": student_name,
-            "room": attendance.room,
-            "status": result,
-            "timestamp": datetime.utcnow().isoformat()
-        }
-        import json
-        await manager.broadcast(json.dumps(notification))
+    return {"message": result.message}
 
-    return {"message": result}
+@router.post("/check/batch", response_model=List[AttendanceTapResult])
+async def check_attendance_batch(taps: List[AttendanceTap], db: AsyncSession = Depends(get_async_db)):
+    """
+    Checks attendance for taps buffered by a reader while it was offline.
+    Each tap is evaluated at its own `tapped_at`; results are returned in order.
+    In edge mode the taps are journaled and answered locally.
+    """
+    batch = [attendance_crud.Tap(tap.rfid_card_id, tap.room, tap.tapped_at) for tap in taps]
+    if edge.edge_node:
+        results = await edge.edge_node.check_in_batch(batch)
+    else:
+        results = await attendance_crud.check_taps(db=db, taps=batch)
+
+    for tap, result in zip(taps, results):
+        if result.status is not None:
+            events.publish(events.attendance_event(result, tap.room, tap.tapped_at))
+
+    return [
+        AttendanceTapResult(**tap.dict(), message=result.message)
+        for tap, result in zip(taps, results)
+    ]
 
 
 @router.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+async def websocket_endpoint(websocket: WebSocket, topics: Optional[str] = None):
+    """
+    Streams attendance events. Pass `?topics=room:3-101,professor:4` to only
+    receive events for those topics (default: everything until the first
+    subscribe), and send `{"action": "subscribe" | "unsubscribe", "topics": [...]}`
+    to change them.
+    """
+    initial = [topic for topic in topics.split(",") if topic] if topics else None
+    await manager.connect(websocket, topics=initial)
     try:
         while True:
             data = await websocket.receive_text()
-            await websocket.send_text(f"Waiting for attendance: {data}")
+            try:
+                command = json.loads(data)
+                action, requested = command["action"], command["topics"]
+                if not isinstance(requested, list):
+                    raise TypeError("topics must be a list")
+            except (ValueError, TypeError, KeyError):
+                manager.send_to(websocket, f"Waiting for attendance: {data}")
+                continue
+            if action == "subscribe":
+                manager.subscribe(websocket, requested)
+            elif action == "unsubscribe":
+                manager.unsubscribe(websocket, requested)
+            client = manager.active_connections.get(websocket)
+            manager.send_to(websocket, json.dumps({
+                "type": "subscriptions",
+                "topics": sorted(client.topics) if client else [],
+            }))
     except WebSocketDisconnect:
         manager.disconnect(websocket)
+
+
+@router.websocket("/reader-ws")
+async def reader_websocket_endpoint(
+    websocket: WebSocket,
+    reader_id: str,
+    token: str,
+    session_factory=Depends(get_async_session_factory),
+):
+    """
+    Persistent tap channel for readers, authenticated once with
+    `?reader_id=...&token=...`. Send `{"id", "rfid_card_id", "room"}` and get
+    `{"id", "message"}` back; see `core.reader_channel` for the protocol.
+    """
+    settings = get_settings()
+    if not verify_reader_token(settings.secret_key.encode(), reader_id, token):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    channel = ReaderChannel(
+        websocket,
+        reader_id,
+        session_factory,
+        max_in_flight=settings.reader_ws_max_in_flight,
+        max_age_seconds=settings.reader_ws_max_age_seconds,
+    )
+    await channel.serve()
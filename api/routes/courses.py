@@ -1,8 +1,10 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Response
 from sqlalchemy.orm import Session
 
 from core.db import get_db
+from core.pagination import decode_cursor, set_next_cursor
+from core.replicas import get_read_db
 from crud import course as course_crud
 
 from pydantic import BaseModel
@@ -40,17 +42,18 @@ def create_course(course: CourseCreate, db: Session = Depends(get_db)):
     )
 
 @router.get("/", response_model=List[CourseResponse])
-def read_courses(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    courses = course_crud.get_courses(db, skip=skip, limit=limit)
+def read_courses(response: Response, skip: int = 0, limit: int = 100, after: Optional[str] = None, db: Session = Depends(get_read_db)):
+    courses = course_crud.get_courses(db, skip=skip, limit=limit, after=decode_cursor(after))
+    set_next_cursor(response, courses, "course_id", limit)
     return courses
 
 @router.get("/professor/{professor_id}", response_model=List[CourseResponse])
-def read_courses_by_professor(professor_id: int, db: Session = Depends(get_db)):
+def read_courses_by_professor(professor_id: int, db: Session = Depends(get_read_db)):
     courses = course_crud.get_courses_by_professor(db, professor_id=professor_id)
     return courses
 
 @router.get("/{course_id}", response_model=CourseResponse)
-def read_course(course_id: int, db: Session = Depends(get_db)):
+def read_course(course_id: int, db: Session = Depends(get_read_db)):
     db_course = course_crud.get_course(db, course_id=course_id)
     if db_course is None:
         raise HTTPException(status_code=404, detail="Course not found")
@@ -1,8 +1,10 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Response
 from sqlalchemy.orm import Session
 
 from core.db import get_db
+from core.pagination import decode_cursor, set_next_cursor
+from core.replicas import get_read_db
 from crud import group as group_crud
 
 # Schemas
@@ -37,11 +39,13 @@ def create_group(group: GroupCreate, db: Session = Depends(get_db)):
     return group_crud.create_group(db=db, code=group.code)
 
 @router.get("/", response_model=List[GroupResponse])
-def read_groups(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return group_crud.get_groups(db=db, skip=skip, limit=limit)
+def read_groups(response: Response, skip: int = 0, limit: int = 100, after: Optional[str] = None, db: Session = Depends(get_read_db)):
+    groups = group_crud.get_groups(db=db, skip=skip, limit=limit, after=decode_cursor(after))
+    set_next_cursor(response, groups, "group_id", limit)
+    return groups
 
 @router.get("/{group_id}", response_model=GroupResponse)
-def read_group(group_id: int, db: Session = Depends(get_db)):
+def read_group(group_id: int, db: Session = Depends(get_read_db)):
     db_group = group_crud.get_group(db=db, group_id=group_id)
     if db_group is None:
         raise HTTPException(status_code=404, detail="Group not found")
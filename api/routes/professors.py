@@ -1,9 +1,11 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Response
 from sqlalchemy.orm import Session
 import bcrypt
 
 from core.db import get_db
+from core.pagination import decode_cursor, set_next_cursor
+from core.replicas import get_read_db
 from crud import professor as professor_crud
 
 # Create schemas for request/response
@@ -55,12 +57,13 @@ def create_professor(professor: ProfessorCreate, db: Session = Depends(get_db)):
     )
 
 @router.get("/", response_model=List[ProfessorResponse])
-def read_professors(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    professors = professor_crud.get_professors(db, skip=skip, limit=limit)
+def read_professors(response: Response, skip: int = 0, limit: int = 100, after: Optional[str] = None, db: Session = Depends(get_read_db)):
+    professors = professor_crud.get_professors(db, skip=skip, limit=limit, after=decode_cursor(after))
+    set_next_cursor(response, professors, "professor_id", limit)
     return professors
 
 @router.get("/{professor_id}", response_model=ProfessorResponse)
-def read_professor(professor_id: int, db: Session = Depends(get_db)):
+def read_professor(professor_id: int, db: Session = Depends(get_read_db)):
     db_professor = professor_crud.get_professor(db, professor_id=professor_id)
     if db_professor is None:
         raise HTTPException(status_code=404, detail="Professor not found")
@@ -1,11 +1,13 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Response
 from sqlalchemy.orm import Session
 from datetime import datetime
 from enum import Enum
 from pydantic import BaseModel
 
 from core.db import get_db
+from core.pagination import decode_cursor, set_next_cursor
+from core.replicas import get_read_db
 from crud import session as session_crud
 
 class SessionStatus(str, Enum):
@@ -37,7 +39,7 @@ class CourseResponse(BaseModel):
 
 class AttendanceResponse(BaseModel):
     attendance_id: int
-    time : datetime
+    time: Optional[datetime] = None
     status: str
     student: StudentResponse
     class Config:
@@ -88,11 +90,13 @@ def create_session(session: SessionCreate, db: Session = Depends(get_db)):
     return session_crud.create_session(db=db, **session.dict())
 
 @router.get("/", response_model=List[SessionResponse])
-def read_sessions(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return session_crud.get_sessions(db=db, skip=skip, limit=limit)
+def read_sessions(response: Response, skip: int = 0, limit: int = 100, after: Optional[str] = None, db: Session = Depends(get_read_db)):
+    sessions = session_crud.get_sessions(db=db, skip=skip, limit=limit, after=decode_cursor(after))
+    set_next_cursor(response, sessions, "session_id", limit)
+    return sessions
 
 @router.get("/{session_id}", response_model=SessionResponse)
-def read_session(session_id: int, db: Session = Depends(get_db)):
+def read_session(session_id: int, db: Session = Depends(get_read_db)):
     db_session = session_crud.get_session(db=db, session_id=session_id)
     if db_session is None:
         raise HTTPException(status_code=404, detail="Session not found")
@@ -114,12 +118,31 @@ def delete_session(session_id: int, db: Session = Depends(get_db)):
     return {"detail": "Session deleted successfully"}
 
 @router.get("/current/{professor_id}", response_model=List[SessionResponse])
-def get_current_sessions_by_professor(professor_id: int, db: Session = Depends(get_db)):
-    sessions = session_crud.get_current_sessions_by_professor_and_time(db=db, professor_id=professor_id)
+def get_current_sessions_by_professor(
+    professor_id: int,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_read_db),
+):
+    sessions = session_crud.get_current_sessions_by_professor_and_time(
+        db=db, professor_id=professor_id, date_from=date_from, date_to=date_to, skip=skip, limit=limit
+    )
     return sessions
 
 @router.get("/professor/{professor_id}", response_model=List[SessionResponse])
-def get_all_sessions_by_professor(professor_id: int, db: Session = Depends(get_db)):
-    return session_crud.get_sessions_by_professor(db, professor_id=professor_id)
+def get_all_sessions_by_professor(
+    professor_id: int,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_read_db),
+):
+    """Newest sessions first, optionally limited to a date range."""
+    return session_crud.get_sessions_by_professor(
+        db, professor_id=professor_id, date_from=date_from, date_to=date_to, skip=skip, limit=limit
+    )
 
 #TODO: add course name in response
\ No newline at end of file
@@ -1,10 +1,14 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from datetime import datetime
 from pydantic import BaseModel
 
 from core.db import get_db
+from core.pagination import decode_cursor, set_next_cursor
+from core.replicas import get_read_db
+from crud import roster as roster_crud
 from crud import student as student_crud
 
 # --- Schemas ---
@@ -36,8 +40,20 @@ router = APIRouter(
     responses={404: {"description": "Student not found"}},
 )
 
+class RosterImportError(BaseModel):
+    line: int
+    rfid_card_id: Optional[str] = None
+    error: str
+
+class RosterImportResponse(BaseModel):
+    created: int
+    updated: int
+    errors: List[RosterImportError]
+
 @router.post("/", response_model=StudentResponse, status_code=status.HTTP_201_CREATED)
 def create_student(student: StudentCreate, db: Session = Depends(get_db)):
+    if student_crud.get_student_by_card(db, student.rfid_card_id):
+        raise HTTPException(status_code=409, detail="RFID card already assigned")
     return student_crud.create_student(
         db=db,
         name=student.name,
@@ -45,12 +61,30 @@ def create_student(student: StudentCreate, db: Session = Depends(get_db)):
         rfid_card_id=student.rfid_card_id
     )
 
+@router.post("/import", response_model=RosterImportResponse, openapi_extra={
+    "requestBody": {"content": {"text/csv": {"schema": {"type": "string"}}}, "required": True},
+})
+async def import_roster(request: Request, dry_run: bool = False, db: Session = Depends(get_db)):
+    """
+    Create or update students from a CSV body with a `name,group,rfid_card_id` header.
+    Students are matched by card; `group` is a group code. Invalid rows are reported
+    per line and skipped, the rest is written in one transaction.
+    """
+    body = await request.body()
+    try:
+        result = await run_in_threadpool(roster_crud.import_roster, db, body.decode("utf-8-sig"), dry_run)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"created": result.created, "updated": result.updated, "errors": [e._asdict() for e in result.errors]}
+
 @router.get("/", response_model=List[StudentResponse])
-def read_students(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return student_crud.get_students(db, skip=skip, limit=limit)
+def read_students(response: Response, skip: int = 0, limit: int = 100, after: Optional[str] = None, db: Session = Depends(get_read_db)):
+    students = student_crud.get_students(db, skip=skip, limit=limit, after=decode_cursor(after))
+    set_next_cursor(response, students, "student_id", limit)
+    return students
 
 @router.get("/{student_id}", response_model=StudentResponse)
-def read_student(student_id: int, db: Session = Depends(get_db)):
+def read_student(student_id: int, db: Session = Depends(get_read_db)):
     student = student_crud.get_student(db, student_id=student_id)
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
@@ -61,6 +95,9 @@ def update_student(student_id: int, student: StudentUpdate, db: Session = Depend
     db_student = student_crud.get_student(db, student_id)
     if not db_student:
         raise HTTPException(status_code=404, detail="Student not found")
+    if student.rfid_card_id and student.rfid_card_id != db_student.rfid_card_id \
+            and student_crud.get_student_by_card(db, student.rfid_card_id):
+        raise HTTPException(status_code=409, detail="RFID card already assigned")
     return student_crud.update_student(
         db=db,
         student_id=student_id,
@@ -0,0 +1,121 @@
+"""In-memory RFID card index."""
+
+import threading
+from typing import NamedTuple, Optional
+
+from sqlalchemy.orm import Session
+
+from models.student import Student
+
+
+class CardEntry(NamedTuple):
+    """Student data needed to process a tap."""
+
+    student_id: int
+    name: str
+    group_id: Optional[int]
+
+
+class CardIndex:
+    """Process-wide rfid_card_id -> student index.
+
+    Loaded once at startup, kept up to date by the student CRUD functions and
+    periodically reconciled against the database to pick up changes made by
+    other processes.
+    """
+
+    def __init__(self):
+        self._entries: dict[str, CardEntry] = {}
+        self._lock = threading.Lock()
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def load(self, db: Session) -> int:
+        """Replace the index contents with the students table."""
+        rows = db.query(
+            Student.rfid_card_id, Student.student_id, Student.name, Student.group_id
+        ).filter(Student.rfid_card_id.isnot(None))
+        entries = {
+            card: CardEntry(student_id, name, group_id)
+            for card, student_id, name, group_id in rows
+        }
+        self.replace(entries)
+        return len(entries)
+
+    def reconcile(self, db: Session) -> int:
+        """Reload the index, returning the number of entries that changed."""
+        with self._lock:
+            before = self._entries
+        self.load(db)
+        with self._lock:
+            after = self._entries
+        changed = {k for k in before.keys() | after.keys() if before.get(k) != after.get(k)}
+        return len(changed)
+
+    def entries(self) -> dict[str, CardEntry]:
+        return dict(self._entries)
+
+    def replace(self, entries: dict[str, CardEntry]):
+        """Swap in entries loaded elsewhere, e.g. from a local snapshot."""
+        with self._lock:
+            self._entries = dict(entries)
+            self.loaded = True
+
+    def get(self, rfid_card_id: str) -> Optional[CardEntry]:
+        return self._entries.get(rfid_card_id)
+
+    def lookup(self, db: Session, rfid_card_id: str) -> Optional[CardEntry]:
+        """Resolve a card, falling back to the database on a miss.
+
+        A miss can happen before the index is loaded or when another process
+        created the student since the last reconcile.
+        """
+        entry = self.get(rfid_card_id)
+        if entry is not None:
+            return entry
+        student = db.query(Student).filter(Student.rfid_card_id == rfid_card_id).first()
+        if student is None:
+            return None
+        self.put(student)
+        return self.get(rfid_card_id)
+
+    def lookup_many(self, db: Session, rfid_card_ids) -> dict[str, CardEntry]:
+        """Resolve several cards, fetching all misses in one query."""
+        found = {}
+        misses = set()
+        for card in rfid_card_ids:
+            entry = self.get(card)
+            if entry is None:
+                misses.add(card)
+            else:
+                found[card] = entry
+        if misses:
+            for student in db.query(Student).filter(Student.rfid_card_id.in_(misses)):
+                self.put(student)
+                found[student.rfid_card_id] = self.get(student.rfid_card_id)
+        return found
+
+    def put(self, student: Student, previous_card_id: Optional[str] = None):
+        """Insert or refresh a student, dropping its previous card if it changed."""
+        with self._lock:
+            if previous_card_id and previous_card_id != student.rfid_card_id:
+                self._entries.pop(previous_card_id, None)
+            if student.rfid_card_id:
+                self._entries[student.rfid_card_id] = CardEntry(
+                    student.student_id, student.name, student.group_id
+                )
+
+    def remove(self, rfid_card_id: Optional[str]):
+        if rfid_card_id:
+            with self._lock:
+                self._entries.pop(rfid_card_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self.loaded = False
+
+
+card_index = CardIndex()
@@ -0,0 +1,140 @@
+"""Check-in entry point shared by every tap source."""
+
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from crud import attendance as attendance_crud
+from crud.aio import attendance as async_attendance_crud
+
+from . import edge, tap_writer
+from .config import get_settings
+from .metrics import metrics
+
+_suppressed = metrics.counter("checkin_repeats_suppressed_total", "Repeated reads of a card answered from the tap cache")
+_replayed = metrics.counter("checkin_idempotent_replays_total", "Requests with a seen Idempotency-Key answered from the tap cache")
+_entries = metrics.gauge("checkin_tap_cache_entries", "Entries in the tap cache")
+
+
+class IdempotencyKeyReused(Exception):
+    """Raised when an ``Idempotency-Key`` is sent again with a different tap."""
+
+
+class TapCache:
+    """Bounded LRU of recent check-in results with a lifetime per entry.
+
+    Entries hold a future, so a repeat that arrives while the first read is
+    still being checked in waits for it instead of checking in again, and the
+    ``(rfid_card_id, room)`` of the tap it answers.
+    """
+
+    def __init__(self, window: float = 3, max_entries: int = 10000, idempotency_ttl: float = 600):
+        self.window = window
+        self.max_entries = max_entries
+        self.idempotency_ttl = idempotency_ttl
+        self._entries: OrderedDict = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+        _entries.set(0)
+
+    def get(self, key) -> Optional[tuple[asyncio.Future, tuple]]:
+        """Return ``(future, tap)`` for a live entry, or None."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, future, tap = entry
+        if expires <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return future, tap
+
+    def put(self, key, future: asyncio.Future, ttl: float, tap: tuple = ()):
+        self._entries[key] = (time.monotonic() + ttl, future, tap)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        _entries.set(len(self._entries))
+
+    def discard(self, key, future: asyncio.Future):
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] is future:
+            del self._entries[key]
+            _entries.set(len(self._entries))
+
+
+_settings = get_settings()
+tap_cache = TapCache(
+    window=_settings.dedup_window_seconds,
+    max_entries=_settings.dedup_max_entries,
+    idempotency_ttl=_settings.idempotency_ttl_seconds,
+)
+
+
+def _stamp(tap: attendance_crud.Tap) -> attendance_crud.Tap:
+    # Stamp at arrival so time spent queued never makes a student late.
+    return tap if tap.tapped_at else tap._replace(tapped_at=datetime.utcnow())
+
+
+async def _check_in(db: AsyncSession, tap: attendance_crud.Tap) -> attendance_crud.TapResult:
+    tap = _stamp(tap)
+    if edge.edge_node:
+        return await edge.edge_node.check_in(tap)
+    if tap_writer.tap_writer:
+        return await asyncio.wrap_future(tap_writer.tap_writer.submit(tap))
+    return (await async_attendance_crud.check_taps(db, [tap]))[0]
+
+
+async def check_in(db: AsyncSession, tap: attendance_crud.Tap, idempotency_key: Optional[str] = None) -> attendance_crud.TapResult:
+    """Check in a tap from the event loop.
+
+    In edge mode the tap is journaled and answered locally. With the
+    group-commit writer enabled it is queued and written with others;
+    otherwise it is processed directly on ``db``. A read of the same
+    card in the same room within the dedup window, or a request repeating an
+    ``idempotency_key``, gets the earlier result with ``repeat`` set and
+    touches nothing. Raises ``IdempotencyKeyReused`` when the key was first
+    sent with another card or room.
+    """
+    tapped = (tap.rfid_card_id, tap.room)
+    keys = []
+    if idempotency_key and tap_cache.idempotency_ttl:
+        keys.append((("idempotency", idempotency_key), tap_cache.idempotency_ttl, _replayed))
+    if tap_cache.window:
+        keys.append(((tap.rfid_card_id, tap.room), tap_cache.window, _suppressed))
+    for key, _, counter in keys:
+        entry = tap_cache.get(key)
+        if entry is not None:
+            previous, previous_tap = entry
+            if previous_tap != tapped:
+                raise IdempotencyKeyReused(f"Idempotency-Key {idempotency_key} was used for another tap")
+            counter.inc()
+            return (await asyncio.shield(previous))._replace(repeat=True)
+
+    future = asyncio.get_running_loop().create_future()
+    for key, ttl, _ in keys:
+        tap_cache.put(key, future, ttl, tapped)
+    try:
+        result = await _check_in(db, tap)
+    except BaseException as e:
+        for key, _, _ in keys:
+            tap_cache.discard(key, future)
+        if isinstance(e, asyncio.CancelledError):
+            future.cancel()
+        else:
+            future.set_exception(e)
+            future.exception()  # retrieved; waiters re-raise it
+        raise
+    if result.error:
+        for key, _, _ in keys:
+            tap_cache.discard(key, future)
+    future.set_result(result)
+    return result
@@ -1,15 +1,27 @@
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import Boolean, create_engine, literal_column
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import get_settings
+from .pool import async_engine_options, engine_options
 load_dotenv()
 
-DATABASE_URL = get_settings().postgres_dsn
+settings = get_settings()
+DATABASE_URL = settings.postgres_dsn
+ASYNC_DATABASE_URL = settings.postgres_async_dsn
 
-engine = create_engine(DATABASE_URL)
+engine = create_engine(
+    DATABASE_URL, **engine_options(settings.database_profile, settings.database_pool_overrides)
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, **async_engine_options(settings.database_profile, settings.database_pool_overrides)
+)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -17,4 +29,28 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def get_async_session_factory():
+    """For handlers that open several sessions of their own, such as long-lived WebSockets."""
+    return AsyncSessionLocal
+
+def dialect_insert(db, model):
+    """Return an INSERT for ``model`` that supports ``on_conflict_*`` on the session's dialect."""
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite.insert(model)
+    return postgresql.insert(model)
+
+def inserted_flag(db):
+    """Return a RETURNING column telling rows an upsert inserted from rows it updated.
+
+    Only Postgres can tell, as a freshly inserted row version has ``xmax = 0``;
+    elsewhere this returns None and callers look up the existing rows first.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return literal_column("xmax = 0", Boolean).label("inserted")
+    return None
@@ -0,0 +1,373 @@
+"""Edge mode: answer taps locally and sync them upstream in the background.
+
+With ``edge.enabled`` a tap never waits on the upstream database. It is
+evaluated against the in-memory card and schedule indexes, appended to a
+local SQLite journal in WAL mode and answered straight away. A syncer thread
+replays the journal upstream in batches through ``check_taps``, whose upsert
+keeps the earliest tap, so a batch replayed twice after a crash changes
+nothing. Rows leave the journal only after their batch is committed upstream.
+A batch that fails is replayed tap by tap, and a tap that still fails on its
+own while upstream answers is moved to the ``dead_letters`` table instead of
+holding back every tap behind it.
+
+The journal file also keeps a snapshot of the roster and of the next days'
+sessions, so a node restarted during an outage can still answer taps. The
+local answer is provisional; the upstream evaluation of the replayed tap is
+authoritative.
+"""
+
+import asyncio
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import text
+
+from crud import attendance as attendance_crud
+from models.attendance import AttendanceStatus
+
+from .card_index import CardEntry, card_index
+from .db import SessionLocal
+from .logger import logger
+from .metrics import metrics
+from .schedule_index import (
+    RoomSchedule, ScheduledSession, day_bounds, query_sessions, schedule_index, session_interval,
+)
+
+_append_ms = metrics.histogram("edge_journal_append_ms", "Time to append a tap to the local journal")
+_backlog = metrics.gauge("edge_journal_backlog", "Taps in the local journal waiting to be synced")
+_lag = metrics.gauge("edge_sync_lag_seconds", "Age of the oldest tap waiting to be synced")
+_synced = metrics.counter("edge_synced_total", "Journaled taps committed upstream")
+_failures = metrics.counter("edge_sync_failures_total", "Sync attempts that could not reach or write upstream")
+_dead_letters = metrics.counter("edge_dead_letters_total", "Journaled taps upstream rejected on their own, moved to dead letters")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS taps (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    rfid_card_id TEXT NOT NULL,
+    room TEXT NOT NULL,
+    tapped_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cards (
+    rfid_card_id TEXT PRIMARY KEY,
+    student_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    group_id INTEGER
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id INTEGER PRIMARY KEY,
+    room TEXT NOT NULL,
+    starts_at TEXT NOT NULL,
+    ends_at TEXT NOT NULL,
+    course_id INTEGER,
+    professor_id INTEGER
+);
+CREATE TABLE IF NOT EXISTS dead_letters (
+    id INTEGER PRIMARY KEY,
+    rfid_card_id TEXT NOT NULL,
+    room TEXT NOT NULL,
+    tapped_at TEXT NOT NULL,
+    error TEXT NOT NULL,
+    failed_at TEXT NOT NULL
+);
+"""
+
+
+class SyncFailed(Exception):
+    """Raised when a batch could not be committed upstream."""
+
+
+class EdgeJournal:
+    """Local SQLite file holding unsynced taps and the roster and schedule snapshot."""
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # A tap is only answered once its append is on disk.
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def append(self, tap: attendance_crud.Tap) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO taps (rfid_card_id, room, tapped_at) VALUES (?, ?, ?)",
+                (tap.rfid_card_id, tap.room, tap.tapped_at.isoformat()),
+            )
+        return cursor.lastrowid
+
+    def pending(self, limit: int) -> list[tuple[int, attendance_crud.Tap]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, rfid_card_id, room, tapped_at FROM taps ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+        return [(row[0], attendance_crud.Tap(row[1], row[2], datetime.fromisoformat(row[3]))) for row in rows]
+
+    def remove(self, upto: int):
+        """Drop the taps up to and including id ``upto``."""
+        with self._lock:
+            self._conn.execute("DELETE FROM taps WHERE id <= ?", (upto,))
+
+    def dead_letter(self, tap_id: int, error: str):
+        """Move tap ``tap_id`` out of the journal into ``dead_letters``."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(
+                    "INSERT INTO dead_letters SELECT id, rfid_card_id, room, tapped_at, ?, ? FROM taps WHERE id = ?",
+                    (error, datetime.utcnow().isoformat(), tap_id),
+                )
+                self._conn.execute("DELETE FROM taps WHERE id = ?", (tap_id,))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def dead_letters(self) -> list[tuple[int, attendance_crud.Tap, str]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, rfid_card_id, room, tapped_at, error FROM dead_letters ORDER BY id"
+            ).fetchall()
+        return [(row[0], attendance_crud.Tap(row[1], row[2], datetime.fromisoformat(row[3])), row[4]) for row in rows]
+
+    def backlog(self) -> tuple[int, Optional[datetime]]:
+        """Return the number of unsynced taps and the time of the oldest."""
+        with self._lock:
+            count, oldest = self._conn.execute("SELECT count(*), min(tapped_at) FROM taps").fetchone()
+        return count, datetime.fromisoformat(oldest) if oldest else None
+
+    def save_snapshot(self, cards: dict[str, CardEntry], sessions: list[tuple[str, ScheduledSession]]):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute("DELETE FROM cards")
+                self._conn.executemany(
+                    "INSERT INTO cards VALUES (?, ?, ?, ?)",
+                    [(card, *entry) for card, entry in cards.items()],
+                )
+                self._conn.execute("DELETE FROM sessions")
+                self._conn.executemany(
+                    "INSERT INTO sessions VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (s.session_id, room, s.start.isoformat(), s.end.isoformat(), s.course_id, s.professor_id)
+                        for room, s in sessions
+                    ],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def load_cards(self) -> dict[str, CardEntry]:
+        with self._lock:
+            rows = self._conn.execute("SELECT rfid_card_id, student_id, name, group_id FROM cards").fetchall()
+        return {card: CardEntry(*entry) for card, *entry in rows}
+
+    def load_schedule(self, day: date) -> dict[str, RoomSchedule]:
+        start, end = day_bounds(day)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT room, starts_at, ends_at, session_id, course_id, professor_id FROM sessions"
+                " WHERE starts_at >= ? AND starts_at < ?",
+                (start.isoformat(), end.isoformat()),
+            ).fetchall()
+        rooms: dict[str, RoomSchedule] = {}
+        for room, session_start, session_end, *rest in rows:
+            entry = ScheduledSession(datetime.fromisoformat(session_start), datetime.fromisoformat(session_end), *rest)
+            rooms.setdefault(room, RoomSchedule()).add(entry)
+        return rooms
+
+
+class EdgeNode:
+    """Local check-in against the indexes plus the syncer thread draining the journal."""
+
+    def __init__(
+        self,
+        journal: EdgeJournal,
+        batch_size: int = 500,
+        sync_interval: float = 2,
+        snapshot_interval: float = 300,
+        snapshot_days: int = 2,
+        session_factory=SessionLocal,
+    ):
+        self.journal = journal
+        self.batch_size = batch_size
+        self.sync_interval = sync_interval
+        self.snapshot_interval = snapshot_interval
+        self.snapshot_days = snapshot_days
+        self.session_factory = session_factory
+        self._marks: dict[tuple[int, int], AttendanceStatus] = {}
+        self._marks_day: Optional[date] = None
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._failures = 0
+        self._snapshot_at = 0.0
+
+    def restore_indexes(self):
+        """Load the indexes from the journal snapshot when upstream is unreachable."""
+        card_index.replace(self.journal.load_cards())
+        today = datetime.utcnow().date()
+        schedule_index.replace(today, self.journal.load_schedule(today))
+        logger.info(f"Indexes restored from the edge snapshot ({len(card_index)} cards)")
+
+    def evaluate(self, tap: attendance_crud.Tap) -> attendance_crud.TapResult:
+        """Answer a tap from the in-memory indexes, as ``check_taps`` would."""
+        student = card_index.get(tap.rfid_card_id)
+        if student is None:
+            return attendance_crud.TapResult("Unknown card")
+        day = tap.tapped_at.date()
+        if schedule_index.day == day:
+            session = schedule_index.find(tap.room, tap.tapped_at)
+        else:
+            # Past midnight without a reconcile, or a tap buffered on the reader.
+            schedule = self.journal.load_schedule(day).get(tap.room)
+            session = schedule.find(tap.tapped_at) if schedule else None
+        if session is None:
+            return attendance_crud.TapResult("No active session", student_id=student.student_id, student_name=student.name)
+        if self._marks_day != day:
+            self._marks, self._marks_day = {}, day
+        # The earliest tap of a student in a session decides present or late.
+        status = self._marks.setdefault(
+            (session.session_id, student.student_id), attendance_crud.tap_status(tap.tapped_at, session.start)
+        )
+        return attendance_crud.TapResult(
+            f"Marked: {status.value}",
+            status=status,
+            student_id=student.student_id,
+            student_name=student.name,
+            session_id=session.session_id,
+            professor_id=session.professor_id,
+        )
+
+    def record(self, tap: attendance_crud.Tap) -> attendance_crud.TapResult:
+        tap = tap._replace(tapped_at=attendance_crud.as_naive_utc(tap.tapped_at))
+        started = time.monotonic()
+        self.journal.append(tap)
+        _append_ms.observe((time.monotonic() - started) * 1000)
+        _backlog.inc()
+        return self.evaluate(tap)
+
+    async def check_in(self, tap: attendance_crud.Tap) -> attendance_crud.TapResult:
+        """Journal a stamped tap and answer it locally."""
+        return await asyncio.to_thread(self.record, tap)
+
+    async def check_in_batch(self, taps: list[attendance_crud.Tap]) -> list[attendance_crud.TapResult]:
+        """Journal stamped taps and answer them locally, in order."""
+        return await asyncio.to_thread(lambda: [self.record(tap) for tap in taps])
+
+    def start(self):
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout: float = 5):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join(timeout)
+        if not (self._thread and self._thread.is_alive()):
+            self.journal.close()
+
+    def sync_once(self) -> int:
+        """Replay one batch upstream, returning the number of taps taken off the journal.
+
+        When the batch fails its taps are replayed one at a time; raises
+        ``SyncFailed`` once a tap fails while upstream is unreachable.
+        """
+        batch = self.journal.pending(self.batch_size)
+        if not batch:
+            return 0
+        results = self._replay([tap for _, tap in batch])
+        if not any(result.error for result in results):
+            self.journal.remove(batch[-1][0])
+            _synced.inc(len(batch))
+            return len(batch)
+        for tap_id, tap in batch:
+            result = self._replay([tap])[0]
+            if not result.error:
+                self.journal.remove(tap_id)
+                _synced.inc()
+            elif self._reachable():
+                logger.error(f"Edge tap {tap_id} rejected upstream, moved to dead letters: {result.message}")
+                self.journal.dead_letter(tap_id, result.message)
+                _dead_letters.inc()
+            else:
+                raise SyncFailed(result.message)
+        return len(batch)
+
+    def _replay(self, taps: list[attendance_crud.Tap]) -> list[attendance_crud.TapResult]:
+        db = self.session_factory()
+        try:
+            return attendance_crud.check_taps(db, taps)
+        finally:
+            db.close()
+
+    def _reachable(self) -> bool:
+        db = self.session_factory()
+        try:
+            db.execute(text("SELECT 1"))
+            return True
+        except Exception:
+            return False
+        finally:
+            db.close()
+
+    def refresh_snapshot(self):
+        """Save the roster and the next days' sessions for restarts during an outage."""
+        if not card_index.loaded:
+            return
+        start, _ = day_bounds(datetime.utcnow().date())
+        db = self.session_factory()
+        try:
+            rows = query_sessions(db, start, start + timedelta(days=self.snapshot_days))
+        finally:
+            db.close()
+        sessions = []
+        for session, professor_id in rows:
+            entry = ScheduledSession(*session_interval(session), session.session_id, session.course_id, professor_id)
+            sessions.append((session.room, entry))
+        self.journal.save_snapshot(card_index.entries(), sessions)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                synced = self.sync_once()
+                if time.monotonic() - self._snapshot_at > self.snapshot_interval:
+                    self.refresh_snapshot()
+                    self._snapshot_at = time.monotonic()
+                self._failures = 0
+            except Exception as e:
+                _failures.inc()
+                self._failures += 1
+                synced = 0
+                logger.warning(f"Edge sync failed ({self._failures} in a row): {e}")
+            count, oldest = self.journal.backlog()
+            _backlog.set(count)
+            _lag.set((datetime.utcnow() - oldest).total_seconds() if oldest else 0)
+            if synced < self.batch_size:
+                self._stopped.wait(min(self.sync_interval * 2 ** self._failures, 60))
+
+
+edge_node: Optional[EdgeNode] = None
+
+
+def start_edge_node(path: str, **kwargs) -> EdgeNode:
+    global edge_node
+    edge_node = EdgeNode(EdgeJournal(path), **kwargs)
+    edge_node.start()
+    return edge_node
+
+
+def stop_edge_node():
+    global edge_node
+    if edge_node:
+        edge_node.stop()
+        edge_node = None
@@ -0,0 +1,265 @@
+"""Attendance event bus.
+
+Events published by any worker (or the serial gateway) are delivered
+to the subscribers of every worker, so each worker can push them to its own
+WebSocket clients. The backend is chosen in ``config.yml``:
+
+- ``inprocess``: single worker, events never leave the process.
+- ``postgres``: ``LISTEN``/``NOTIFY`` on a channel; needs a direct or
+  session-mode connection, transaction poolers drop ``LISTEN``.
+- ``unix``: every worker binds a datagram socket in a shared directory and
+  publishes to all of them; for several workers on one host.
+"""
+
+import abc
+import asyncio
+import json
+import os
+import queue
+import select
+import socket
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+from .logger import logger
+from .metrics import metrics
+
+_published = metrics.counter("events_published_total", "Events published to the event bus")
+_delivered = metrics.counter("events_delivered_total", "Events delivered to this worker's subscribers")
+_dropped = metrics.counter("events_dropped_total", "Events that could not be published")
+
+Handler = Callable[[dict], Awaitable[None]]
+
+_handlers: list[Handler] = []
+
+
+def subscribe(handler: Handler):
+    """Register a coroutine function called with every delivered event."""
+    _handlers.append(handler)
+
+
+def attendance_event(result, room: str, timestamp: datetime) -> dict:
+    """Build the event for a marked tap, with the topics it is published to."""
+    topics = [f"room:{room}", f"session:{result.session_id}"]
+    if result.professor_id is not None:
+        topics.append(f"professor:{result.professor_id}")
+    return {
+        "topics": topics,
+        "message": json.dumps({
+            "type": "attendance",
+            "student": result.student_name or "Unknown",
+            "room": room,
+            "session_id": result.session_id,
+            "professor_id": result.professor_id,
+            "status": result.message,
+            "timestamp": timestamp.isoformat(),
+        }),
+    }
+
+
+class EventBus(abc.ABC):
+    """Base backend: hands received events to the subscribers on the event loop."""
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+
+    async def stop(self):
+        pass
+
+    @abc.abstractmethod
+    def publish(self, event: dict):
+        """Publish ``event`` without blocking; safe to call from any thread."""
+
+    def _dispatch(self, event: dict):
+        loop = self._loop
+        if loop is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                _dropped.inc()
+                return
+        _delivered.inc()
+        for handler in _handlers:
+            asyncio.run_coroutine_threadsafe(handler(event), loop)
+
+    def _dispatch_raw(self, payload: bytes):
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.warning("Ignoring malformed event payload")
+            return
+        self._dispatch(event)
+
+
+class InProcessEventBus(EventBus):
+    def publish(self, event: dict):
+        _published.inc()
+        self._dispatch(event)
+
+
+class PostgresEventBus(EventBus):
+    """``LISTEN``/``NOTIFY`` backend.
+
+    A listener thread waits on the connection socket for notifications and a
+    publisher thread sends ``pg_notify`` so publishing never blocks the caller.
+    """
+
+    def __init__(self, dsn: str, channel: str = "attendance_events"):
+        super().__init__()
+        self.dsn = dsn
+        self.channel = channel
+        self._outbox: queue.SimpleQueue = queue.SimpleQueue()
+        self._stopped = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def _connect(self):
+        import psycopg2
+
+        conn = psycopg2.connect(self.dsn)
+        conn.autocommit = True
+        return conn
+
+    async def start(self):
+        await super().start()
+        self._stopped.clear()
+        self._threads = [
+            threading.Thread(target=self._listen, daemon=True),
+            threading.Thread(target=self._send, daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    async def stop(self):
+        self._stopped.set()
+        self._outbox.put(None)
+
+    def publish(self, event: dict):
+        _published.inc()
+        self._outbox.put(json.dumps(event))
+
+    def _listen(self):
+        while not self._stopped.is_set():
+            conn = None
+            try:
+                conn = self._connect()
+                with conn.cursor() as cursor:
+                    cursor.execute(f'LISTEN "{self.channel}"')
+                while not self._stopped.is_set():
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self._dispatch_raw(conn.notifies.pop(0).payload)
+            except Exception as e:
+                logger.error(f"Event bus listener error: {e}")
+                self._stopped.wait(1)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def _send(self):
+        conn = None
+        while True:
+            payload = self._outbox.get()
+            if payload is None:
+                break
+            try:
+                conn = conn or self._connect()
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT pg_notify(%s, %s)", (self.channel, payload))
+            except Exception as e:
+                _dropped.inc()
+                logger.error(f"Event bus publish error: {e}")
+                conn = None
+        if conn is not None:
+            conn.close()
+
+
+class UnixSocketEventBus(EventBus):
+    """Datagram sockets in a shared directory, one per worker.
+
+    Publishing sends the event to every socket in the directory, including
+    this worker's own; sockets left behind by dead workers are removed.
+    """
+
+    def __init__(self, socket_dir: str):
+        super().__init__()
+        self.socket_dir = Path(socket_dir)
+        self.path = self.socket_dir / f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock"
+        self._receiver: Optional[socket.socket] = None
+        self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sender.setblocking(False)
+
+    async def start(self):
+        await super().start()
+        self.socket_dir.mkdir(parents=True, exist_ok=True)
+        self._receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._receiver.setblocking(False)
+        self._receiver.bind(str(self.path))
+        self._loop.add_reader(self._receiver.fileno(), self._on_readable)
+
+    async def stop(self):
+        if self._receiver is not None:
+            self._loop.remove_reader(self._receiver.fileno())
+            self._receiver.close()
+            self._receiver = None
+            self.path.unlink(missing_ok=True)
+        self._sender.close()
+
+    def _on_readable(self):
+        while True:
+            try:
+                payload = self._receiver.recv(65536)
+            except BlockingIOError:
+                return
+            self._dispatch_raw(payload)
+
+    def publish(self, event: dict):
+        _published.inc()
+        payload = json.dumps(event).encode()
+        for path in self.socket_dir.glob("*.sock"):
+            try:
+                self._sender.sendto(payload, str(path))
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Nobody is bound to it any more.
+                path.unlink(missing_ok=True)
+            except OSError as e:
+                _dropped.inc()
+                logger.warning(f"Dropping event for {path.name}: {e}")
+
+
+_bus: EventBus = InProcessEventBus()
+
+
+def publish(event: dict):
+    """Publish an event through the configured backend."""
+    _bus.publish(event)
+
+
+def create_event_bus(settings) -> EventBus:
+    backend = settings.event_bus_backend
+    if backend == "postgres":
+        return PostgresEventBus(settings.event_bus_dsn, channel=settings.event_bus_channel)
+    if backend == "unix":
+        return UnixSocketEventBus(settings.event_bus_socket_dir)
+    if backend != "inprocess":
+        raise ValueError(f"Unknown event bus backend: {backend}")
+    return InProcessEventBus()
+
+
+async def start_event_bus(bus: EventBus):
+    global _bus
+    await bus.start()
+    _bus = bus
+
+
+async def stop_event_bus():
+    global _bus
+    await _bus.stop()
+    _bus = InProcessEventBus()
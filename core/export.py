@@ -0,0 +1,65 @@
+"""Streaming encoders for exports.
+
+Rows arrive in partitions from a server-side cursor and each partition is
+encoded into one chunk, so memory use depends on the partition size only.
+"""
+
+import csv
+import enum
+import io
+import json
+import zlib
+from datetime import date, datetime
+from typing import AsyncIterator, Iterable
+
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _value(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def encode_csv(partition: Iterable, columns=None) -> bytes:
+    """Encode rows as CSV; a header line is written when ``columns`` is given."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if columns is not None:
+        writer.writerow(columns)
+    writer.writerows([_value(value) for value in row] for row in partition)
+    return buffer.getvalue().encode()
+
+
+def encode_ndjson(partition: Iterable, columns) -> bytes:
+    return "".join(
+        json.dumps({column: _value(value) for column, value in zip(columns, row)}) + "\n"
+        for row in partition
+    ).encode()
+
+
+async def encode_rows(result, fmt: str) -> AsyncIterator[bytes]:
+    """Encode a streamed ``AsyncResult`` partition by partition."""
+    columns = list(result.keys())
+    if fmt == "csv":
+        yield encode_csv((), columns)
+    async for partition in result.partitions():
+        if fmt == "csv":
+            yield encode_csv(partition)
+        else:
+            yield encode_ndjson(partition, columns)
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Compress a byte stream into a single gzip member as it goes."""
+    compressor = zlib.compressobj(wbits=31)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,108 @@
+"""In-process metrics."""
+
+import threading
+from bisect import bisect_left
+
+
+class Counter:
+    """Monotonically increasing count."""
+
+    def __init__(self, description: str = ""):
+        self.description = description
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1):
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self) -> dict:
+        return {"type": "counter", "value": self.value}
+
+
+class Gauge:
+    """Value that can go up and down."""
+
+    def __init__(self, description: str = ""):
+        self.description = description
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        with self._lock:
+            self.value -= amount
+
+    def snapshot(self) -> dict:
+        return {"type": "gauge", "value": self.value}
+
+
+class Histogram:
+    """Distribution of observed values over fixed buckets."""
+
+    def __init__(self, description: str = "", buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000)):
+        self.description = description
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.counts[bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+            self.max = max(self.max, value)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            buckets = {f"le_{bound}": count for bound, count in zip(self.buckets, self.counts)}
+            buckets["le_inf"] = self.counts[-1]
+            return {
+                "type": "histogram",
+                "count": self.count,
+                "sum": self.sum,
+                "avg": self.sum / self.count if self.count else 0.0,
+                "max": self.max,
+                "buckets": buckets,
+            }
+
+
+class MetricsRegistry:
+    """Named metrics, created on first use."""
+
+    def __init__(self):
+        self._metrics: dict = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(**kwargs)
+            return metric
+
+    def counter(self, name: str, description: str = "") -> Counter:
+        return self._get(Counter, name, description=description)
+
+    def gauge(self, name: str, description: str = "") -> Gauge:
+        return self._get(Gauge, name, description=description)
+
+    def histogram(self, name: str, description: str = "", **kwargs) -> Histogram:
+        return self._get(Histogram, name, description=description, **kwargs)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            metrics = dict(self._metrics)
+        return {name: metric.snapshot() for name, metric in sorted(metrics.items())}
+
+
+metrics = MetricsRegistry()
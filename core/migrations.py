@@ -0,0 +1,168 @@
+"""Versioned SQL migrations.
+
+Each ``migrations/NNNN_name.sql`` file is applied once, in order, and
+recorded in ``schema_migrations``. A file runs in one transaction unless its
+first line is ``-- migrate: no-transaction``; those statements run one by one
+in autocommit, as ``CREATE INDEX CONCURRENTLY`` requires; other dialects
+build those indexes in place.
+
+A database without any tables is created from the models and stamped with
+every migration, so migrations only ever run against existing deployments.
+A database with tables but no ``schema_migrations`` was built by
+``create_all`` before migrations were tracked and starts at version zero:
+every migration runs, so each one must be safe to re-run.
+"""
+
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, func, inspect, select
+from sqlalchemy.engine import Connection, Engine
+
+from .logger import logger
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "migrations"
+NO_TRANSACTION = "-- migrate: no-transaction"
+CONCURRENTLY = re.compile(r"\bCONCURRENTLY\s+", re.IGNORECASE)
+
+# Held for the whole run so several workers starting together migrate once.
+# It is transaction-scoped: a transaction pooler keeps one server connection
+# for the whole transaction, where a session lock and its unlock could land on
+# different ones.
+ADVISORY_LOCK_KEY = 7204331
+
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", String, primary_key=True),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+class Migration(NamedTuple):
+    version: str
+    path: Path
+
+    @property
+    def sql(self) -> str:
+        return self.path.read_text()
+
+    @property
+    def transactional(self) -> bool:
+        return not self.sql.lstrip().startswith(NO_TRANSACTION)
+
+
+def discover(directory: Path = MIGRATIONS_DIR) -> list[Migration]:
+    return [Migration(path.stem, path) for path in sorted(directory.glob("[0-9]*.sql"))]
+
+
+def split_statements(sql: str) -> list[str]:
+    """Split a script on top-level semicolons, skipping comments and quoted text."""
+    statements, current = [], []
+    quote = None
+    i = 0
+    while i < len(sql):
+        char = sql[i]
+        if quote is None and sql.startswith("--", i):
+            end = sql.find("\n", i)
+            i = len(sql) if end == -1 else end
+            continue
+        if quote is None and sql.startswith("$$", i):
+            quote = "$$"
+            current.append("$$")
+            i += 2
+            continue
+        if quote == "$$" and sql.startswith("$$", i):
+            quote = None
+            current.append("$$")
+            i += 2
+            continue
+        if quote is None and char == "'":
+            quote = "'"
+        elif quote == "'" and char == "'":
+            quote = None
+        if quote is None and char == ";":
+            statements.append("".join(current).strip())
+            current = []
+        else:
+            current.append(char)
+        i += 1
+    statements.append("".join(current).strip())
+    return [statement for statement in statements if statement]
+
+
+def applied_versions(connection: Connection) -> set[str]:
+    return set(connection.execute(select(schema_migrations.c.version)).scalars())
+
+
+def _record(connection: Connection, version: str):
+    connection.execute(schema_migrations.insert().values(version=version, applied_at=datetime.utcnow()))
+
+
+def _apply(engine: Engine, migration: Migration):
+    statements = split_statements(migration.sql)
+    if migration.transactional:
+        with engine.begin() as connection:
+            for statement in statements:
+                connection.exec_driver_sql(statement)
+            _record(connection, migration.version)
+        return
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        for statement in statements:
+            if connection.dialect.name != "postgresql":
+                statement = CONCURRENTLY.sub("", statement)
+            connection.exec_driver_sql(statement)
+        _record(connection, migration.version)
+
+
+def stamp(engine: Engine, upto: Optional[str] = None, directory: Path = MIGRATIONS_DIR) -> list[str]:
+    """Mark migrations as applied without running them, up to and including ``upto``."""
+    stamped = []
+    with engine.begin() as connection:
+        schema_migrations.create(connection, checkfirst=True)
+        done = applied_versions(connection)
+        for migration in discover(directory):
+            if migration.version not in done:
+                _record(connection, migration.version)
+                stamped.append(migration.version)
+            if upto is not None and migration.version.startswith(upto):
+                break
+    return stamped
+
+
+def migrate(engine: Engine, metadata: MetaData, directory: Path = MIGRATIONS_DIR) -> list[str]:
+    """Bring the database up to date and return the versions applied.
+
+    Tables created before migrations were tracked get every migration.
+    """
+    lock = engine.connect()
+    try:
+        if lock.dialect.name == "postgresql":
+            # Released when the transaction on ``lock`` ends, after the run.
+            lock.execute(select(func.pg_advisory_xact_lock(ADVISORY_LOCK_KEY)))
+        tables = set(inspect(lock).get_table_names())
+        if not tables - {schema_migrations.name}:
+            metadata.create_all(bind=engine)
+            stamp(engine, directory=directory)
+            logger.info("Created database schema")
+            return []
+        if schema_migrations.name not in tables:
+            logger.warning("Database has tables but no schema_migrations; applying every migration")
+            with engine.begin() as connection:
+                schema_migrations.create(connection)
+
+        with engine.connect() as connection:
+            done = applied_versions(connection)
+        applied = []
+        for migration in discover(directory):
+            if migration.version in done:
+                continue
+            logger.info(f"Applying migration {migration.version}")
+            _apply(engine, migration)
+            applied.append(migration.version)
+        return applied
+    finally:
+        lock.rollback()
+        lock.close()
@@ -0,0 +1,48 @@
+"""Keyset pagination for list endpoints.
+
+List endpoints are ordered by primary key. Passing the opaque ``after``
+token returned in the ``X-Next-Cursor`` header continues strictly after the
+last row of the previous page with an indexed ``WHERE key > :after``, so
+deep pages cost the same as the first one and rows inserted meanwhile do
+not shift the pages. ``skip`` keeps working for existing clients.
+"""
+
+import base64
+import json
+from typing import Optional
+
+from fastapi import HTTPException, Response, status
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps([value]).encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: Optional[str]):
+    """Return the integer key encoded in ``token``, or ``None`` when there is no token."""
+    if token is None:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        (value,) = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(value, int) or isinstance(value, bool):
+            raise TypeError("cursor key must be an integer")
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return value
+
+
+def paginate(query, key, skip: int = 0, limit: int = 100, after=None):
+    """Order ``query`` (a ``Query`` or ``Select``) by ``key`` and apply the page bounds."""
+    query = query.order_by(key)
+    if after is not None:
+        query = query.filter(key > after)
+    return query.offset(skip).limit(limit)
+
+
+def set_next_cursor(response: Response, items, key: str, limit: int):
+    """Advertise the cursor for the next page when this page is full."""
+    if items and len(items) >= limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(getattr(items[-1], key))
@@ -0,0 +1,113 @@
+"""Connection pool profiles.
+
+A profile sizes the pool for what sits between the app and Postgres:
+
+- ``direct``: Postgres itself; long-lived connections and prepared statements.
+- ``session-pooler``: PgBouncer/Supavisor in session mode (Supabase port 5432);
+  each client connection owns a server connection, so keep the pool small.
+- ``transaction-pooler``: transaction mode (Supabase port 6543); server
+  connections change between transactions, so asyncpg must not keep named
+  prepared statements, and idle connections are recycled quickly.
+
+Pools record how long checkouts wait and how full they are, so the sizes can
+be tuned from ``GET /metrics``.
+"""
+
+import time
+from uuid import uuid4
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from .metrics import metrics
+
+PROFILES = {
+    "direct": {
+        "pool_size": 10,
+        "max_overflow": 20,
+        "pool_timeout": 30,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+        "prepared_statements": True,
+    },
+    "session-pooler": {
+        "pool_size": 5,
+        "max_overflow": 5,
+        "pool_timeout": 30,
+        "pool_recycle": 600,
+        "pool_pre_ping": True,
+        "prepared_statements": True,
+    },
+    "transaction-pooler": {
+        "pool_size": 5,
+        "max_overflow": 15,
+        "pool_timeout": 10,
+        "pool_recycle": 300,
+        "pool_pre_ping": True,
+        "prepared_statements": False,
+    },
+}
+
+WAIT_BUCKETS = (0.1, 1, 5, 10, 25, 50, 100, 250, 1000, 5000)
+
+
+def profile_settings(profile: str, overrides: dict = None) -> dict:
+    """The settings of ``profile`` with any ``overrides`` from config applied."""
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown database profile: {profile} (expected one of {', '.join(PROFILES)})")
+    unknown = set(overrides or {}) - set(PROFILES[profile])
+    if unknown:
+        raise ValueError(f"Unknown database pool settings: {', '.join(sorted(unknown))}")
+    return {**PROFILES[profile], **(overrides or {})}
+
+
+def instrumented(pool_class, name: str):
+    """A subclass of ``pool_class`` that reports checkout waits and saturation under ``db_pool_<name>_*``."""
+    wait = metrics.histogram(f"db_pool_{name}_checkout_wait_ms", "Time spent waiting for a pooled connection", buckets=WAIT_BUCKETS)
+    checked_out = metrics.gauge(f"db_pool_{name}_checked_out", "Connections currently checked out")
+    saturation = metrics.gauge(f"db_pool_{name}_saturation", "Checked-out connections over pool_size + max_overflow")
+    timeouts = metrics.counter(f"db_pool_{name}_timeouts_total", "Checkouts that gave up after pool_timeout")
+
+    class InstrumentedPool(pool_class):
+        def _report(self):
+            in_use = self.checkedout()
+            checked_out.set(in_use)
+            saturation.set(round(in_use / (self.size() + max(self._max_overflow, 0)), 3))
+
+        def _do_get(self):
+            started = time.monotonic()
+            try:
+                connection = super()._do_get()
+            except exc.TimeoutError:
+                timeouts.inc()
+                raise
+            finally:
+                wait.observe((time.monotonic() - started) * 1000)
+            self._report()
+            return connection
+
+        def _do_return_conn(self, record):
+            super()._do_return_conn(record)
+            self._report()
+
+    InstrumentedPool.__name__ = f"Instrumented{pool_class.__name__}"
+    return InstrumentedPool
+
+
+def engine_options(profile: str, overrides: dict = None, name: str = "primary") -> dict:
+    """Keyword arguments for ``create_engine``."""
+    settings = profile_settings(profile, overrides)
+    settings.pop("prepared_statements")
+    return {"poolclass": instrumented(QueuePool, name), **settings}
+
+
+def async_engine_options(profile: str, overrides: dict = None, name: str = "primary_async") -> dict:
+    """Keyword arguments for ``create_async_engine`` with the asyncpg driver."""
+    settings = profile_settings(profile, overrides)
+    options = {"poolclass": instrumented(AsyncAdaptedQueuePool, name), **settings}
+    if not options.pop("prepared_statements"):
+        options["connect_args"] = {
+            "statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    return options
@@ -0,0 +1,157 @@
+"""Tap ingestion over a persistent WebSocket, one connection per reader.
+
+A reader authenticates once when it connects, with a token derived from
+``secret_key`` and its reader id (``python manage.py reader-token <id>``).
+The server greets it with the number of taps it may have in flight::
+
+    {"type": "hello", "reader_id": "lab-3-101", "max_in_flight": 8}
+
+Taps are JSON messages with an ``id`` chosen by the reader and an optional
+``tapped_at``. Pipelined taps are checked in concurrently, so replies can
+arrive out of order and carry the ``id`` of their tap::
+
+    -> {"id": 41, "rfid_card_id": "A1B2C3", "room": "3-101"}
+    <- {"id": 41, "message": "Marked: present"}
+
+A tap sent while ``max_in_flight`` taps are unanswered is refused with
+``{"id": 42, "error": "Busy"}``; a message that is not a tap gets
+``"error": "Invalid tap"``, and one whose ``tapped_at`` is more than
+``max_age_seconds`` off the server clock gets ``"error": "Stale tap"``.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from crud import attendance as attendance_crud
+
+from . import events
+from .checkin import check_in
+from .logger import logger
+from .metrics import metrics
+from .tap_writer import TapQueueFull
+
+_readers = metrics.gauge("reader_ws_readers", "Readers connected over the reader WebSocket")
+_in_flight = metrics.gauge("reader_ws_in_flight", "Reader WebSocket taps being checked in")
+_taps = metrics.counter("reader_ws_taps_total", "Taps received over the reader WebSocket")
+_busy = metrics.counter("reader_ws_busy_total", "Reader WebSocket taps refused because the reader had too many in flight")
+_invalid = metrics.counter("reader_ws_invalid_total", "Reader WebSocket messages that were not taps")
+_stale = metrics.counter("reader_ws_stale_total", "Reader WebSocket taps refused because their tap time was too far off")
+_latency = metrics.histogram("reader_ws_reply_latency_ms", "Time from receiving a reader WebSocket tap to sending its reply")
+
+
+def reader_token(key: bytes, reader_id: str) -> str:
+    """Token a reader presents when it connects."""
+    return hmac.new(key, f"reader-ws:{reader_id}".encode(), hashlib.sha256).hexdigest()
+
+
+def verify_reader_token(key: bytes, reader_id: str, token: str) -> bool:
+    return hmac.compare_digest(reader_token(key, reader_id), token)
+
+
+def parse_tap(message: dict) -> attendance_crud.Tap:
+    """Build a tap from a reader message; raises ValueError, TypeError or KeyError."""
+    card, room = message["rfid_card_id"], message["room"]
+    if not isinstance(card, str) or not isinstance(room, str):
+        raise TypeError("rfid_card_id and room must be strings")
+    tapped_at = message.get("tapped_at")
+    if tapped_at is not None:
+        tapped_at = attendance_crud.as_naive_utc(datetime.fromisoformat(tapped_at))
+    return attendance_crud.Tap(card, room, tapped_at)
+
+
+class ReaderChannel:
+    """One connected reader: reads taps, checks them in concurrently and replies by id."""
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        reader_id: str,
+        session_factory,
+        max_in_flight: int = 8,
+        max_age_seconds: float = 300,
+    ):
+        self.websocket = websocket
+        self.reader_id = reader_id
+        self.session_factory = session_factory
+        self.max_in_flight = max_in_flight
+        self.max_age: Optional[timedelta] = timedelta(seconds=max_age_seconds) if max_age_seconds else None
+        self._tasks: set[asyncio.Task] = set()
+        self._send_lock = asyncio.Lock()
+
+    async def serve(self):
+        await self.websocket.accept()
+        _readers.inc()
+        logger.info(f"Reader {self.reader_id} connected")
+        try:
+            await self.send({"type": "hello", "reader_id": self.reader_id, "max_in_flight": self.max_in_flight})
+            while True:
+                await self.receive(await self.websocket.receive_text())
+        except WebSocketDisconnect:
+            logger.info(f"Reader {self.reader_id} disconnected")
+        finally:
+            _readers.dec()
+            for task in list(self._tasks):
+                task.cancel()
+
+    async def receive(self, data: str):
+        message = None
+        try:
+            message = json.loads(data)
+            tap_id = message["id"]
+            tap = parse_tap(message)
+        except (ValueError, TypeError, KeyError):
+            _invalid.inc()
+            await self.send({"id": message.get("id") if isinstance(message, dict) else None, "error": "Invalid tap"})
+            return
+        _taps.inc()
+        if self.max_age and tap.tapped_at and abs(datetime.utcnow() - tap.tapped_at) > self.max_age:
+            _stale.inc()
+            await self.send({"id": tap_id, "error": "Stale tap"})
+            return
+        if len(self._tasks) >= self.max_in_flight:
+            _busy.inc()
+            await self.send({"id": tap_id, "error": "Busy"})
+            return
+        task = asyncio.create_task(self.answer(tap_id, tap))
+        self._tasks.add(task)
+        _in_flight.inc()
+        task.add_done_callback(self._done)
+
+    def _done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        _in_flight.dec()
+
+    async def answer(self, tap_id, tap: attendance_crud.Tap):
+        received = time.monotonic()
+        try:
+            reply = {"id": tap_id, "message": await self.process(tap)}
+        except TapQueueFull:
+            _busy.inc()
+            reply = {"id": tap_id, "error": "Busy"}
+        except Exception as e:
+            logger.error(f"Error checking in tap from reader {self.reader_id}: {e}", exc_info=True)
+            reply = {"id": tap_id, "error": "Error"}
+        await self.send(reply)
+        _latency.observe((time.monotonic() - received) * 1000)
+
+    async def process(self, tap: attendance_crud.Tap) -> str:
+        async with self.session_factory() as db:
+            result = await check_in(db, tap)
+        if result.status is not None and not result.repeat:
+            events.publish(events.attendance_event(result, tap.room, tap.tapped_at or datetime.utcnow()))
+        return result.message
+
+    async def send(self, message: dict):
+        async with self._send_lock:
+            try:
+                await self.websocket.send_text(json.dumps(message))
+            except Exception:
+                # The receive loop sees the disconnect and cleans up.
+                pass
@@ -0,0 +1,48 @@
+"""Periodic reconciliation of the in-memory indexes against the database."""
+
+import threading
+import time
+
+from .card_index import card_index
+from .db import SessionLocal
+from .logger import logger
+from .schedule_index import schedule_index
+
+
+def load_indexes():
+    """Populate every in-memory index at startup."""
+    db = SessionLocal()
+    try:
+        count = card_index.load(db)
+        logger.info(f"Card index loaded with {count} cards")
+        count = schedule_index.load(db)
+        logger.info(f"Schedule index loaded with {count} sessions for {schedule_index.day}")
+    finally:
+        db.close()
+
+
+def reconcile_indexes():
+    """Reload every in-memory index from the database."""
+    db = SessionLocal()
+    try:
+        changed = card_index.reconcile(db)
+        if changed:
+            logger.info(f"Card index reconciled, {changed} cards changed")
+        schedule_index.load(db)
+    finally:
+        db.close()
+
+
+def reconcile_loop(interval: float):
+    while True:
+        time.sleep(interval)
+        try:
+            reconcile_indexes()
+        except Exception as e:
+            logger.error(f"Error reconciling indexes: {e}")
+
+
+def start_reconcile_thread(interval: float):
+    thread = threading.Thread(target=reconcile_loop, args=(interval,), daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,190 @@
+"""Read replica routing.
+
+Read-only endpoints depend on ``get_read_db`` / ``get_async_read_db``, which
+hand out a session on a healthy replica, round-robin, and fall back to the
+primary when no replica is configured, reachable or caught up. Writes and
+read-your-writes paths keep using ``get_db`` / ``get_async_db``.
+"""
+
+import itertools
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from .config import get_settings
+from .db import AsyncSessionLocal, SessionLocal
+from .logger import logger
+from .metrics import metrics
+from .pool import async_engine_options, engine_options
+
+_healthy = metrics.gauge("read_replicas_healthy", "Replicas currently serving reads")
+_lag = metrics.gauge("read_replica_max_lag_seconds", "Largest replication lag seen at the last check")
+_fallbacks = metrics.counter("read_replica_fallbacks_total", "Reads sent to the primary because no replica was usable")
+
+# Seconds since the last replayed transaction, or 0 when the replica has
+# replayed everything it received (an idle primary sends no new transactions).
+PG_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def async_dsn(dsn: str) -> str:
+    scheme, rest = dsn.split("://", 1)
+    return f"{ASYNC_DRIVERS.get(scheme.split('+')[0], scheme)}://{rest}"
+
+
+class Replica:
+    def __init__(self, dsn: str, name: str = "replica", profile: str = "direct"):
+        self.dsn = dsn
+        self.pool_name = name
+        self.profile = profile
+        self.engine = create_engine(dsn, **engine_options(profile, name=name))
+        self.sessions = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self._async_sessions: Optional[async_sessionmaker] = None
+        self.healthy = True
+        self.lag: Optional[float] = None
+
+    @property
+    def async_sessions(self) -> async_sessionmaker:
+        # Built on first use so sync-only processes need no async driver.
+        if self._async_sessions is None:
+            engine = create_async_engine(
+                async_dsn(self.dsn), **async_engine_options(self.profile, name=f"{self.pool_name}_async")
+            )
+            self._async_sessions = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+        return self._async_sessions
+
+    @property
+    def name(self) -> str:
+        return self.engine.url.render_as_string(hide_password=True)
+
+
+class ReplicaRouter:
+    def __init__(self, dsns, max_lag_seconds: float = 5, profile: str = "direct", primary=SessionLocal, async_primary=AsyncSessionLocal):
+        self.replicas = [Replica(dsn, name=f"replica_{i}", profile=profile) for i, dsn in enumerate(dsns, 1)]
+        self.max_lag = max_lag_seconds
+        self.primary = primary
+        self.async_primary = async_primary
+        self._turn = itertools.count()
+
+    @staticmethod
+    def measure_lag(connection) -> float:
+        if connection.dialect.name != "postgresql":
+            connection.execute(text("SELECT 1"))
+            return 0.0
+        return float(connection.execute(PG_LAG_QUERY).scalar())
+
+    def check(self):
+        """Refresh the health and lag of every replica."""
+        for replica in self.replicas:
+            try:
+                with replica.engine.connect() as connection:
+                    replica.lag = self.measure_lag(connection)
+            except Exception as e:
+                if replica.healthy:
+                    logger.warning(f"Read replica {replica.name} unavailable: {e}")
+                replica.healthy, replica.lag = False, None
+                continue
+            healthy = replica.lag <= self.max_lag
+            if healthy != replica.healthy:
+                logger.info(f"Read replica {replica.name} {'back in' if healthy else 'out of'} rotation, lag {replica.lag:.1f}s")
+            replica.healthy = healthy
+        _healthy.set(sum(replica.healthy for replica in self.replicas))
+        _lag.set(max((replica.lag for replica in self.replicas if replica.lag is not None), default=0))
+
+    def _candidates(self) -> list[Replica]:
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return []
+        start = next(self._turn) % len(healthy)
+        return healthy[start:] + healthy[:start]
+
+    def _fallback(self):
+        if self.replicas:
+            _fallbacks.inc()
+
+    def session(self) -> Session:
+        """A session on a usable replica, or on the primary."""
+        for replica in self._candidates():
+            db = replica.sessions()
+            try:
+                db.connection()
+                return db
+            except Exception as e:
+                db.close()
+                replica.healthy = False
+                logger.warning(f"Read replica {replica.name} unavailable: {e}")
+        self._fallback()
+        return self.primary()
+
+    async def async_session(self) -> AsyncSession:
+        for replica in self._candidates():
+            db = replica.async_sessions()
+            try:
+                await db.connection()
+                return db
+            except Exception as e:
+                await db.close()
+                replica.healthy = False
+                logger.warning(f"Read replica {replica.name} unavailable: {e}")
+        self._fallback()
+        return self.async_primary()
+
+    @asynccontextmanager
+    async def read_session(self):
+        db = await self.async_session()
+        try:
+            yield db
+        finally:
+            await db.close()
+
+
+read_replicas = ReplicaRouter(
+    get_settings().read_replica_dsns,
+    max_lag_seconds=get_settings().read_replica_max_lag_seconds,
+    profile=get_settings().read_replica_profile,
+)
+
+
+def get_read_db():
+    db = read_replicas.session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db():
+    async with read_replicas.read_session() as db:
+        yield db
+
+
+def get_async_read_session_factory():
+    """For responses that outlive the request, such as streams, and open their own session."""
+    return read_replicas.read_session
+
+
+def replica_monitor_loop(router: ReplicaRouter, interval: float):
+    while True:
+        time.sleep(interval)
+        try:
+            router.check()
+        except Exception as e:
+            logger.error(f"Error checking read replicas: {e}", exc_info=True)
+
+
+def start_replica_monitor_thread(interval: float, router: ReplicaRouter = read_replicas):
+    router.check()
+    thread = threading.Thread(target=replica_monitor_loop, args=(router, interval), daemon=True)
+    thread.start()
+    return thread
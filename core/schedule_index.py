@@ -0,0 +1,159 @@
+"""In-memory per-room index of the current day's sessions."""
+
+import threading
+from bisect import bisect_right
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, NamedTuple, Optional
+
+from sqlalchemy.orm import Session
+
+from models.course import Course
+from models.session import Session as SessionModel
+
+
+class ScheduledSession(NamedTuple):
+    """A session as a time interval, ordered by start."""
+
+    start: datetime
+    end: datetime
+    session_id: int
+    course_id: Optional[int]
+    professor_id: Optional[int]
+
+
+def session_interval(session: SessionModel) -> tuple[datetime, datetime]:
+    """Combine the session date with its start and end time of day."""
+    session_date = session.date.date() if hasattr(session.date, "date") else session.date
+    start_time = session.start_time.time() if hasattr(session.start_time, "time") else session.start_time
+    end_time = session.end_time.time() if hasattr(session.end_time, "time") else session.end_time
+    return datetime.combine(session_date, start_time), datetime.combine(session_date, end_time)
+
+
+def day_bounds(day: date) -> tuple[datetime, datetime]:
+    start = datetime.combine(day, time.min)
+    return start, start + timedelta(days=1)
+
+
+class RoomSchedule:
+    """Sorted interval list for one room.
+
+    The sessions and their start times are swapped in as a single tuple so
+    lookups from other threads never see the two lists out of step.
+    """
+
+    def __init__(self, sessions: Iterable[ScheduledSession] = ()):
+        self._set(sorted(sessions))
+
+    def _set(self, sessions: list[ScheduledSession]):
+        self._snapshot = (sessions, [s.start for s in sessions])
+
+    @property
+    def sessions(self) -> list[ScheduledSession]:
+        return self._snapshot[0]
+
+    def add(self, session: ScheduledSession):
+        self._set(sorted([*self.sessions, session]))
+
+    def discard(self, session_id: int) -> bool:
+        sessions = self.sessions
+        kept = [s for s in sessions if s.session_id != session_id]
+        if len(kept) == len(sessions):
+            return False
+        self._set(kept)
+        return True
+
+    def find(self, at: datetime) -> Optional[ScheduledSession]:
+        """Return the session covering ``at``, preferring the latest start."""
+        sessions, starts = self._snapshot
+        idx = bisect_right(starts, at)
+        # Walk back over the sessions that started before ``at``; with
+        # non-overlapping sessions the first candidate is the answer.
+        for session in reversed(sessions[:idx]):
+            if session.end >= at:
+                return session
+        return None
+
+
+def query_sessions(db: Session, start: datetime, end: datetime, rooms: Optional[Iterable[str]] = None):
+    """Load ``(session, professor_id)`` rows with a date in ``[start, end)``."""
+    query = (
+        db.query(SessionModel, Course.professor_id)
+        .outerjoin(Course, Course.course_id == SessionModel.course_id)
+        .filter(SessionModel.date >= start, SessionModel.date < end)
+    )
+    if rooms is not None:
+        query = query.filter(SessionModel.room.in_(list(rooms)))
+    return query.all()
+
+
+def build_schedule(rows) -> dict[tuple[str, date], RoomSchedule]:
+    """Group ``(session, professor_id)`` rows by room and day."""
+    schedules: dict[tuple[str, date], RoomSchedule] = {}
+    for session, professor_id in rows:
+        start, end = session_interval(session)
+        entry = ScheduledSession(start, end, session.session_id, session.course_id, professor_id)
+        schedules.setdefault((session.room, start.date()), RoomSchedule()).add(entry)
+    return schedules
+
+
+class ScheduleIndex:
+    """Today's sessions keyed by room.
+
+    The index is rebuilt lazily when the day rolls over and kept up to date
+    by the session CRUD functions.
+    """
+
+    def __init__(self):
+        self._rooms: dict[str, RoomSchedule] = {}
+        self._lock = threading.Lock()
+        self.day: Optional[date] = None
+
+    def load(self, db: Session, day: Optional[date] = None) -> int:
+        """Replace the index with the sessions held on ``day`` (default today)."""
+        day = day or datetime.utcnow().date()
+        start, end = day_bounds(day)
+        rows = query_sessions(db, start, end)
+        self.replace(day, {room: schedule for (room, _), schedule in build_schedule(rows).items()})
+        return len(rows)
+
+    def replace(self, day: date, rooms: dict[str, RoomSchedule]):
+        """Swap in the schedules of ``day``, e.g. from a local snapshot."""
+        with self._lock:
+            self._rooms = rooms
+            self.day = day
+
+    def find_active(self, db: Session, room: str, at: Optional[datetime] = None) -> Optional[ScheduledSession]:
+        """Return the session active in ``room`` at ``at`` (default now)."""
+        at = at or datetime.utcnow()
+        if self.day != at.date():
+            self.load(db, at.date())
+        return self.find(room, at)
+
+    def find(self, room: str, at: datetime) -> Optional[ScheduledSession]:
+        """Look ``at`` up in the loaded day only, without touching the database."""
+        schedule = self._rooms.get(room) if self.day == at.date() else None
+        return schedule.find(at) if schedule else None
+
+    def upsert(self, session: SessionModel):
+        """Apply a created or updated session to the index."""
+        start, end = session_interval(session)
+        professor_id = session.course.professor_id if session.course else None
+        with self._lock:
+            for schedule in self._rooms.values():
+                schedule.discard(session.session_id)
+            if start.date() == self.day:
+                entry = ScheduledSession(start, end, session.session_id, session.course_id, professor_id)
+                self._rooms.setdefault(session.room, RoomSchedule()).add(entry)
+
+    def discard(self, session_id: int):
+        with self._lock:
+            for schedule in self._rooms.values():
+                schedule.discard(session_id)
+
+    def clear(self):
+        with self._lock:
+            self._rooms = {}
+            self.day = None
+
+
+schedule_index = ScheduleIndex()
@@ -0,0 +1,218 @@
+"""Serial gateway for readers connected over USB.
+
+Every configured port is read from the event loop with ``add_reader``, so an
+idle port costs nothing. Lines of ``<card>,<room>`` are queued per port and
+checked in one at a time through the normal check-in path, and every line
+is answered in the order it arrived. When a port's queue is full the tap is
+refused with ``Busy`` instead of waiting for a slot, so one flooding reader
+cannot delay the others; the ``Busy`` still takes its place in the reply
+order, so a reader can match each reply to its oldest unanswered tap.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from datetime import datetime
+from typing import Optional
+
+from crud import attendance as attendance_crud
+
+from . import events
+from .checkin import check_in
+from .db import AsyncSessionLocal
+from .logger import logger
+from .metrics import metrics
+from .tap_writer import TapQueueFull
+
+_taps = metrics.counter("serial_taps_total", "Taps received from serial readers")
+_busy = metrics.counter("serial_busy_total", "Serial taps answered Busy because the port queue was full")
+_malformed = metrics.counter("serial_malformed_total", "Serial lines that were not <card>,<room>")
+_latency = metrics.histogram("serial_reply_latency_ms", "Time from receiving a serial tap to writing its reply")
+
+# Longest line accepted from a reader before the buffer is discarded.
+MAX_LINE = 256
+
+
+class SerialPort:
+    """One reader: non-blocking reads, a bounded tap queue and an ordered reply writer."""
+
+    def __init__(self, port: str, baudrate: int = 115200, queue_size: int = 32, session_factory=AsyncSessionLocal, reconnect_delay: float = 2):
+        self.port = port
+        self.baudrate = baudrate
+        self.session_factory = session_factory
+        self.reconnect_delay = reconnect_delay
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._serial = None
+        self._fd: Optional[int] = None
+        self._buffer = b""
+        self._outbox = b""
+        self._replies: deque[asyncio.Future] = deque()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closed: Optional[asyncio.Event] = None
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._tasks = [asyncio.create_task(self._supervise()), asyncio.create_task(self._work())]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._close()
+
+    def _open(self):
+        import serial
+
+        self._serial = serial.Serial(self.port, self.baudrate, timeout=0, write_timeout=0)
+        self._fd = self._serial.fileno()
+        os.set_blocking(self._fd, False)
+        self._buffer = self._outbox = b""
+        self._replies = deque()
+        self._closed = asyncio.Event()
+        self._loop.add_reader(self._fd, self._on_readable)
+        logger.info(f"Serial gateway listening on {self.port}")
+
+    def _close(self):
+        if self._fd is not None:
+            self._loop.remove_reader(self._fd)
+            self._loop.remove_writer(self._fd)
+            self._fd = None
+        if self._serial is not None:
+            self._serial.close()
+            self._serial = None
+        if self._closed is not None:
+            self._closed.set()
+
+    async def _supervise(self):
+        """Keep the port open, reopening it after the device goes away."""
+        while True:
+            try:
+                self._open()
+                await self._closed.wait()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Serial port {self.port} unavailable: {e}")
+                self._close()
+            await asyncio.sleep(self.reconnect_delay)
+
+    def _on_readable(self):
+        try:
+            data = os.read(self._fd, 4096)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            logger.warning(f"Serial port {self.port} closed: {e}")
+            self._close()
+            return
+        if not data:
+            self._close()
+            return
+        self._buffer += data
+        *lines, self._buffer = self._buffer.split(b"\n")
+        if len(self._buffer) > MAX_LINE:
+            self._buffer = b""
+        for line in lines:
+            self._on_line(line.decode(errors="replace").strip())
+
+    def _on_line(self, line: str):
+        if not line:
+            return
+        logger.debug(f"Received on {self.port}: {line}")
+        parts = line.split(",")
+        if len(parts) != 2:
+            _malformed.inc()
+            return
+        _taps.inc()
+        tap = attendance_crud.Tap(parts[0].strip(), parts[1].strip(), datetime.utcnow())
+        reply = self._loop.create_future()
+        try:
+            self.queue.put_nowait((tap, time.monotonic(), reply))
+        except asyncio.QueueFull:
+            _busy.inc()
+            reply.set_result("Busy")
+        self._replies.append(reply)
+        self._send_replies()
+
+    async def _work(self):
+        while True:
+            tap, received, reply = await self.queue.get()
+            try:
+                message = await self.process(tap)
+            except Exception as e:
+                logger.error(f"Error checking in serial tap on {self.port}: {e}", exc_info=True)
+                message = "Error"
+            reply.set_result(message)
+            self._send_replies()
+            _latency.observe((time.monotonic() - received) * 1000)
+
+    def _send_replies(self):
+        """Write the answered replies at the head of the reply order."""
+        while self._replies and self._replies[0].done():
+            self.send(self._replies.popleft().result())
+
+    async def process(self, tap: attendance_crud.Tap) -> str:
+        try:
+            async with self.session_factory() as db:
+                result = await check_in(db, tap)
+        except TapQueueFull:
+            return "Busy"
+        if result.status is not None and not result.repeat:
+            events.publish(events.attendance_event(result, tap.room, tap.tapped_at))
+        return result.message
+
+    def send(self, message: str):
+        """Queue a reply line and write as much as the port accepts without blocking."""
+        if self._fd is None:
+            return
+        self._outbox += (message + "\n").encode()
+        self._flush()
+
+    def _flush(self):
+        try:
+            written = os.write(self._fd, self._outbox)
+        except BlockingIOError:
+            written = 0
+        except OSError as e:
+            logger.warning(f"Serial port {self.port} write failed: {e}")
+            self._close()
+            return
+        self._outbox = self._outbox[written:]
+        if self._outbox:
+            self._loop.add_writer(self._fd, self._flush)
+        else:
+            self._loop.remove_writer(self._fd)
+
+
+class SerialGateway:
+    def __init__(self, ports: list[dict], queue_size: int = 32, session_factory=AsyncSessionLocal):
+        self.ports = [
+            SerialPort(port["port"], port.get("baudrate", 115200), queue_size, session_factory)
+            for port in ports
+        ]
+
+    def start(self):
+        for port in self.ports:
+            port.start()
+
+    async def stop(self):
+        await asyncio.gather(*(port.stop() for port in self.ports))
+
+
+serial_gateway: Optional[SerialGateway] = None
+
+
+def start_serial_gateway(ports: list[dict], queue_size: int) -> SerialGateway:
+    global serial_gateway
+    serial_gateway = SerialGateway(ports, queue_size)
+    serial_gateway.start()
+    return serial_gateway
+
+
+async def stop_serial_gateway():
+    global serial_gateway
+    if serial_gateway:
+        await serial_gateway.stop()
+        serial_gateway = None
@@ -0,0 +1,56 @@
+"""Background job persisting session status at start and end boundaries."""
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+from typing import Optional
+
+from crud import attendance as attendance_crud
+from crud import session as session_crud
+
+from .db import SessionLocal
+from .logger import logger
+
+
+def run_session_transitions(lookback_hours: float = 24, since: Optional[datetime] = None) -> datetime:
+    """Persist the status of sessions that started or ended since the last run.
+
+    Sessions whose start time passed since ``since`` get an absent row for
+    every enrolled student, so later taps only upgrade a row. They are picked
+    by start time rather than by a status change, so a session created with a
+    status already set gets its roster too. Nothing older than
+    ``lookback_hours`` is touched. Returns the time to pass as ``since`` next.
+    """
+    now = datetime.utcnow()
+    horizon = now - timedelta(hours=lookback_hours) if lookback_hours else None
+    if horizon is not None and (since is None or since < horizon):
+        since = horizon
+    db = SessionLocal()
+    try:
+        changed = session_crud.persist_session_transitions(db, ended_after=horizon)
+        for session_id, status in changed:
+            logger.info(f"Session {session_id} is now {status.value}")
+        started = session_crud.get_started_session_ids(db, until=now, after=since)
+        if started:
+            inserted = attendance_crud.create_absent_attendances(db, started)
+            logger.info(f"Created {inserted} absent attendances for {len(started)} sessions")
+        return now
+    finally:
+        db.close()
+
+
+def session_scheduler_loop(interval: float, lookback_hours: float):
+    since = None
+    while True:
+        try:
+            since = run_session_transitions(lookback_hours, since)
+        except Exception as e:
+            logger.error(f"Error updating session status: {e}")
+        time.sleep(interval)
+
+
+def start_session_scheduler_thread(interval: float, lookback_hours: float = 24):
+    thread = threading.Thread(target=session_scheduler_loop, args=(interval, lookback_hours), daemon=True)
+    thread.start()
+    return thread
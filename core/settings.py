@@ -69,9 +69,208 @@ class Settings(BaseSettings):
 
         return f"postgresql://{user}:{self.postgres_password}@{host}:{port}/{dbname}"
 
+    @property
+    def postgres_async_dsn(self) -> str:
+        """Get PostgreSQL connection string for the asyncpg driver."""
+        return self.postgres_dsn.replace("postgresql://", "postgresql+asyncpg://", 1)
+
+    @property
+    def database_profile(self) -> str:
+        """Get the pool profile: direct, session-pooler or transaction-pooler."""
+        return self.config.get("database", {}).get("profile", "direct")
+
+    @property
+    def database_pool_overrides(self) -> dict:
+        """Get pool settings that override the profile defaults."""
+        return self.config.get("database", {}).get("pool") or {}
+
     @property
     def esp_32_connection(self) -> str:
         """Get ESP32 connection setting."""
         return self.config.get("esp_32_connection", "wifi")
 
+    @property
+    def serial_ports(self) -> list[dict]:
+        """Get the serial reader ports as ``{"port", "baudrate"}`` entries."""
+        serial = self.config.get("serial", {})
+        baudrate = int(serial.get("baudrate", 115200))
+        return [
+            {"port": port, "baudrate": baudrate} if isinstance(port, str) else {"baudrate": baudrate, **port}
+            for port in serial.get("ports", ["/dev/ttyUSB0"])
+        ]
+
+    @property
+    def serial_queue_size(self) -> int:
+        """Get the number of taps queued per serial port before replying Busy."""
+        return int(self.config.get("serial", {}).get("queue_size", 32))
+
+    @property
+    def udp_enabled(self) -> bool:
+        """Get whether the UDP reader gateway is started."""
+        return bool(self.config.get("udp", {}).get("enabled", False))
+
+    @property
+    def udp_host(self) -> str:
+        """Get the address the UDP gateway binds to."""
+        return self.config.get("udp", {}).get("host", "0.0.0.0")
+
+    @property
+    def udp_port(self) -> int:
+        """Get the port the UDP gateway binds to."""
+        return int(self.config.get("udp", {}).get("port", 5005))
+
+    @property
+    def udp_queue_size(self) -> int:
+        """Get the number of UDP taps queued before readers are told Busy."""
+        return int(self.config.get("udp", {}).get("queue_size", 256))
+
+    @property
+    def udp_workers(self) -> int:
+        """Get the number of UDP taps checked in concurrently."""
+        return int(self.config.get("udp", {}).get("workers", 8))
+
+    @property
+    def udp_replay_window(self) -> int:
+        """Get the number of recent sequence numbers tracked per reader."""
+        return int(self.config.get("udp", {}).get("replay_window", 64))
+
+    @property
+    def udp_max_age_seconds(self) -> float:
+        """Get how far a tap timestamp may be from the server clock; 0 disables the check."""
+        return float(self.config.get("udp", {}).get("max_age_seconds", 300))
+
+    @property
+    def edge_enabled(self) -> bool:
+        """Get whether taps are answered locally and synced upstream in the background."""
+        return bool(self.config.get("edge", {}).get("enabled", False))
+
+    @property
+    def edge_journal_path(self) -> str:
+        """Get the path of the local SQLite tap journal."""
+        return self.config.get("edge", {}).get("journal_path", "data/edge_journal.db")
+
+    @property
+    def edge_sync_batch_size(self) -> int:
+        """Get the maximum number of journaled taps replayed upstream together."""
+        return int(self.config.get("edge", {}).get("sync_batch_size", 500))
+
+    @property
+    def edge_sync_interval(self) -> float:
+        """Get the interval in seconds between syncs when the journal is drained."""
+        return float(self.config.get("edge", {}).get("sync_interval", 2))
+
+    @property
+    def edge_snapshot_interval(self) -> float:
+        """Get the interval in seconds between roster and schedule snapshots."""
+        return float(self.config.get("edge", {}).get("snapshot_interval", 300))
+
+    @property
+    def edge_snapshot_days(self) -> int:
+        """Get the number of days of sessions kept in the snapshot."""
+        return int(self.config.get("edge", {}).get("snapshot_days", 2))
+
+    @property
+    def index_reconcile_interval(self) -> float:
+        """Get the interval in seconds between in-memory index reconciles."""
+        return float(self.config.get("indexes", {}).get("reconcile_interval", 300))
+
+    @property
+    def tap_writer_enabled(self) -> bool:
+        """Get whether taps are written by the group-commit writer."""
+        return bool(self.config.get("tap_writer", {}).get("enabled", False))
+
+    @property
+    def tap_writer_batch_size(self) -> int:
+        """Get the maximum number of taps committed together."""
+        return int(self.config.get("tap_writer", {}).get("batch_size", 100))
+
+    @property
+    def tap_writer_max_latency_ms(self) -> float:
+        """Get how long the writer waits to fill a batch, in milliseconds."""
+        return float(self.config.get("tap_writer", {}).get("max_latency_ms", 20))
+
+    @property
+    def tap_writer_queue_depth(self) -> int:
+        """Get the maximum number of taps waiting to be written."""
+        return int(self.config.get("tap_writer", {}).get("queue_depth", 1000))
+
+    @property
+    def dedup_window_seconds(self) -> float:
+        """Get how long a card read answers repeats in the same room; 0 disables it."""
+        return float(self.config.get("dedup", {}).get("window_seconds", 3))
+
+    @property
+    def dedup_max_entries(self) -> int:
+        """Get the maximum number of recent results kept for de-duplication."""
+        return int(self.config.get("dedup", {}).get("max_entries", 10000))
+
+    @property
+    def idempotency_ttl_seconds(self) -> float:
+        """Get how long an Idempotency-Key is remembered; 0 disables it."""
+        return float(self.config.get("dedup", {}).get("idempotency_ttl_seconds", 600))
+
+    @property
+    def websocket_send_queue_size(self) -> int:
+        """Get the number of messages buffered per WebSocket client before it is dropped."""
+        return int(self.config.get("websocket", {}).get("send_queue_size", 100))
+
+    @property
+    def reader_ws_max_in_flight(self) -> int:
+        """Get the number of taps a reader may have unanswered on the reader WebSocket."""
+        return int(self.config.get("reader_ws", {}).get("max_in_flight", 8))
+
+    @property
+    def reader_ws_max_age_seconds(self) -> float:
+        """Get how far a reader WebSocket tap time may be from the server clock; 0 disables the check."""
+        return float(self.config.get("reader_ws", {}).get("max_age_seconds", 300))
 
+    @property
+    def event_bus_backend(self) -> str:
+        """Get the event bus backend: inprocess, postgres or unix."""
+        return self.config.get("event_bus", {}).get("backend", "inprocess")
+
+    @property
+    def event_bus_channel(self) -> str:
+        """Get the Postgres NOTIFY channel for attendance events."""
+        return self.config.get("event_bus", {}).get("channel", "attendance_events")
+
+    @property
+    def event_bus_dsn(self) -> str:
+        """Get the connection string used for LISTEN/NOTIFY."""
+        return self.config.get("event_bus", {}).get("dsn") or self.postgres_dsn
+
+    @property
+    def event_bus_socket_dir(self) -> str:
+        """Get the directory holding the per-worker event sockets."""
+        return self.config.get("event_bus", {}).get("socket_dir", "/tmp/presence_checker_events")
+
+    @property
+    def session_scheduler_interval(self) -> float:
+        """Get the interval in seconds between session status transition runs."""
+        return float(self.config.get("session_scheduler", {}).get("interval", 30))
+
+    @property
+    def session_scheduler_lookback_hours(self) -> float:
+        """Get how far back ended sessions are still persisted and backfilled; 0 for no limit."""
+        return float(self.config.get("session_scheduler", {}).get("lookback_hours", 24))
+
+    @property
+    def read_replica_dsns(self) -> list[str]:
+        """Get the read replica connection strings; ``{password}`` is filled from POSTGRES_PASSWORD."""
+        dsns = self.config.get("read_replicas", {}).get("dsns") or []
+        return [dsn.replace("{password}", self.postgres_password) for dsn in dsns]
+
+    @property
+    def read_replica_max_lag_seconds(self) -> float:
+        """Get the replication lag above which a replica stops serving reads."""
+        return float(self.config.get("read_replicas", {}).get("max_lag_seconds", 5))
+
+    @property
+    def read_replica_check_interval(self) -> float:
+        """Get the interval in seconds between replica health and lag checks."""
+        return float(self.config.get("read_replicas", {}).get("check_interval", 10))
+
+    @property
+    def read_replica_profile(self) -> str:
+        """Get the pool profile used for read replica connections."""
+        return self.config.get("read_replicas", {}).get("profile", "direct")
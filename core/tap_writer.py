@@ -0,0 +1,119 @@
+"""Group-commit writer for taps."""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Optional
+
+from crud import attendance as attendance_crud
+
+from .db import SessionLocal
+from .logger import logger
+from .metrics import metrics
+
+
+class TapQueueFull(Exception):
+    """Raised when a tap is submitted while the writer queue is full."""
+
+
+_queue_wait = metrics.histogram("tap_writer_queue_wait_ms", "Time taps spend queued before their batch is written")
+_batch_size = metrics.histogram("tap_writer_batch_size", "Taps written per batch", buckets=(1, 2, 5, 10, 25, 50, 100, 250))
+_queue_depth = metrics.gauge("tap_writer_queue_depth", "Taps waiting in the writer queue")
+_rejected = metrics.counter("tap_writer_rejected_total", "Taps rejected because the queue was full")
+
+
+class TapWriter:
+    """Drains queued taps in micro-batches and commits each batch together.
+
+    Callers get a ``concurrent.futures.Future`` resolving to their own
+    ``TapResult``, so both threads and coroutines can wait on it.
+    """
+
+    def __init__(self, batch_size: int = 100, max_latency_ms: float = 20, queue_depth: int = 1000, session_factory=SessionLocal):
+        self.batch_size = batch_size
+        self.max_latency = max_latency_ms / 1000
+        self.session_factory = session_factory
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_depth)
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, tap: attendance_crud.Tap) -> Future:
+        future: Future = Future()
+        try:
+            self._queue.put_nowait((tap, future, time.monotonic()))
+        except queue.Full:
+            _rejected.inc()
+            raise TapQueueFull("Tap queue full")
+        _queue_depth.set(self._queue.qsize())
+        return future
+
+    def start(self):
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout: float = 5):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _next_batch(self) -> list:
+        try:
+            batch = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.max_latency
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stopped.is_set() or not self._queue.empty():
+            batch = self._next_batch()
+            if batch:
+                self.write(batch)
+
+    def write(self, batch: list):
+        started = time.monotonic()
+        _queue_depth.set(self._queue.qsize())
+        _batch_size.observe(len(batch))
+        for _, _, enqueued in batch:
+            _queue_wait.observe((started - enqueued) * 1000)
+
+        db = self.session_factory()
+        try:
+            results = attendance_crud.check_taps(db, [tap for tap, _, _ in batch])
+        except Exception as e:
+            logger.error(f"Error writing tap batch: {e}", exc_info=True)
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        finally:
+            db.close()
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
+
+
+tap_writer: Optional[TapWriter] = None
+
+
+def start_tap_writer(batch_size: int, max_latency_ms: float, queue_depth: int) -> TapWriter:
+    global tap_writer
+    tap_writer = TapWriter(batch_size=batch_size, max_latency_ms=max_latency_ms, queue_depth=queue_depth)
+    tap_writer.start()
+    return tap_writer
+
+
+def stop_tap_writer():
+    global tap_writer
+    if tap_writer:
+        tap_writer.stop()
+        tap_writer = None
@@ -0,0 +1,303 @@
+"""UDP gateway for WiFi readers.
+
+A tap is one datagram instead of a TCP connection, an HTTP request and a JSON
+body. Datagrams are authenticated with an HMAC keyed by ``secret_key`` and
+carry a per-reader sequence number; a sliding window over those numbers drops
+replays, and a retransmitted datagram is answered from a cache of recent
+replies instead of being checked in twice. The window lives in memory, so
+after a restart only the tap time bounds replays: with ``max_age_seconds``
+set, taps must carry a tap time within that skew of the server clock.
+
+Tap datagram, network byte order::
+
+    version    B    1
+    reader_id  I
+    seq        Q    increasing per reader; keep the high 32 bits as a boot
+                    counter in flash so a rebooted reader is not replaying
+    tapped_at  q    milliseconds since the Unix epoch; 0 stamps on arrival and
+                    is only accepted when max_age_seconds is 0
+    card_len   B
+    room_len   B
+    card, room      UTF-8
+    mac        16s  first 16 bytes of HMAC-SHA256 over everything above
+
+Reply datagram: ``version B, reader_id I, seq Q, code B``, the UTF-8 message
+and a 16 byte MAC computed the same way. ``Busy`` and ``Error`` replies are
+not cached, so the reader can retransmit the same datagram later.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import struct
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+
+from crud import attendance as attendance_crud
+
+from . import events
+from .checkin import check_in
+from .db import AsyncSessionLocal
+from .logger import logger
+from .metrics import metrics
+from .tap_writer import TapQueueFull
+
+VERSION = 1
+MAC_SIZE = 16
+TAP_HEADER = struct.Struct("!BIQqBB")
+REPLY_HEADER = struct.Struct("!BIQB")
+
+# Reply codes
+MARKED = 0
+NOT_MARKED = 1
+BUSY = 2
+ERROR = 3
+
+_taps = metrics.counter("udp_taps_total", "Authenticated taps received over UDP")
+_bad_mac = metrics.counter("udp_bad_mac_total", "Datagrams dropped because the HMAC did not verify")
+_malformed = metrics.counter("udp_malformed_total", "Datagrams dropped because they could not be decoded")
+_replayed = metrics.counter("udp_replayed_total", "Datagrams dropped as replays outside the sequence window")
+_stale = metrics.counter("udp_stale_total", "UDP taps refused because their tap time was missing or too far off")
+_duplicates = metrics.counter("udp_duplicates_total", "Retransmitted taps answered from the reply cache")
+_busy = metrics.counter("udp_busy_total", "UDP taps answered Busy because the queue was full")
+_latency = metrics.histogram("udp_reply_latency_ms", "Time from receiving a UDP tap to sending its reply")
+
+
+def sign(key: bytes, payload: bytes) -> bytes:
+    """Append the truncated HMAC of ``payload``."""
+    return payload + hmac.new(key, payload, hashlib.sha256).digest()[:MAC_SIZE]
+
+
+def verify(key: bytes, datagram: bytes) -> Optional[bytes]:
+    """Return the payload of a signed datagram, or None when the MAC does not match."""
+    payload, mac = datagram[:-MAC_SIZE], datagram[-MAC_SIZE:]
+    if len(datagram) <= MAC_SIZE or not hmac.compare_digest(mac, hmac.new(key, payload, hashlib.sha256).digest()[:MAC_SIZE]):
+        return None
+    return payload
+
+
+def encode_tap(key: bytes, reader_id: int, seq: int, rfid_card_id: str, room: str, tapped_at_ms: int = 0) -> bytes:
+    card, room_bytes = rfid_card_id.encode(), room.encode()
+    header = TAP_HEADER.pack(VERSION, reader_id, seq, tapped_at_ms, len(card), len(room_bytes))
+    return sign(key, header + card + room_bytes)
+
+
+def decode_tap(payload: bytes) -> tuple[int, int, attendance_crud.Tap]:
+    """Decode a verified tap payload into ``(reader_id, seq, tap)``; raises ValueError."""
+    if len(payload) < TAP_HEADER.size:
+        raise ValueError("Datagram too short")
+    version, reader_id, seq, tapped_at_ms, card_len, room_len = TAP_HEADER.unpack_from(payload)
+    if version != VERSION:
+        raise ValueError(f"Unsupported version {version}")
+    body = payload[TAP_HEADER.size:]
+    if len(body) != card_len + room_len:
+        raise ValueError("Length mismatch")
+    tapped_at = datetime(1970, 1, 1) + timedelta(milliseconds=tapped_at_ms) if tapped_at_ms else None
+    tap = attendance_crud.Tap(body[:card_len].decode(), body[card_len:].decode(), tapped_at)
+    return reader_id, seq, tap
+
+
+def encode_reply(key: bytes, reader_id: int, seq: int, code: int, message: str) -> bytes:
+    return sign(key, REPLY_HEADER.pack(VERSION, reader_id, seq, code) + message.encode())
+
+
+def decode_reply(key: bytes, datagram: bytes) -> Optional[tuple[int, int, int, str]]:
+    """Decode a reply into ``(reader_id, seq, code, message)``, or None if it does not verify."""
+    payload = verify(key, datagram)
+    if payload is None or len(payload) < REPLY_HEADER.size:
+        return None
+    _, reader_id, seq, code = REPLY_HEADER.unpack_from(payload)
+    return reader_id, seq, code, payload[REPLY_HEADER.size:].decode()
+
+
+class ReplayWindow:
+    """Sliding window of the last ``size`` sequence numbers seen from one reader."""
+
+    def __init__(self, size: int = 64):
+        self.size = size
+        self.highest = -1
+        self.seen = 0  # bit i set: highest - i was accepted
+
+    def accept(self, seq: int) -> Optional[bool]:
+        """Record ``seq``; True if new, False if already seen, None if older than the window."""
+        if seq > self.highest:
+            shift = seq - self.highest
+            self.seen = ((self.seen << shift) | 1) & ((1 << self.size) - 1) if shift < self.size else 1
+            self.highest = seq
+            return True
+        offset = self.highest - seq
+        if offset >= self.size:
+            return None
+        if self.seen >> offset & 1:
+            return False
+        self.seen |= 1 << offset
+        return True
+
+    def release(self, seq: int):
+        """Forget ``seq`` so the same datagram is accepted again."""
+        offset = self.highest - seq
+        if 0 <= offset < self.size:
+            self.seen &= ~(1 << offset)
+
+
+class _Reader:
+    def __init__(self, window: int):
+        self.window = ReplayWindow(window)
+        self.replies: OrderedDict[int, bytes] = OrderedDict()
+
+    def remember(self, seq: int, reply: bytes):
+        self.replies[seq] = reply
+        while len(self.replies) > self.window.size:
+            self.replies.popitem(last=False)
+
+
+class UDPGateway(asyncio.DatagramProtocol):
+    """Receives signed tap datagrams and answers each with a signed reply.
+
+    Taps go into one bounded queue drained by ``workers`` tasks; when the
+    queue is full the tap is answered ``Busy`` straight away.
+    """
+
+    def __init__(
+        self,
+        key: bytes,
+        queue_size: int = 256,
+        workers: int = 8,
+        window: int = 64,
+        max_age_seconds: float = 300,
+        session_factory=AsyncSessionLocal,
+    ):
+        self.key = key
+        self.workers = workers
+        self.window = window
+        self.max_age = timedelta(seconds=max_age_seconds) if max_age_seconds else None
+        self.session_factory = session_factory
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.readers: dict[int, _Reader] = {}
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self, host: str, port: int):
+        loop = asyncio.get_running_loop()
+        await loop.create_datagram_endpoint(lambda: self, local_addr=(host, port))
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        logger.info(f"UDP gateway listening on {host}:{port}")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self.transport is not None:
+            self.transport.close()
+            self.transport = None
+
+    @property
+    def address(self):
+        return self.transport.get_extra_info("sockname")
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr):
+        payload = verify(self.key, data)
+        if payload is None:
+            _bad_mac.inc()
+            return
+        try:
+            reader_id, seq, tap = decode_tap(payload)
+        except ValueError:
+            _malformed.inc()
+            return
+
+        reader = self.readers.get(reader_id)
+        if reader is None:
+            reader = self.readers[reader_id] = _Reader(self.window)
+        accepted = reader.window.accept(seq)
+        if accepted is None:
+            _replayed.inc()
+            return
+        if not accepted:
+            # A retransmission: answer it again if it has been answered already.
+            _duplicates.inc()
+            reply = reader.replies.get(seq)
+            if reply is not None:
+                self.transport.sendto(reply, addr)
+            return
+
+        _taps.inc()
+        if self.max_age:
+            # Without a tap time a datagram replayed after a restart would pass.
+            if tap.tapped_at is None:
+                _stale.inc()
+                self._reply(reader, reader_id, seq, NOT_MARKED, "Missing tap time", addr)
+                return
+            if abs(datetime.utcnow() - tap.tapped_at) > self.max_age:
+                _stale.inc()
+                self._reply(reader, reader_id, seq, NOT_MARKED, "Stale tap", addr)
+                return
+        try:
+            self.queue.put_nowait((reader, reader_id, seq, tap, addr, time.monotonic()))
+        except asyncio.QueueFull:
+            _busy.inc()
+            self._reply(reader, reader_id, seq, BUSY, "Busy", addr)
+
+    async def _work(self):
+        while True:
+            reader, reader_id, seq, tap, addr, received = await self.queue.get()
+            try:
+                code, message = await self.process(tap)
+            except Exception as e:
+                logger.error(f"Error checking in UDP tap from reader {reader_id}: {e}", exc_info=True)
+                code, message = ERROR, "Error"
+            self._reply(reader, reader_id, seq, code, message, addr)
+            _latency.observe((time.monotonic() - received) * 1000)
+
+    async def process(self, tap: attendance_crud.Tap) -> tuple[int, str]:
+        try:
+            async with self.session_factory() as db:
+                result = await check_in(db, tap)
+        except TapQueueFull:
+            return BUSY, "Busy"
+        if result.error:
+            logger.error(f"Error checking in UDP tap in room {tap.room}: {result.message}")
+            return ERROR, "Error"
+        if result.status is None:
+            return NOT_MARKED, result.message
+        if not result.repeat:
+            events.publish(events.attendance_event(result, tap.room, tap.tapped_at or datetime.utcnow()))
+        return MARKED, result.message
+
+    def _reply(self, reader: _Reader, reader_id: int, seq: int, code: int, message: str, addr):
+        reply = encode_reply(self.key, reader_id, seq, code, message)
+        if code in (BUSY, ERROR):
+            reader.window.release(seq)
+        else:
+            reader.remember(seq, reply)
+        if self.transport is not None:
+            self.transport.sendto(reply, addr)
+
+
+udp_gateway: Optional[UDPGateway] = None
+
+
+async def start_udp_gateway(key: bytes, host: str, port: int, **kwargs) -> Optional[UDPGateway]:
+    global udp_gateway
+    gateway = UDPGateway(key, **kwargs)
+    try:
+        await gateway.start(host, port)
+    except OSError as e:
+        # With several workers only the first one binds the port.
+        logger.error(f"UDP gateway not started on {host}:{port}: {e}")
+        await gateway.stop()
+        return None
+    udp_gateway = gateway
+    return udp_gateway
+
+
+async def stop_udp_gateway():
+    global udp_gateway
+    if udp_gateway:
+        await udp_gateway.stop()
+        udp_gateway = None
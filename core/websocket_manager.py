@@ -1,21 +1,141 @@
-from fastapi import WebSocket
+import asyncio
+
+from fastapi import WebSocket, status
+
+from .logger import logger
+from .metrics import metrics
+
+_clients = metrics.gauge("websocket_clients", "Connected WebSocket clients")
+_max_queue_depth = metrics.gauge("websocket_max_queue_depth", "Deepest per-client send queue at the last broadcast")
+_queued = metrics.gauge("websocket_queued_messages", "Messages waiting in all send queues at the last broadcast")
+_evicted = metrics.counter("websocket_evicted_total", "Clients dropped because their send queue overflowed")
+_dropped = metrics.counter("websocket_dropped_messages_total", "Messages discarded with evicted clients")
+
+
+class _Client:
+    """A connection with its own bounded outbound queue and writer task."""
+
+    def __init__(self, websocket: WebSocket, queue_size: int):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.task: asyncio.Task | None = None
+        self.topics: set[str] = set()
+        self.implicit_all = False
+
 
 class WebSocketManager:
-    def __init__(self):
-        self.active_connections: list[WebSocket] = []
+    """Fans messages out to WebSocket clients without waiting on any of them.
+
+    Broadcasting only enqueues; each client is drained by its own writer
+    task, so a slow link never delays other clients or the caller. A client
+    whose queue overflows is disconnected.
+
+    Clients subscribe to topics such as ``room:3-101`` and a publish only
+    touches the subscribers of its topics. Clients subscribed to
+    ``ALL_TOPICS`` receive every publish. A client connected without topics
+    gets ``ALL_TOPICS`` until its first explicit subscribe replaces it.
+    """
+
+    ALL_TOPICS = "*"
 
-    async def connect(self, websocket: WebSocket):
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self.active_connections: dict[WebSocket, _Client] = {}
+        self.subscribers: dict[str, set[_Client]] = {}
+
+    async def connect(self, websocket: WebSocket, topics=None):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        client = _Client(websocket, self.queue_size)
+        client.task = asyncio.create_task(self._writer(client))
+        self.active_connections[websocket] = client
+        self.subscribe(websocket, topics or (self.ALL_TOPICS,))
+        client.implicit_all = not topics
+        _clients.set(len(self.active_connections))
 
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+        client = self.active_connections.pop(websocket, None)
+        if client:
+            self.unsubscribe(websocket, list(client.topics), client=client)
+            if client.task and client.task is not asyncio.current_task():
+                client.task.cancel()
+            _clients.set(len(self.active_connections))
+        return client
+
+    def subscribe(self, websocket: WebSocket, topics):
+        client = self.active_connections.get(websocket)
+        if client is None:
+            return
+        if client.implicit_all:
+            client.implicit_all = False
+            self.unsubscribe(websocket, [self.ALL_TOPICS], client=client)
+        for topic in topics:
+            client.topics.add(topic)
+            self.subscribers.setdefault(topic, set()).add(client)
+
+    def unsubscribe(self, websocket: WebSocket, topics, client: _Client = None):
+        client = client or self.active_connections.get(websocket)
+        if client is None:
+            return
+        for topic in topics:
+            client.topics.discard(topic)
+            subscribers = self.subscribers.get(topic)
+            if subscribers is not None:
+                subscribers.discard(client)
+                if not subscribers:
+                    del self.subscribers[topic]
 
     async def broadcast(self, message: str):
-        for connection in self.active_connections:
+        self.send(self.active_connections.values(), message)
+
+    async def publish(self, topics, message: str):
+        """Send ``message`` once to every client subscribed to any of ``topics``."""
+        clients = set(self.subscribers.get(self.ALL_TOPICS, ()))
+        for topic in topics:
+            clients.update(self.subscribers.get(topic, ()))
+        self.send(clients, message)
+
+    def send_to(self, websocket: WebSocket, message: str):
+        client = self.active_connections.get(websocket)
+        if client:
+            self._enqueue(client, message)
+
+    def send(self, clients, message: str):
+        """Enqueue ``message`` for each of ``clients``, evicting the ones that overflow."""
+        depths = []
+        for client in list(clients):
+            if self._enqueue(client, message):
+                depths.append(client.queue.qsize())
+        _max_queue_depth.set(max(depths, default=0))
+        _queued.set(sum(depths))
+
+    def _enqueue(self, client: _Client, message: str) -> bool:
+        try:
+            client.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self._evict(client)
+            return False
+        return True
+
+    def _evict(self, client: _Client):
+        if self.disconnect(client.websocket) is None:
+            return
+        _evicted.inc()
+        _dropped.inc(client.queue.qsize())
+        logger.warning("Dropping slow WebSocket client, send queue full")
+        asyncio.create_task(self._close(client.websocket))
+
+    @staticmethod
+    async def _close(websocket: WebSocket):
+        try:
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        except Exception:
+            pass
+
+    async def _writer(self, client: _Client):
+        while True:
+            message = await client.queue.get()
             try:
-                await connection.send_text(message)
+                await client.websocket.send_text(message)
             except Exception:
-                self.disconnect(connection)
-                pass
\ No newline at end of file
+                self.disconnect(client.websocket)
+                return
@@ -0,0 +1,6 @@
+"""Async database CRUD operations.
+
+Mirrors the synchronous modules in ``crud`` for routes running on an
+``AsyncSession``. Multi-step operations reuse the synchronous implementation
+through ``AsyncSession.run_sync`` so the logic lives in one place.
+"""
@@ -0,0 +1,70 @@
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.attendance import Attendance, AttendanceStatus
+from models.attendance_summary import AttendanceSummary
+from models.course import Course
+from models.session import Session as SessionModel
+from core.pagination import paginate
+from crud import attendance as attendance_crud
+from crud.attendance import Tap, TapResult
+
+async def get_attendance(db: AsyncSession, attendance_id: int):
+    return await db.get(Attendance, attendance_id)
+
+async def get_attendances(db: AsyncSession, skip: int = 0, limit: int = 100, after: int = None):
+    result = await db.scalars(paginate(select(Attendance), Attendance.attendance_id, skip, limit, after))
+    return result.all()
+
+async def get_attendances_by_session(db: AsyncSession, session_id: int):
+    result = await db.scalars(select(Attendance).where(Attendance.session_id == session_id))
+    return result.all()
+
+async def get_attendances_by_student(db: AsyncSession, student_id: int):
+    result = await db.scalars(select(Attendance).where(Attendance.student_id == student_id))
+    return result.all()
+
+async def session_exists(db: AsyncSession, session_id: int) -> bool:
+    return await db.scalar(select(SessionModel.session_id).where(SessionModel.session_id == session_id)) is not None
+
+async def course_exists(db: AsyncSession, course_id: int) -> bool:
+    return await db.scalar(select(Course.course_id).where(Course.course_id == course_id)) is not None
+
+async def get_session_stats(db: AsyncSession, session_ids) -> dict:
+    session_ids = list(dict.fromkeys(session_ids))
+    rows = await db.execute(attendance_crud.session_stats_query(session_ids))
+    return attendance_crud.group_session_stats(session_ids, rows)
+
+async def get_course_stats(db: AsyncSession, course_id: int, date_from: datetime = None, date_to: datetime = None) -> dict:
+    sessions = await db.scalar(attendance_crud.course_session_count_query(course_id, date_from, date_to))
+    rows = await db.execute(attendance_crud.course_stats_query(course_id, date_from, date_to))
+    return {"sessions": sessions, **attendance_crud.tally_stats(rows)}
+
+async def get_summary(db: AsyncSession, course_id: int, student_id: int):
+    return await db.get(AttendanceSummary, (course_id, student_id))
+
+async def get_course_summaries(db: AsyncSession, course_id: int):
+    result = await db.scalars(
+        select(AttendanceSummary).where(AttendanceSummary.course_id == course_id).order_by(AttendanceSummary.student_id)
+    )
+    return result.all()
+
+# Rows fetched per round trip when streaming an export.
+EXPORT_BATCH_SIZE = 1000
+
+async def stream_export(db: AsyncSession, course_id: int = None, group_id: int = None, date_from: datetime = None, date_to: datetime = None):
+    """Run the export query on a server-side cursor, fetching ``EXPORT_BATCH_SIZE`` rows at a time."""
+    query = attendance_crud.export_query(course_id, group_id, date_from, date_to)
+    return await db.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+
+async def update_attendance(db: AsyncSession, attendance_id: int, status: AttendanceStatus = None, time=None):
+    return await db.run_sync(attendance_crud.update_attendance, attendance_id, status, time)
+
+async def delete_attendance(db: AsyncSession, attendance_id: int):
+    return await db.run_sync(attendance_crud.delete_attendance, attendance_id)
+
+async def check_taps(db: AsyncSession, taps: list[Tap]) -> list[TapResult]:
+    return await db.run_sync(attendance_crud.check_taps, taps)
+
+async def check_tap(db: AsyncSession, rfid_card_id: str, room: str, tapped_at: datetime = None) -> TapResult:
+    return (await check_taps(db, [Tap(rfid_card_id, room, tapped_at)]))[0]
@@ -1,15 +1,24 @@
-from datetime import datetime
+from datetime import datetime, timezone
+from typing import NamedTuple, Optional
+from sqlalchemy import DateTime, cast, func, literal, select, tuple_
 from sqlalchemy.orm import Session
 from models.attendance import Attendance, AttendanceStatus
-from models.session import Session, SessionStatus
+from models.course import Course, CourseGroup
+from models.group import Group
+from models.session import Session as SessionModel
 from models.student import Student
+from core.card_index import card_index
+from core.db import dialect_insert, inserted_flag
 from core.logger import logger
+from core.pagination import paginate
+from core.schedule_index import build_schedule, day_bounds, query_sessions, schedule_index
+from crud import attendance_summary as summary_crud
 
 def get_attendance(db: Session, attendance_id: int):
     return db.query(Attendance).filter(Attendance.attendance_id == attendance_id).first()
 
-def get_attendances(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(Attendance).offset(skip).limit(limit).all()
+def get_attendances(db: Session, skip: int = 0, limit: int = 100, after: int = None):
+    return paginate(db.query(Attendance), Attendance.attendance_id, skip, limit, after).all()
 
 def get_attendances_by_session(db: Session, session_id: int):
     return db.query(Attendance).filter(Attendance.session_id == session_id).all()
@@ -17,6 +26,99 @@ def get_attendances_by_session(db: Session, session_id: int):
 def get_attendances_by_student(db: Session, student_id: int):
     return db.query(Attendance).filter(Attendance.student_id == student_id).all()
 
+def session_exists(db: Session, session_id: int) -> bool:
+    return db.query(SessionModel.session_id).filter(SessionModel.session_id == session_id).first() is not None
+
+def course_exists(db: Session, course_id: int) -> bool:
+    return db.query(Course.course_id).filter(Course.course_id == course_id).first() is not None
+
+def empty_stats() -> dict:
+    return {"total": 0, **{status.value: 0 for status in AttendanceStatus}}
+
+def tally_stats(rows) -> dict:
+    """Fold ``(status, count)`` rows into a stats dict."""
+    stats = empty_stats()
+    for status, count in rows:
+        stats[status.value] += count
+        stats["total"] += count
+    return stats
+
+def session_stats_query(session_ids):
+    return (
+        select(Attendance.session_id, Attendance.status, func.count())
+        .where(Attendance.session_id.in_(session_ids))
+        .group_by(Attendance.session_id, Attendance.status)
+    )
+
+def _course_sessions(query, course_id: int, date_from: datetime = None, date_to: datetime = None):
+    query = query.where(SessionModel.course_id == course_id)
+    if date_from is not None:
+        query = query.where(SessionModel.date >= date_from)
+    if date_to is not None:
+        query = query.where(SessionModel.date <= date_to)
+    return query
+
+def course_stats_query(course_id: int, date_from: datetime = None, date_to: datetime = None):
+    return _course_sessions(
+        select(Attendance.status, func.count())
+        .join(SessionModel, SessionModel.session_id == Attendance.session_id)
+        .group_by(Attendance.status),
+        course_id, date_from, date_to,
+    )
+
+def course_session_count_query(course_id: int, date_from: datetime = None, date_to: datetime = None):
+    return _course_sessions(select(func.count(SessionModel.session_id)), course_id, date_from, date_to)
+
+def group_session_stats(session_ids, rows) -> dict:
+    by_session = {session_id: [] for session_id in session_ids}
+    for session_id, status, count in rows:
+        by_session[session_id].append((status, count))
+    return {session_id: tally_stats(counts) for session_id, counts in by_session.items()}
+
+def get_session_stats(db: Session, session_ids) -> dict:
+    """Status counts per session, with one ``GROUP BY`` for all of ``session_ids``."""
+    session_ids = list(dict.fromkeys(session_ids))
+    return group_session_stats(session_ids, db.execute(session_stats_query(session_ids)))
+
+def get_course_stats(db: Session, course_id: int, date_from: datetime = None, date_to: datetime = None) -> dict:
+    """Status totals and session count of a course over an optional date range."""
+    sessions = db.scalar(course_session_count_query(course_id, date_from, date_to))
+    return {"sessions": sessions, **tally_stats(db.execute(course_stats_query(course_id, date_from, date_to)))}
+
+def export_query(course_id: int = None, group_id: int = None, date_from: datetime = None, date_to: datetime = None):
+    """Flat attendance rows with student, group, course and session columns, ordered by id."""
+    query = (
+        select(
+            Attendance.attendance_id,
+            SessionModel.session_id,
+            Course.course_id,
+            Course.name.label("course"),
+            SessionModel.room,
+            SessionModel.date,
+            SessionModel.start_time,
+            SessionModel.end_time,
+            Student.student_id,
+            Student.name.label("student"),
+            Group.code.label("group"),
+            Attendance.status,
+            Attendance.time,
+        )
+        .join(SessionModel, SessionModel.session_id == Attendance.session_id)
+        .outerjoin(Course, Course.course_id == SessionModel.course_id)
+        .outerjoin(Student, Student.student_id == Attendance.student_id)
+        .outerjoin(Group, Group.group_id == Student.group_id)
+        .order_by(Attendance.attendance_id)
+    )
+    if course_id is not None:
+        query = query.where(SessionModel.course_id == course_id)
+    if group_id is not None:
+        query = query.where(Student.group_id == group_id)
+    if date_from is not None:
+        query = query.where(SessionModel.date >= date_from)
+    if date_to is not None:
+        query = query.where(SessionModel.date <= date_to)
+    return query
+
 def create_attendance(db: Session, session_id: int, student_id: int, status: AttendanceStatus, time=None):
     if time is None:
         time = datetime.utcnow()
@@ -28,6 +130,7 @@ def create_attendance(db: Session, session_id: int, student_id: int, status: Att
         status=status
     )
     db.add(db_attendance)
+    _update_summary(db, db_attendance, new=status)
     db.commit()
     db.refresh(db_attendance)
     return db_attendance
@@ -35,7 +138,8 @@ def create_attendance(db: Session, session_id: int, student_id: int, status: Att
 def update_attendance(db: Session, attendance_id: int, status: AttendanceStatus = None, time=None):
     db_attendance = db.query(Attendance).filter(Attendance.attendance_id == attendance_id).first()
     if db_attendance:
-        if status:
+        if status and status != db_attendance.status:
+            _update_summary(db, db_attendance, old=db_attendance.status, new=status)
             db_attendance.status = status
         if time:
             db_attendance.time = time
@@ -47,143 +151,236 @@ def update_attendance(db: Session, attendance_id: int, status: AttendanceStatus
 def delete_attendance(db: Session, attendance_id: int):
     db_attendance = db.query(Attendance).filter(Attendance.attendance_id == attendance_id).first()
     if db_attendance:
+        _update_summary(db, db_attendance, old=db_attendance.status)
         db.delete(db_attendance)
         db.commit()
     return db_attendance
 
-def check_attendance(db: Session, rfid_card_id: str, room: str):
-    try:
-        now = datetime.utcnow()
-        today = datetime.utcnow().date()
+def _update_summary(db: Session, attendance: Attendance, old: AttendanceStatus = None, new: AttendanceStatus = None):
+    deltas = {}
+    course_id = summary_crud.session_courses(db, [attendance.session_id]).get(attendance.session_id)
+    summary_crud.record_change(deltas, course_id, attendance.student_id, old=old, new=new)
+    summary_crud.apply_deltas(db, deltas)
 
-        logger.info(f"Current time: {now}")
-        logger.info(f"Current date: {today}")
-        logger.info(f"Looking for sessions in room: {room}")
+# Rows per upsert statement, well below the bind parameter limits.
+UPSERT_CHUNK_SIZE = 1000
 
-        # Get student
-        student = db.query(Student).filter(Student.rfid_card_id == rfid_card_id).first()
-        if not student:
-            logger.warning(f"Unknown RFID card: {rfid_card_id}")
-            return "Unknown card"
-
-        # Get all sessions for this room (without date filter)
-        sessions = (
-            db.query(Session)
-            .filter(
-                Session.room == room,
-                )
-            .all()
+class Tap(NamedTuple):
+    """A single card read at a reader."""
+
+    rfid_card_id: str
+    room: str
+    tapped_at: Optional[datetime] = None
+
+class TapResult(NamedTuple):
+    """Outcome of a tap; ``status`` is None when nothing was marked.
+
+    ``error`` is set when the tap could not be processed, ``repeat`` when the
+    result was answered again for a repeated read without processing it.
+    """
+
+    message: str
+    status: Optional[AttendanceStatus] = None
+    student_id: Optional[int] = None
+    student_name: Optional[str] = None
+    session_id: Optional[int] = None
+    professor_id: Optional[int] = None
+    error: bool = False
+    repeat: bool = False
+
+def create_absent_attendances(db: Session, session_ids) -> int:
+    """Insert an absent row for every enrolled student of each session.
+
+    Students are resolved through CourseGroup -> Group -> Student in a single
+    INSERT ... SELECT; existing rows are left alone, so the call is
+    idempotent. Returns the number of rows inserted.
+    """
+    session_ids = list(session_ids)
+    if not session_ids:
+        return 0
+    now = datetime.utcnow()
+    roster = (
+        select(
+            SessionModel.session_id,
+            Student.student_id,
+            cast(literal(AttendanceStatus.absent.name), Attendance.__table__.c.status.type),
+            literal(now, DateTime),
+            literal(now, DateTime),
         )
+        .join(CourseGroup, CourseGroup.course_id == SessionModel.course_id)
+        .join(Student, Student.group_id == CourseGroup.group_id)
+        .where(SessionModel.session_id.in_(session_ids))
+        .distinct()
+    )
+    stmt = dialect_insert(db, Attendance).from_select(
+        ["session_id", "student_id", "status", "created_at", "updated_at"], roster
+    ).on_conflict_do_nothing(
+        index_elements=[Attendance.session_id, Attendance.student_id]
+    ).returning(Attendance.session_id, Attendance.student_id)
+    inserted = db.execute(stmt).all()
 
-        logger.info(f"Found {len(sessions)} sessions in room {room}")
-
-        # Flag to track if we found and processed an active session
-        active_session_processed = False
-
-        # Debug each session
-        for session in sessions:
-            # Extract the date from session.date for clarity
-            session_date = session.date.date() if hasattr(session.date, 'date') else session.date
-            logger.info(f"Session {session.session_id}: date={session_date}, start={session.start_time}, end={session.end_time}")
-
-            # Check if the session date matches today
-            if session_date != today:
-                logger.info(f"Session {session.session_id} is for a different date: {session_date}, skipping")
-                continue
-
-            # Create proper datetime objects for comparison
-            try:
-                start_time = session.start_time.time() if hasattr(session.start_time, 'time') else session.start_time
-                end_time = session.end_time.time() if hasattr(session.end_time, 'time') else session.end_time
-
-                start_datetime = datetime.combine(today, start_time)
-                end_datetime = datetime.combine(today, end_time)
-
-                # Log the individual comparisons
-                is_after_start = now >= start_datetime
-                is_before_end = now <= end_datetime
-
-                logger.info(f"Time checks for session {session.session_id}:")
-                logger.info(f"  After start? {is_after_start} ({now} >= {start_datetime})")
-                logger.info(f"  Before end? {is_before_end} ({now} <= {end_datetime})")
-
-                if is_after_start and is_before_end:
-                    logger.info(f"SUCCESS! Found ACTIVE session: {session.session_id}")
-                    session.status = SessionStatus.active
-
-                    # Process attendance for this active session
-                    existing_attendance = (
-                        db.query(Attendance)
-                        .filter(
-                            Attendance.session_id == session.session_id,
-                            Attendance.student_id == student.student_id,
-                            )
-                        .first()
-                    )
-
-                    if existing_attendance:
-                        logger.info(f"Student {student.name} already marked for session {session.session_id}")
-                        if existing_attendance.status == AttendanceStatus.absent:
-                            minutes_late = (now - start_datetime).total_seconds() / 60
-                            if minutes_late > 15:
-                                existing_attendance.status = AttendanceStatus.late
-                                logger.info(
-                                    f"Student {student.name} is late ({minutes_late:.1f} minutes)"
-                                )
-                            else:
-                                existing_attendance.status = AttendanceStatus.present
-                            logger.info(
-                                f"Student {student.name} was updated as {existing_attendance.status}"
-                            )
-                        else:
-                            logger.info(
-                                f"Student {student.name} already marked for session {session.session_id}"
-                            )
-                        db.commit()
-                        return f"Marked: {existing_attendance.status.value}"
-
-                    status = AttendanceStatus.present
-                    minutes_late = (now - start_datetime).total_seconds() / 60
-
-                    if minutes_late > 15:
-                        status = AttendanceStatus.late
-                        logger.info(f"Student {student.name} is late ({minutes_late:.1f} minutes)")
-
-                    # Create the attendance record
-                    try:
-                        attendance = create_attendance(
-                            db=db,
-                            session_id=session.session_id,
-                            student_id=student.student_id,
-                            status=status,
-                            time=now,
-                        )
-
-                        db.commit()
-                        logger.info(f"Successfully marked {student.name} as {status.value}")
-                        active_session_processed = True
-                        return f"Marked: {status.value}"
-                    except Exception as e:
-                        logger.error(f"Error creating attendance record: {e}", exc_info=True)
-                        return f"Error creating attendance: {str(e)}"
-                else:
-                    logger.info(f"Session {session.session_id} is not active at current time")
-                    if now < start_datetime:
-                        session.status = SessionStatus.not_started
-                    else:
-                        session.status = SessionStatus.ended
-            except Exception as e:
-                logger.error(f"Error processing session {session.session_id}: {e}", exc_info=True)
-                continue
+    courses = summary_crud.session_courses(db, session_ids)
+    deltas = {}
+    for session_id, student_id in inserted:
+        summary_crud.record_change(deltas, courses.get(session_id), student_id, new=AttendanceStatus.absent)
+    summary_crud.apply_deltas(db, deltas)
+    db.commit()
+    return len(inserted)
 
-        db.commit()
+def tap_status(tapped_at: datetime, session_start: datetime) -> AttendanceStatus:
+    minutes_late = (tapped_at - session_start).total_seconds() / 60
+    return AttendanceStatus.late if minutes_late > 15 else AttendanceStatus.present
+
+def as_naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def mark_attendances(db: Session, marks: dict, courses: dict = None):
+    """Record taps with an idempotent upsert (one statement per chunk of rows).
+
+    ``marks`` maps ``(session_id, student_id)`` to ``(status, time)``. New
+    rows are inserted; existing ``absent`` rows are upgraded and any other
+    existing row is left untouched. The attendance summaries are adjusted for
+    every row written; ``courses`` maps session ids to course ids and is
+    looked up when not given. Returns the status each pair ends up with. The
+    caller commits.
+    """
+    now = datetime.utcnow()
+    items = list(marks.items())
+    inserted = inserted_flag(db)
+    marked = {}
+    written = []
+    for offset in range(0, len(items), UPSERT_CHUNK_SIZE):
+        chunk = items[offset:offset + UPSERT_CHUNK_SIZE]
+        existing = set()
+        if inserted is None:
+            existing = set(db.query(Attendance.session_id, Attendance.student_id).filter(
+                tuple_(Attendance.session_id, Attendance.student_id).in_([pair for pair, _ in chunk])
+            ).tuples())
+        stmt = dialect_insert(db, Attendance).values([
+            {
+                "session_id": session_id,
+                "student_id": student_id,
+                "status": status,
+                "time": time,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for (session_id, student_id), (status, time) in chunk
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Attendance.session_id, Attendance.student_id],
+            set_={
+                "status": stmt.excluded.status,
+                "time": stmt.excluded.time,
+                "updated_at": stmt.excluded.updated_at,
+            },
+            where=Attendance.status == AttendanceStatus.absent,
+        ).returning(
+            Attendance.session_id, Attendance.student_id, Attendance.status,
+            inserted if inserted is not None else literal(None),
+        )
+        for session_id, student_id, status, is_new in db.execute(stmt):
+            if inserted is None:
+                is_new = (session_id, student_id) not in existing
+            marked[(session_id, student_id)] = status
+            written.append((session_id, student_id, status, is_new))
+
+    if written:
+        if courses is None:
+            courses = summary_crud.session_courses(db, {session_id for session_id, _, _, _ in written})
+        deltas = {}
+        for session_id, student_id, status, is_new in written:
+            # Rows that were not inserted were absent before the upgrade.
+            old = None if is_new else AttendanceStatus.absent
+            summary_crud.record_change(deltas, courses.get(session_id), student_id, old=old, new=status)
+        summary_crud.apply_deltas(db, deltas)
+
+    # Pairs already present or late were skipped by the conflict guard.
+    unchanged = [pair for pair in marks if pair not in marked]
+    if unchanged:
+        rows = db.query(Attendance.session_id, Attendance.student_id, Attendance.status).filter(
+            tuple_(Attendance.session_id, Attendance.student_id).in_(unchanged)
+        )
+        marked.update({(session_id, student_id): status for session_id, student_id, status in rows})
+    return marked
+
+def _resolve_sessions(db: Session, taps: list[Tap]) -> list:
+    """Find the active session for each tap, at the time it was made.
 
-        if not active_session_processed:
-            logger.warning(f"No active session found in room {room} at current time")
-            return "No active session"
+    Today's taps use the schedule index; older taps replayed by readers that
+    were offline are resolved with one query over the rooms and days involved.
+    """
+    today = datetime.utcnow().date()
+    past = [tap for tap in taps if tap.tapped_at.date() != today]
+    schedules = {}
+    if past:
+        start, _ = day_bounds(min(tap.tapped_at for tap in past).date())
+        _, end = day_bounds(max(tap.tapped_at for tap in past).date())
+        rows = query_sessions(db, start, end, rooms={tap.room for tap in past})
+        schedules = build_schedule(rows)
 
-        return "Attendance processed"
+    sessions = []
+    for tap in taps:
+        if tap.tapped_at.date() == today:
+            sessions.append(schedule_index.find_active(db, tap.room, tap.tapped_at))
+        else:
+            schedule = schedules.get((tap.room, tap.tapped_at.date()))
+            sessions.append(schedule.find(tap.tapped_at) if schedule else None)
+    return sessions
 
+def check_taps(db: Session, taps: list[Tap]) -> list[TapResult]:
+    """Process taps in one transaction, returning a result per tap in order."""
+    try:
+        now = datetime.utcnow()
+        taps = [tap._replace(tapped_at=as_naive_utc(tap.tapped_at or now)) for tap in taps]
+
+        students = card_index.lookup_many(db, {tap.rfid_card_id for tap in taps})
+        sessions = _resolve_sessions(db, taps)
+
+        # The earliest tap of a student in a session decides present or late.
+        marks = {}
+        for tap, session in sorted(zip(taps, sessions), key=lambda pair: pair[0].tapped_at):
+            student = students.get(tap.rfid_card_id)
+            if student and session:
+                marks.setdefault(
+                    (session.session_id, student.student_id),
+                    (tap_status(tap.tapped_at, session.start), tap.tapped_at),
+                )
+
+        courses = {session.session_id: session.course_id for session in sessions if session}
+        marked = mark_attendances(db, marks, courses)
+        db.commit()
     except Exception as e:
+        db.rollback()
         logger.error(f"Error processing attendance: {e}", exc_info=True)
-        return f"Error processing attendance: {str(e)}"
\ No newline at end of file
+        return [TapResult(f"Error processing attendance: {str(e)}", error=True) for _ in taps]
+
+    results = []
+    for tap, session in zip(taps, sessions):
+        student = students.get(tap.rfid_card_id)
+        if not student:
+            logger.warning(f"Unknown RFID card: {tap.rfid_card_id}")
+            results.append(TapResult("Unknown card"))
+        elif not session:
+            logger.warning(f"No active session found in room {tap.room} at {tap.tapped_at}")
+            results.append(TapResult("No active session", student_id=student.student_id, student_name=student.name))
+        else:
+            status = marked[(session.session_id, student.student_id)]
+            logger.info(f"Marked {student.name} as {status.value} for session {session.session_id}")
+            results.append(TapResult(
+                f"Marked: {status.value}",
+                status=status,
+                student_id=student.student_id,
+                student_name=student.name,
+                session_id=session.session_id,
+                professor_id=session.professor_id,
+            ))
+    return results
+
+def check_tap(db: Session, rfid_card_id: str, room: str, tapped_at: datetime = None) -> TapResult:
+    return check_taps(db, [Tap(rfid_card_id, room, tapped_at)])[0]
+
+def check_attendance(db: Session, rfid_card_id: str, room: str):
+    return check_tap(db, rfid_card_id, room).message
@@ -0,0 +1,83 @@
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import case, delete, func, insert, select
+from sqlalchemy.orm import Session
+from models.attendance import Attendance, AttendanceStatus
+from models.attendance_summary import AttendanceSummary
+from models.session import Session as SessionModel
+from core.db import dialect_insert
+
+# Rows per upsert statement, well below the bind parameter limits.
+UPSERT_CHUNK_SIZE = 1000
+
+def get_summary(db: Session, course_id: int, student_id: int):
+    return db.get(AttendanceSummary, (course_id, student_id))
+
+def get_course_summaries(db: Session, course_id: int):
+    return db.query(AttendanceSummary).filter(AttendanceSummary.course_id == course_id).order_by(AttendanceSummary.student_id).all()
+
+def apply_deltas(db: Session, deltas: dict):
+    """Add per-status count changes to the summaries, creating missing rows.
+
+    ``deltas`` maps ``(course_id, student_id)`` to a ``Counter`` of
+    ``AttendanceStatus`` to signed change. Rows are adjusted in place with
+    ``count = count + delta`` so concurrent writers never lose an update. The
+    caller commits, in the same transaction as the attendance change.
+    """
+    rows = [
+        {
+            "course_id": course_id,
+            "student_id": student_id,
+            **{status.value: changes.get(status, 0) for status in AttendanceStatus},
+            "updated_at": datetime.utcnow(),
+        }
+        for (course_id, student_id), changes in deltas.items()
+        if course_id is not None and any(changes.values())
+    ]
+    for offset in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        stmt = dialect_insert(db, AttendanceSummary).values(rows[offset:offset + UPSERT_CHUNK_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[AttendanceSummary.course_id, AttendanceSummary.student_id],
+            set_={
+                **{
+                    status.value: getattr(AttendanceSummary, status.value) + getattr(stmt.excluded, status.value)
+                    for status in AttendanceStatus
+                },
+                "updated_at": stmt.excluded.updated_at,
+            },
+        )
+        db.execute(stmt)
+
+def record_change(deltas: dict, course_id: int, student_id: int, old: AttendanceStatus = None, new: AttendanceStatus = None):
+    """Accumulate one attendance going from ``old`` to ``new`` status (None for no row)."""
+    changes = deltas.setdefault((course_id, student_id), Counter())
+    if old is not None:
+        changes[old] -= 1
+    if new is not None:
+        changes[new] += 1
+
+def session_courses(db: Session, session_ids) -> dict:
+    rows = db.execute(
+        select(SessionModel.session_id, SessionModel.course_id).where(SessionModel.session_id.in_(set(session_ids)))
+    )
+    return dict(rows.all())
+
+def rebuild_summaries(db: Session) -> int:
+    """Recompute every summary from ``attendances`` in one transaction; returns the row count."""
+    counts = [
+        func.coalesce(func.sum(case((Attendance.status == status, 1), else_=0)), 0)
+        for status in AttendanceStatus
+    ]
+    source = (
+        select(SessionModel.course_id, Attendance.student_id, *counts, func.max(Attendance.updated_at))
+        .join(SessionModel, SessionModel.session_id == Attendance.session_id)
+        .where(SessionModel.course_id.is_not(None), Attendance.student_id.is_not(None))
+        .group_by(SessionModel.course_id, Attendance.student_id)
+    )
+    db.execute(delete(AttendanceSummary))
+    db.execute(insert(AttendanceSummary).from_select(
+        ["course_id", "student_id", *(status.value for status in AttendanceStatus), "updated_at"], source
+    ))
+    total = db.scalar(select(func.count()).select_from(AttendanceSummary))
+    db.commit()
+    return total
@@ -1,11 +1,12 @@
 from sqlalchemy.orm import Session
 from models.course import Course, CourseGroup
+from core.pagination import paginate
 
 def get_course(db: Session, course_id: int):
     return db.query(Course).filter(Course.course_id == course_id).first()
 
-def get_courses(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(Course).offset(skip).limit(limit).all()
+def get_courses(db: Session, skip: int = 0, limit: int = 100, after: int = None):
+    return paginate(db.query(Course), Course.course_id, skip, limit, after).all()
 
 def get_courses_by_professor(db: Session, professor_id: int):
     return db.query(Course).filter(Course.professor_id == professor_id).all()
@@ -1,11 +1,12 @@
 from sqlalchemy.orm import Session
 from models.group import Group
+from core.pagination import paginate
 
 def get_group(db: Session, group_id: int):
     return db.query(Group).filter(Group.group_id == group_id).first()
 
-def get_groups(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(Group).offset(skip).limit(limit).all()
+def get_groups(db: Session, skip: int = 0, limit: int = 100, after: int = None):
+    return paginate(db.query(Group), Group.group_id, skip, limit, after).all()
 
 def create_group(db: Session, code: str):
     db_group = Group(code=code)
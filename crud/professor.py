@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Session
 from models.professor import Professor
+from core.pagination import paginate
 
 def get_professor(db: Session, professor_id: int):
     return db.query(Professor).filter(Professor.professor_id == professor_id).first()
@@ -7,8 +8,8 @@ def get_professor(db: Session, professor_id: int):
 def get_professor_by_email(db: Session, email: str):
     return db.query(Professor).filter(Professor.email == email).first()
 
-def get_professors(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(Professor).offset(skip).limit(limit).all()
+def get_professors(db: Session, skip: int = 0, limit: int = 100, after: int = None):
+    return paginate(db.query(Professor), Professor.professor_id, skip, limit, after).all()
 
 def create_professor(db: Session, name: str, email: str, password_hash: str):
     db_professor = Professor(name=name, email=email, password_hash=password_hash)
@@ -0,0 +1,145 @@
+import csv
+import io
+from datetime import datetime
+from typing import NamedTuple, Optional
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, exists, func, literal, select, update
+from sqlalchemy.orm import Session
+from models.group import Group
+from models.student import Student
+from core.card_index import card_index
+from core.db import dialect_insert, inserted_flag
+
+ROSTER_COLUMNS = ("name", "group", "rfid_card_id")
+
+# Rows per INSERT when COPY is not available.
+STAGE_CHUNK_SIZE = 1000
+
+_staging = Table(
+    "roster_import",
+    MetaData(),
+    Column("line", Integer, primary_key=True),
+    Column("name", String),
+    Column("group_code", String),
+    Column("rfid_card_id", String),
+    Column("error", String),
+    prefixes=["TEMPORARY"],
+)
+
+class RosterError(NamedTuple):
+    line: int
+    rfid_card_id: Optional[str]
+    error: str
+
+class RosterImport(NamedTuple):
+    created: int
+    updated: int
+    errors: list[RosterError]
+
+def parse_roster(text: str) -> list[tuple]:
+    """Read ``name,group,rfid_card_id`` CSV into ``(line, name, group, card)`` rows.
+
+    Raises ``ValueError`` when a column is missing from the header.
+    """
+    reader = csv.DictReader(io.StringIO(text))
+    missing = [column for column in ROSTER_COLUMNS if column not in (reader.fieldnames or ())]
+    if missing:
+        raise ValueError(f"Missing CSV columns: {', '.join(missing)}")
+    return [
+        (reader.line_num, *((row[column] or "").strip() or None for column in ROSTER_COLUMNS))
+        for row in reader
+    ]
+
+def _stage(db: Session, rows: list[tuple]):
+    connection = db.connection()
+    _staging.create(connection)
+    if connection.dialect.name == "postgresql":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        with connection.connection.cursor() as cursor:
+            cursor.copy_expert(
+                "COPY roster_import (line, name, group_code, rfid_card_id) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+        return
+    for offset in range(0, len(rows), STAGE_CHUNK_SIZE):
+        connection.execute(_staging.insert(), [
+            {"line": line, "name": name, "group_code": group_code, "rfid_card_id": card}
+            for line, name, group_code, card in rows[offset:offset + STAGE_CHUNK_SIZE]
+        ])
+
+def _validate(db: Session, groups):
+    staged = _staging.c
+    duplicates = (
+        select(staged.rfid_card_id).group_by(staged.rfid_card_id).having(func.count() > 1).scalar_subquery()
+    )
+    checks = [
+        ("missing name", staged.name.is_(None)),
+        ("missing rfid_card_id", staged.rfid_card_id.is_(None)),
+        ("duplicate rfid_card_id in file", staged.rfid_card_id.in_(duplicates)),
+        ("unknown group", ~exists().where(groups.c.code == staged.group_code)),
+    ]
+    for error, condition in checks:
+        db.execute(update(_staging).where(staged.error.is_(None), condition).values(error=error))
+
+def import_roster(db: Session, text: str, dry_run: bool = False) -> RosterImport:
+    """Create or update students from a roster CSV in one transaction.
+
+    Rows are staged in a temporary table (with ``COPY`` on Postgres), checked
+    in SQL and the valid ones upserted by ``rfid_card_id``; invalid rows are
+    reported, not imported. Raises ``ValueError`` on a malformed header.
+    """
+    rows = parse_roster(text)
+    staged = _staging.c
+    try:
+        _stage(db, rows)
+        groups = select(Group.code, func.min(Group.group_id).label("group_id")).group_by(Group.code).subquery()
+        _validate(db, groups)
+        errors = [
+            RosterError(*row)
+            for row in db.execute(
+                select(staged.line, staged.rfid_card_id, staged.error)
+                .where(staged.error.is_not(None))
+                .order_by(staged.line)
+            )
+        ]
+
+        created = updated = 0
+        if not dry_run:
+            now = datetime.utcnow()
+            inserted = inserted_flag(db)
+            if inserted is None:
+                # Cards already on file are the rows the upsert will update.
+                updated = db.scalar(
+                    select(func.count())
+                    .select_from(_staging)
+                    .where(staged.error.is_(None), exists().where(Student.rfid_card_id == staged.rfid_card_id))
+                )
+            source = (
+                select(staged.name, groups.c.group_id, staged.rfid_card_id, literal(now, DateTime), literal(now, DateTime))
+                .join(groups, groups.c.code == staged.group_code)
+                .where(staged.error.is_(None))
+            )
+            stmt = dialect_insert(db, Student).from_select(
+                ["name", "group_id", "rfid_card_id", "created_at", "updated_at"], source
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Student.rfid_card_id],
+                set_={"name": stmt.excluded.name, "group_id": stmt.excluded.group_id, "updated_at": stmt.excluded.updated_at},
+            )
+            written = db.execute(stmt.returning(inserted if inserted is not None else literal(None))).scalars().all()
+            if inserted is not None:
+                updated = written.count(False)
+            created = len(written) - updated
+
+        _staging.drop(db.connection())
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    if created or updated:
+        card_index.load(db)
+    return RosterImport(created, updated, errors)
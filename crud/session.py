@@ -1,39 +1,23 @@
-from sqlalchemy.orm import Session
+from typing import Optional
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import Session, contains_eager, selectinload
 from models.session import Session as SessionModel, SessionStatus
 from datetime import datetime, timedelta
-from models.professor import Professor
 from models.attendance import Attendance
 from models.student import Student
-from models.course import Course, CourseGroup
-from sqlalchemy.orm import joinedload
+from models.course import Course
+from core.schedule_index import schedule_index
+from core.pagination import paginate
 
 
-def _update_session_status(session: SessionModel) -> SessionModel:
-    """Helper function to update session status based on current time."""
-    now = datetime.utcnow()
-    if session.end_time < now:
-        session.status = SessionStatus.ended
-    elif session.start_time <= now <= session.end_time:
-        session.status = SessionStatus.active
-    else:
-        session.status = SessionStatus.not_started
-    
-    return session
-
+# Session.status is derived from the current time on read; the stored column
+# is only written by the session scheduler at start and end boundaries.
 
 def get_session(db: Session, session_id: int):
-    session = db.query(SessionModel).filter(SessionModel.session_id == session_id).first()
-    if session:
-        session = _update_session_status(session)
-        db.commit()
-    return session
+    return db.query(SessionModel).filter(SessionModel.session_id == session_id).first()
 
-def get_sessions(db: Session, skip: int = 0, limit: int = 100):
-    sessions = db.query(SessionModel).offset(skip).limit(limit).all()
-    for session in sessions:
-        _update_session_status(session)
-    db.commit()
-    return sessions
+def get_sessions(db: Session, skip: int = 0, limit: int = 100, after: int = None):
+    return paginate(db.query(SessionModel), SessionModel.session_id, skip, limit, after).all()
 
 def create_session(
     db: Session,
@@ -55,6 +39,7 @@ def create_session(
     db.add(db_session)
     db.commit()
     db.refresh(db_session)
+    schedule_index.upsert(db_session)
     return db_session
 
 def update_session(
@@ -80,6 +65,7 @@ def update_session(
             db_session.status = status
         db.commit()
         db.refresh(db_session)
+        schedule_index.upsert(db_session)
     return db_session
 
 def delete_session(db: Session, session_id: int):
@@ -87,70 +73,96 @@ def delete_session(db: Session, session_id: int):
     if db_session:
         db.delete(db_session)
         db.commit()
+        schedule_index.discard(session_id)
     return db_session
 
 
-def get_current_sessions_by_professor_and_time(db: Session, professor_id: int):
-    now = datetime.utcnow()
-    buffer = timedelta(minutes=5)
-
-    professor = db.get(Professor, professor_id)
-    if not professor:
-        return []
-
-    sessions = []
-    for course in professor.courses:
-        course_sessions = (
-            db.query(SessionModel)
-            .options(
-                joinedload(SessionModel.attendances)
-                .joinedload(Attendance.student)
-                .joinedload(Student.group),
-                joinedload(SessionModel.course)
-                .joinedload(Course.course_groups)
-                .joinedload(CourseGroup.group)
-            )
-
-            .filter(
-                SessionModel.course_id == course.course_id,
-                SessionModel.start_time <= now + buffer,
-                SessionModel.end_time >= now - buffer
-            )
-            .all()
+def _professor_sessions(
+    professor_id: int,
+    date_from: datetime = None,
+    date_to: datetime = None,
+    skip: int = 0,
+    limit: int = 100,
+):
+    """One query for a professor's sessions across all courses.
+
+    Attendances are fetched with one batched ``SELECT ... IN`` per
+    collection instead of a joined cartesian product.
+    """
+    query = (
+        select(SessionModel)
+        .join(Course, Course.course_id == SessionModel.course_id)
+        .where(Course.professor_id == professor_id)
+        .options(
+            contains_eager(SessionModel.course),
+            selectinload(SessionModel.attendances)
+            .joinedload(Attendance.student)
+            .joinedload(Student.group),
         )
-        for session in course_sessions:
-            _update_session_status(session)
-        sessions.extend(course_sessions)
-    
-    db.commit()
-    return sessions
-
-def get_sessions_by_professor(db: Session, professor_id: int):
-    professor = db.get(Professor, professor_id)
-    if not professor:
-        return []
-
-    sessions = []
-    for course in professor.courses:
-        course_sessions = (
-            db.query(SessionModel)
-            .options(
-                joinedload(SessionModel.attendances)
-                .joinedload(Attendance.student)
-                .joinedload(Student.group),
-                joinedload(SessionModel.course)
-                .joinedload(Course.course_groups)
-                .joinedload(CourseGroup.group)
-
-            )
+        .order_by(SessionModel.date.desc(), SessionModel.start_time.desc(), SessionModel.session_id.desc())
+        .offset(skip)
+        .limit(limit)
+    )
+    if date_from is not None:
+        query = query.where(SessionModel.date >= date_from)
+    if date_to is not None:
+        query = query.where(SessionModel.date <= date_to)
+    return query
 
-            .filter(SessionModel.course_id == course.course_id)
-            .all()
-        )
-        for session in course_sessions:
-            _update_session_status(session)
-        sessions.extend(course_sessions)
+def get_current_sessions_by_professor_and_time(
+    db: Session,
+    professor_id: int,
+    date_from: datetime = None,
+    date_to: datetime = None,
+    skip: int = 0,
+    limit: int = 100,
+):
+    now = datetime.utcnow()
+    buffer = timedelta(minutes=5)
+    query = _professor_sessions(professor_id, date_from, date_to, skip, limit).where(
+        SessionModel.start_time <= now + buffer,
+        SessionModel.end_time >= now - buffer,
+    )
+    return db.scalars(query).unique().all()
 
+def get_sessions_by_professor(
+    db: Session,
+    professor_id: int,
+    date_from: datetime = None,
+    date_to: datetime = None,
+    skip: int = 0,
+    limit: int = 100,
+):
+    query = _professor_sessions(professor_id, date_from, date_to, skip, limit)
+    return db.scalars(query).unique().all()
+
+def get_started_session_ids(db: Session, until: datetime, after: Optional[datetime] = None) -> list[int]:
+    """Ids of sessions whose start time is after ``after`` (when given) and not after ``until``."""
+    query = select(SessionModel.session_id).where(SessionModel.start_time <= until)
+    if after is not None:
+        query = query.where(SessionModel.start_time > after)
+    return list(db.scalars(query))
+
+def persist_session_transitions(db: Session, ended_after: Optional[datetime] = None):
+    """Write the derived status of sessions that crossed a start or end boundary.
+
+    Ended sessions are final, so only sessions not yet stored as ended are
+    compared; with ``ended_after``, sessions that ended before it are skipped.
+    Returns ``(session_id, status)`` for every row changed.
+    """
+    status = SessionModel.status
+    conditions = [
+        or_(SessionModel.stored_status.is_(None), SessionModel.stored_status != SessionStatus.ended),
+        SessionModel.stored_status.is_distinct_from(status),
+    ]
+    if ended_after is not None:
+        conditions.append(SessionModel.end_time >= ended_after)
+    changed = db.execute(
+        update(SessionModel)
+        .where(*conditions)
+        .values(stored_status=status)
+        .returning(SessionModel.session_id, SessionModel.stored_status)
+        .execution_options(synchronize_session=False)
+    ).all()
     db.commit()
-    return sessions
-    
\ No newline at end of file
+    return changed
@@ -1,22 +1,29 @@
 from sqlalchemy.orm import Session
 from models.student import Student
+from core.card_index import card_index
+from core.pagination import paginate
 
 def get_student(db: Session, student_id: int):
     return db.get(Student, student_id)
 
-def get_students(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(Student).offset(skip).limit(limit).all()
+def get_students(db: Session, skip: int = 0, limit: int = 100, after: int = None):
+    return paginate(db.query(Student), Student.student_id, skip, limit, after).all()
+
+def get_student_by_card(db: Session, rfid_card_id: str):
+    return db.query(Student).filter(Student.rfid_card_id == rfid_card_id).first()
 
 def create_student(db: Session, name: str, group_id: int, rfid_card_id: str):
     db_student = Student(name=name, group_id=group_id, rfid_card_id=rfid_card_id)
     db.add(db_student)
     db.commit()
     db.refresh(db_student)
+    card_index.put(db_student)
     return db_student
 
 def update_student(db: Session, student_id: int, name: str = None, group_id: int = None, rfid_card_id: str = None):
     student = db.get(Student, student_id)
     if student:
+        previous_card_id = student.rfid_card_id
         if name:
             student.name = name
         if group_id:
@@ -25,11 +32,14 @@ def update_student(db: Session, student_id: int, name: str = None, group_id: int
             student.rfid_card_id = rfid_card_id
         db.commit()
         db.refresh(student)
+        card_index.put(student, previous_card_id=previous_card_id)
     return student
 
 def delete_student(db: Session, student_id: int):
     student = db.get(Student, student_id)
     if student:
+        card_id = student.rfid_card_id
         db.delete(student)
         db.commit()
+        card_index.remove(card_id)
     return student
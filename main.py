@@ -9,6 +9,7 @@ from fastapi.responses import RedirectResponse
 from api.main import router
 from core.config import get_settings
 from core.logger import logger
+from core.pagination import NEXT_CURSOR_HEADER
 
 settings = get_settings()
 
@@ -24,18 +25,79 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting up application")
 
-    from core.db import Base, engine
-    Base.metadata.create_all(bind=engine)
-    logger.info("Database tables created")
+    from core.edge import start_edge_node, stop_edge_node
+    if settings.edge_enabled:
+        edge_node = start_edge_node(
+            settings.edge_journal_path,
+            batch_size=settings.edge_sync_batch_size,
+            sync_interval=settings.edge_sync_interval,
+            snapshot_interval=settings.edge_snapshot_interval,
+            snapshot_days=settings.edge_snapshot_days,
+        )
+        logger.info(f"Edge mode on, journaling taps to {settings.edge_journal_path}")
 
-    from core.listener import start_listener_thread
+    from core.db import Base, engine
+    from core.migrations import migrate
+    from core.reconciler import load_indexes, start_reconcile_thread
+    try:
+        applied = migrate(engine, Base.metadata)
+        logger.info(f"Database schema up to date ({len(applied)} migrations applied)")
+        load_indexes()
+    except Exception as e:
+        if not settings.edge_enabled:
+            raise
+        logger.warning(f"Upstream database unreachable, starting from the edge snapshot: {e}")
+        edge_node.restore_indexes()
+    start_reconcile_thread(settings.index_reconcile_interval)
+
+    from core.session_scheduler import start_session_scheduler_thread
+    start_session_scheduler_thread(settings.session_scheduler_interval, settings.session_scheduler_lookback_hours)
+
+    from core.replicas import read_replicas, start_replica_monitor_thread
+    if read_replicas.replicas:
+        start_replica_monitor_thread(settings.read_replica_check_interval)
+        logger.info(f"Routing reads to {len(read_replicas.replicas)} replicas")
+
+    from core.events import create_event_bus, start_event_bus, stop_event_bus
+    await start_event_bus(create_event_bus(settings))
+    logger.info(f"Event bus started ({settings.event_bus_backend})")
+
+    from core.tap_writer import start_tap_writer, stop_tap_writer
+    if settings.tap_writer_enabled:
+        start_tap_writer(
+            batch_size=settings.tap_writer_batch_size,
+            max_latency_ms=settings.tap_writer_max_latency_ms,
+            queue_depth=settings.tap_writer_queue_depth,
+        )
+        logger.info("Tap writer started")
+
+    from core.serial_gateway import start_serial_gateway, stop_serial_gateway
     if settings.esp_32_connection != "wifi":
-        start_listener_thread()
-        logger.info("Serial listener started")
+        start_serial_gateway(settings.serial_ports, settings.serial_queue_size)
+        logger.info(f"Serial gateway started on {len(settings.serial_ports)} ports")
+
+    from core.udp_gateway import start_udp_gateway, stop_udp_gateway
+    if settings.udp_enabled:
+        if settings.secret_key == "default_insecure_key":
+            logger.warning("UDP gateway is authenticating readers with the default SECRET_KEY")
+        await start_udp_gateway(
+            settings.secret_key.encode(),
+            settings.udp_host,
+            settings.udp_port,
+            queue_size=settings.udp_queue_size,
+            workers=settings.udp_workers,
+            window=settings.udp_replay_window,
+            max_age_seconds=settings.udp_max_age_seconds,
+        )
 
     yield
     # Shutdown
     logger.info("Shutting down application")
+    await stop_udp_gateway()
+    await stop_serial_gateway()
+    stop_tap_writer()
+    stop_edge_node()
+    await stop_event_bus()
 
 app = FastAPI(
     title=settings.app_name,
@@ -50,6 +112,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 
@@ -0,0 +1,87 @@
+"""Maintenance commands.
+
+    python manage.py migrate [--stamp VERSION]
+    python manage.py rebuild-summaries
+    python manage.py import-roster students.csv [--dry-run]
+    python manage.py reader-token READER_ID
+"""
+
+import argparse
+import sys
+
+import models  # noqa: F401 - registers every model on Base.metadata
+from core import migrations
+from core.config import get_settings
+from core.db import Base, SessionLocal, engine
+from core.logger import logger
+from core.reader_channel import reader_token
+from crud import attendance_summary as summary_crud
+from crud import roster as roster_crud
+
+
+def migrate(args):
+    if args.stamp:
+        stamped = migrations.stamp(engine, upto=args.stamp)
+        logger.info(f"Marked {len(stamped)} migrations as applied: {', '.join(stamped) or '-'}")
+        return
+    applied = migrations.migrate(engine, Base.metadata)
+    logger.info(f"Applied {len(applied)} migrations: {', '.join(applied) or '-'}")
+
+
+def rebuild_summaries(args):
+    db = SessionLocal()
+    try:
+        rows = summary_crud.rebuild_summaries(db)
+    finally:
+        db.close()
+    logger.info(f"Rebuilt {rows} attendance summaries")
+
+
+def import_roster(args):
+    with open(args.path, encoding="utf-8-sig", newline="") as f:
+        text = f.read()
+    db = SessionLocal()
+    try:
+        result = roster_crud.import_roster(db, text, dry_run=args.dry_run)
+    finally:
+        db.close()
+    for error in result.errors:
+        print(f"line {error.line}: {error.error} ({error.rfid_card_id or '-'})", file=sys.stderr)
+    verb = "Would import" if args.dry_run else "Imported"
+    logger.info(f"{verb} roster: {result.created} created, {result.updated} updated, {len(result.errors)} rejected")
+    return 1 if result.errors else 0
+
+
+def print_reader_token(args):
+    print(reader_token(get_settings().secret_key.encode(), args.reader_id))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Presence checker maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = commands.add_parser("migrate", help="Apply pending migrations from migrations/")
+    migrate_parser.add_argument(
+        "--stamp", metavar="VERSION",
+        help="Record migrations up to VERSION (e.g. 0003) as applied without running them",
+    )
+    migrate_parser.set_defaults(handler=migrate)
+
+    rebuild = commands.add_parser("rebuild-summaries", help="Recompute attendance summaries from attendances")
+    rebuild.set_defaults(handler=rebuild_summaries)
+
+    roster = commands.add_parser("import-roster", help="Create or update students from a name,group,rfid_card_id CSV")
+    roster.add_argument("path")
+    roster.add_argument("--dry-run", action="store_true", help="Validate only, write nothing")
+    roster.set_defaults(handler=import_roster)
+
+    token = commands.add_parser("reader-token", help="Print the token a reader uses to connect to /attendances/reader-ws")
+    token.add_argument("reader_id")
+    token.set_defaults(handler=print_reader_token)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
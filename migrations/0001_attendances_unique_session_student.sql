@@ -0,0 +1,22 @@
+-- One attendance row per (session, student) so taps can be upserted.
+-- Existing duplicates are collapsed first, keeping the earliest non-absent row.
+
+DELETE FROM attendances
+WHERE attendance_id IN (
+    SELECT attendance_id
+    FROM (
+        SELECT
+            attendance_id,
+            row_number() OVER (
+                PARTITION BY session_id, student_id
+                ORDER BY (status = 'absent'), time NULLS LAST, attendance_id
+            ) AS rn
+        FROM attendances
+    ) ranked
+    WHERE rn > 1
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_attendances_session_student ON attendances (session_id, student_id);
+
+CREATE INDEX IF NOT EXISTS ix_attendances_student_session ON attendances (student_id, session_id);
+CREATE INDEX IF NOT EXISTS ix_attendances_session_status ON attendances (session_id, status);
@@ -0,0 +1,27 @@
+-- Per-course attendance counts of each student, maintained by the write path.
+-- Backfilled here; `python manage.py rebuild-summaries` recomputes it at any time.
+
+CREATE TABLE IF NOT EXISTS attendance_summaries (
+    course_id INTEGER NOT NULL REFERENCES courses (course_id),
+    student_id INTEGER NOT NULL REFERENCES students (student_id),
+    present INTEGER NOT NULL DEFAULT 0,
+    late INTEGER NOT NULL DEFAULT 0,
+    absent INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITHOUT TIME ZONE,
+    PRIMARY KEY (course_id, student_id)
+);
+
+DELETE FROM attendance_summaries;
+
+INSERT INTO attendance_summaries (course_id, student_id, present, late, absent, updated_at)
+SELECT
+    s.course_id,
+    a.student_id,
+    count(*) FILTER (WHERE a.status = 'present'),
+    count(*) FILTER (WHERE a.status = 'late'),
+    count(*) FILTER (WHERE a.status = 'absent'),
+    max(a.updated_at)
+FROM attendances a
+JOIN sessions s ON s.session_id = a.session_id
+WHERE s.course_id IS NOT NULL AND a.student_id IS NOT NULL
+GROUP BY s.course_id, a.student_id;
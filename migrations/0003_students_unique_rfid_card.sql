@@ -0,0 +1,6 @@
+-- A card identifies one student; roster imports upsert on it.
+-- Fails if two students share a card. Find them with:
+--   SELECT rfid_card_id, array_agg(student_id) FROM students
+--   WHERE rfid_card_id IS NOT NULL GROUP BY rfid_card_id HAVING count(*) > 1;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_students_rfid_card_id ON students (rfid_card_id);
@@ -0,0 +1,13 @@
+-- migrate: no-transaction
+-- Indexes for the lookups on the tap, schedule, professor and import paths.
+-- Built CONCURRENTLY so live tables stay writable; students.rfid_card_id is
+-- already covered by uq_students_rfid_card_id and attendances by 0001.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_sessions_room_date ON sessions (room, date);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_sessions_date ON sessions (date);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_sessions_course_start_end ON sessions (course_id, start_time, end_time);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_courses_professor_id ON courses (professor_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_courses_groups_course_group ON courses_groups (course_id, group_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_professors_email ON professors (email);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_students_group_id ON students (group_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_groups_code ON groups (code);
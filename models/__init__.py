@@ -6,6 +6,7 @@ from models.student import Student
 from models.course import Course, CourseGroup
 from models.session import Session, SessionStatus
 from models.attendance import Attendance, AttendanceStatus
+from models.attendance_summary import AttendanceSummary
 
 # This helps identify all models in one place
 __all__ = [
@@ -17,5 +18,6 @@ __all__ = [
     'Session', 
     'SessionStatus',
     'Attendance', 
-    'AttendanceStatus'
+    'AttendanceStatus',
+    'AttendanceSummary'
 ]
\ No newline at end of file
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, ForeignKey, Enum, DateTime
+from sqlalchemy import Column, Integer, ForeignKey, Enum, DateTime, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 import enum
 
@@ -12,6 +12,11 @@ class AttendanceStatus(enum.Enum):
 
 class Attendance(Base):
     __tablename__ = "attendances"
+    __table_args__ = (
+        UniqueConstraint("session_id", "student_id", name="uq_attendances_session_student"),
+        Index("ix_attendances_student_session", "student_id", "session_id"),
+        Index("ix_attendances_session_status", "session_id", "status"),
+    )
 
     attendance_id = Column(Integer, primary_key=True, autoincrement=True)
     session_id = Column(Integer, ForeignKey("sessions.session_id"))
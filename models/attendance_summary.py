@@ -0,0 +1,25 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, ForeignKey, DateTime
+
+from core.db import Base
+
+class AttendanceSummary(Base):
+    """Per-course attendance counts of a student, kept in step with ``attendances``."""
+
+    __tablename__ = "attendance_summaries"
+
+    course_id = Column(Integer, ForeignKey("courses.course_id"), primary_key=True)
+    student_id = Column(Integer, ForeignKey("students.student_id"), primary_key=True)
+    present = Column(Integer, nullable=False, default=0)
+    late = Column(Integer, nullable=False, default=0)
+    absent = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @property
+    def total(self) -> int:
+        return self.present + self.late + self.absent
+
+    @property
+    def attendance_rate(self) -> float:
+        """Share of sessions attended, late included."""
+        return (self.present + self.late) / self.total if self.total else 0.0
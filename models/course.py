@@ -1,11 +1,14 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 
 from core.db import Base
 
 class Course(Base):
     __tablename__ = "courses"
+    __table_args__ = (
+        Index("ix_courses_professor_id", "professor_id"),
+    )
 
     course_id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String)
@@ -20,6 +23,9 @@ class Course(Base):
 
 class CourseGroup(Base):
     __tablename__ = "courses_groups"
+    __table_args__ = (
+        Index("ix_courses_groups_course_group", "course_id", "group_id"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     course_id = Column(Integer, ForeignKey("courses.course_id"))
@@ -1,11 +1,14 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Index
 from sqlalchemy.orm import relationship
 
 from core.db import Base
 
 class Group(Base):
     __tablename__ = "groups"
+    __table_args__ = (
+        Index("ix_groups_code", "code"),
+    )
 
     group_id = Column(Integer, primary_key=True, autoincrement=True)
     code = Column(String)
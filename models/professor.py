@@ -1,11 +1,14 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Index
 from sqlalchemy.orm import relationship
 
 from core.db import Base
 
 class Professor(Base):
     __tablename__ = "professors"
+    __table_args__ = (
+        Index("ix_professors_email", "email"),
+    )
 
     professor_id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String)
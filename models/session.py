@@ -1,5 +1,6 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum, Index, case, cast, literal
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 import enum
 
@@ -12,6 +13,11 @@ class SessionStatus(enum.Enum):
 
 class Session(Base):
     __tablename__ = "sessions"
+    __table_args__ = (
+        Index("ix_sessions_room_date", "room", "date"),
+        Index("ix_sessions_date", "date"),
+        Index("ix_sessions_course_start_end", "course_id", "start_time", "end_time"),
+    )
 
     session_id = Column(Integer, primary_key=True, autoincrement=True)
     course_id = Column(Integer, ForeignKey("courses.course_id"))
@@ -19,10 +25,40 @@ class Session(Base):
     date = Column(DateTime)
     start_time = Column(DateTime)
     end_time = Column(DateTime)
-    status = Column(Enum(SessionStatus))
+    # Last status persisted by the session scheduler; read ``status`` instead.
+    stored_status = Column("status", Enum(SessionStatus))
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     course = relationship("Course", back_populates="sessions")
-    attendances = relationship("Attendance", back_populates="session")
\ No newline at end of file
+    attendances = relationship("Attendance", back_populates="session")
+
+    @hybrid_property
+    def status(self):
+        """Status derived from the current time, without touching the row."""
+        if self.start_time is None or self.end_time is None:
+            return self.stored_status
+        now = datetime.utcnow()
+        if self.end_time < now:
+            return SessionStatus.ended
+        if self.start_time <= now:
+            return SessionStatus.active
+        return SessionStatus.not_started
+
+    @status.setter
+    def status(self, value):
+        self.stored_status = value
+
+    @status.expression
+    def status(cls):
+        now = literal(datetime.utcnow(), DateTime)
+        return cast(
+            case(
+                (cls.end_time < now, SessionStatus.ended.name),
+                (cls.start_time <= now, SessionStatus.active.name),
+                (cls.start_time > now, SessionStatus.not_started.name),
+                else_=cast(cls.stored_status, String),
+            ),
+            Enum(SessionStatus),
+        )
@@ -1,11 +1,15 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from core.db import Base
 
 class Student(Base):
     __tablename__ = "students"
+    __table_args__ = (
+        UniqueConstraint("rfid_card_id", name="uq_students_rfid_card_id"),
+        Index("ix_students_group_id", "group_id"),
+    )
 
     student_id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String)
@@ -0,0 +1,81 @@
+"""Shared test fixtures."""
+
+from datetime import datetime, time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import models  # noqa: F401 - registers every model on Base.metadata
+from core.card_index import card_index
+from core.checkin import tap_cache
+from core.db import Base
+from core.schedule_index import schedule_index
+from models.course import Course
+from models.session import Session as SessionModel
+from models.student import Student
+
+
+@pytest.fixture
+def engine():
+    """In-memory SQLite engine with the full schema."""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    """Database session bound to the test engine."""
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    card_index.clear()
+    schedule_index.clear()
+    tap_cache.clear()
+    try:
+        yield session
+    finally:
+        session.close()
+        card_index.clear()
+        schedule_index.clear()
+        tap_cache.clear()
+
+
+@pytest.fixture
+def async_session_factory(tmp_path):
+    """Async sessions on a SQLite file seeded with student Ana (card A1) and a session in 3-101 running all day."""
+    pytest.importorskip("aiosqlite")
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    path = tmp_path / "async.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    today = datetime.utcnow().date()
+    with sessionmaker(bind=engine)() as db:
+        course = Course(name="Networks")
+        db.add_all([course, Student(name="Ana", rfid_card_id="A1")])
+        db.flush()
+        db.add(SessionModel(
+            course_id=course.course_id,
+            room="3-101",
+            date=datetime.combine(today, time.min),
+            start_time=datetime.combine(today, time.min),
+            end_time=datetime.combine(today, time.max),
+        ))
+        db.commit()
+    engine.dispose()
+
+    card_index.clear()
+    schedule_index.clear()
+    tap_cache.clear()
+    try:
+        yield async_sessionmaker(bind=create_async_engine(f"sqlite+aiosqlite:///{path}"), expire_on_commit=False)
+    finally:
+        card_index.clear()
+        schedule_index.clear()
+        tap_cache.clear()
@@ -0,0 +1,101 @@
+"""Benchmark professor session loading: per-course joinedload loop vs one query.
+
+Seeds an in-memory SQLite database with one professor teaching 10 courses of
+60 sessions each, 100 students per session, and times both approaches:
+
+    python -m tests.manual.bench_professor_sessions
+"""
+
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import joinedload, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import models  # noqa: F401
+from core.db import Base
+from crud import session as session_crud
+from models.attendance import Attendance
+from models.course import Course, CourseGroup
+from models.group import Group
+from models.professor import Professor
+from models.session import Session as SessionModel
+from models.student import Student
+
+COURSES, SESSIONS, STUDENTS = 10, 60, 100
+
+
+def seed(db):
+    db.execute(insert(Professor), [{"professor_id": 1, "name": "Prof"}])
+    db.execute(insert(Group), [{"group_id": 1, "code": "FAF-231"}])
+    db.execute(insert(Student), [
+        {"student_id": i, "name": f"Student {i}", "group_id": 1, "rfid_card_id": f"C{i}"}
+        for i in range(1, STUDENTS + 1)
+    ])
+    db.execute(insert(Course), [{"course_id": c, "name": f"Course {c}", "professor_id": 1} for c in range(1, COURSES + 1)])
+    db.execute(insert(CourseGroup), [{"course_id": c, "group_id": 1} for c in range(1, COURSES + 1)])
+    day = datetime(2025, 1, 1, 9)
+    sessions, attendances = [], []
+    for c in range(1, COURSES + 1):
+        for s in range(SESSIONS):
+            session_id = len(sessions) + 1
+            start = day + timedelta(days=s)
+            sessions.append({"session_id": session_id, "course_id": c, "room": "3-101", "date": start,
+                             "start_time": start, "end_time": start + timedelta(hours=1)})
+            attendances.extend({"session_id": session_id, "student_id": i, "status": "absent"}
+                               for i in range(1, STUDENTS + 1))
+    db.execute(insert(SessionModel), sessions)
+    db.execute(insert(Attendance), attendances)
+    db.commit()
+
+
+def per_course_loop(db, professor_id):
+    """The previous implementation: one joined query per course."""
+    sessions = []
+    for course in db.get(Professor, professor_id).courses:
+        sessions.extend(
+            db.query(SessionModel)
+            .options(
+                joinedload(SessionModel.attendances).joinedload(Attendance.student).joinedload(Student.group),
+                joinedload(SessionModel.course).joinedload(Course.course_groups).joinedload(CourseGroup.group),
+            )
+            .filter(SessionModel.course_id == course.course_id)
+            .all()
+        )
+    return sessions
+
+
+def single_query(db, professor_id):
+    return session_crud.get_sessions_by_professor(db, professor_id, limit=COURSES * SESSIONS)
+
+
+def run(name, loader, Session, engine):
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    db = Session()
+    event.listen(engine, "before_cursor_execute", listener)
+    started = time.perf_counter()
+    sessions = loader(db, 1)
+    rows = sum(len(s.attendances) for s in sessions)
+    elapsed = time.perf_counter() - started
+    event.remove(engine, "before_cursor_execute", listener)
+    db.close()
+    print(f"{name:<16} {elapsed * 1000:9.1f} ms  {len(statements):4d} queries  {len(sessions)} sessions  {rows} attendances")
+
+
+def main():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    with Session() as db:
+        seed(db)
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    for _ in range(repeat):
+        run("per-course loop", per_course_loop, Session, engine)
+        run("single query", single_query, Session, engine)
+
+
+if __name__ == "__main__":
+    main()
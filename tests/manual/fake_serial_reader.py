@@ -0,0 +1,80 @@
+"""Fake USB readers on pseudo-terminals, for load testing the serial gateway.
+
+Creates one pty per reader and prints the device paths. List them under
+``serial.ports`` in config.yml, set ``esp_32_connection: usb``, start the app,
+then press Enter to send taps. Replies come back in order per port, so each
+one is matched to the oldest unanswered tap to measure latency:
+
+    python tests/manual/fake_serial_reader.py --readers 4 --rate 20 --count 500 --cards A1,B2 --room 3-101
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from collections import Counter, deque
+
+
+async def reader(fd: int, cards: list[str], room: str, rate: float, count: int, latencies: list, replies: Counter):
+    pending: deque = deque()
+    buffer = b""
+
+    async def receive():
+        nonlocal buffer
+        received = 0
+        while received < count:
+            try:
+                buffer += os.read(fd, 4096)
+            except BlockingIOError:
+                await asyncio.sleep(0.001)
+                continue
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                latencies.append((time.monotonic() - pending.popleft()) * 1000)
+                replies[line.decode().strip()] += 1
+                received += 1
+
+    receiving = asyncio.create_task(receive())
+    for i in range(count):
+        pending.append(time.monotonic())
+        os.write(fd, f"{cards[i % len(cards)]},{room}\n".encode())
+        await asyncio.sleep(1 / rate)
+    try:
+        await asyncio.wait_for(receiving, timeout=30)
+    except asyncio.TimeoutError:
+        print(f"{len(pending)} taps unanswered")
+
+
+async def main(args):
+    ptys = [os.openpty() for _ in range(args.readers)]
+    for master, slave in ptys:
+        os.set_blocking(master, False)
+        print(os.ttyname(slave))
+    await asyncio.to_thread(input, "Configure these ports, start the app, then press Enter to send taps...")
+
+    latencies, replies = [], Counter()
+    started = time.monotonic()
+    await asyncio.gather(*(
+        reader(master, args.cards.split(","), args.room, args.rate, args.count, latencies, replies)
+        for master, _ in ptys
+    ))
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+    print(f"{len(latencies)} replies in {elapsed:.1f}s ({len(latencies) / elapsed:.0f}/s)")
+    if latencies:
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        print(f"latency ms: p50 {statistics.median(latencies):.1f}  p95 {p95:.1f}  max {latencies[-1]:.1f}")
+    for reply, count in replies.most_common():
+        print(f"  {count:6d}  {reply}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, default=1)
+    parser.add_argument("--rate", type=float, default=10, help="taps per second per reader")
+    parser.add_argument("--count", type=int, default=100, help="taps per reader")
+    parser.add_argument("--cards", default="A1")
+    parser.add_argument("--room", default="3-101")
+    asyncio.run(main(parser.parse_args()))
@@ -1,4 +1,5 @@
 import asyncio
+import sys
 import websockets
 
 async def listen(uri):
@@ -8,5 +9,8 @@ async def listen(uri):
             message = await websocket.recv()
             print(f"Received message: {message}")
 
+# Optionally pass topics to follow, e.g. `python ws_test.py room:3-101,professor:4`
 uri = "ws://localhost:8000/api/attendances/ws"
-asyncio.run(listen(uri))
\ No newline at end of file
+if len(sys.argv) > 1:
+    uri += f"?topics={sys.argv[1]}"
+asyncio.run(listen(uri))
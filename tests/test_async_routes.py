@@ -0,0 +1,182 @@
+"""Attendance routes on the async data layer."""
+
+import asyncio
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import pytest
+from fastapi import WebSocketDisconnect
+from fastapi.testclient import TestClient
+
+from core.checkin import tap_cache
+from core.config import get_settings
+from core.db import get_async_db, get_async_session_factory
+from core.reader_channel import ReaderChannel, reader_token
+from core.replicas import get_async_read_db, get_async_read_session_factory
+from main import app
+
+
+@pytest.fixture
+def client(async_session_factory):
+    """Test client whose async sessions use the seeded SQLite file."""
+
+    async def override():
+        async with async_session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override
+    app.dependency_overrides[get_async_read_db] = override
+    app.dependency_overrides[get_async_read_session_factory] = lambda: async_session_factory
+    app.dependency_overrides[get_async_session_factory] = lambda: async_session_factory
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.pop(get_async_db)
+        app.dependency_overrides.pop(get_async_read_db)
+        app.dependency_overrides.pop(get_async_read_session_factory)
+        app.dependency_overrides.pop(get_async_session_factory)
+
+
+def test_check_and_read_back(client):
+    """A tap through the async route is visible to the async readers."""
+    response = client.post("/api/attendances/check", json={"rfid_card_id": "A1", "room": "3-101"})
+    assert response.json()["message"].startswith("Marked: ")
+
+    attendances = client.get("/api/attendances/session/1").json()
+    assert len(attendances) == 1
+
+    response = client.put(f"/api/attendances/{attendances[0]['attendance_id']}", json={"status": "present"})
+    assert response.json()["status"] == "present"
+    assert client.get("/api/attendances/session/1/stats").json() == {"total": 1, "present": 1, "late": 0, "absent": 0}
+    assert client.get("/api/attendances/session/99/stats").status_code == 404
+
+
+def test_retried_check_with_idempotency_key_is_not_reprocessed(client):
+    tap = {"rfid_card_id": "A1", "room": "3-101"}
+    first = client.post("/api/attendances/check", json=tap, headers={"Idempotency-Key": "r-1"}).json()
+    tap_cache.window = 0
+    try:
+        with mock.patch("core.checkin._check_in") as check_in:
+            retry = client.post("/api/attendances/check", json=tap, headers={"Idempotency-Key": "r-1"}).json()
+    finally:
+        tap_cache.window = get_settings().dedup_window_seconds
+    assert retry == first
+    check_in.assert_not_called()
+
+    other = client.post("/api/attendances/check", json={**tap, "rfid_card_id": "B2"}, headers={"Idempotency-Key": "r-1"})
+    assert other.status_code == 422
+
+
+def test_batched_session_and_course_stats(client):
+    """Stats for several sessions and a course come from GROUP BY queries."""
+    client.post("/api/attendances/check", json={"rfid_card_id": "A1", "room": "3-101"})
+
+    stats = client.get("/api/attendances/stats", params={"session_ids": [1, 2]}).json()
+    assert [s["session_id"] for s in stats] == [1, 2]
+    assert stats[0]["total"] == 1 and stats[1]["total"] == 0
+
+    course = client.get("/api/attendances/course/1/stats").json()
+    assert course["course_id"] == 1 and course["sessions"] == 1 and course["total"] == 1
+    empty = client.get("/api/attendances/course/1/stats", params={"date_to": "2000-01-01T00:00:00"}).json()
+    assert empty["sessions"] == 0 and empty["total"] == 0
+    assert client.get("/api/attendances/course/99/stats").status_code == 404
+
+
+def test_summary_read_by_primary_key(client):
+    client.post("/api/attendances/check", json={"rfid_card_id": "A1", "room": "3-101"})
+
+    summary = client.get("/api/attendances/course/1/student/1/summary").json()
+    assert summary["total"] == 1 and summary["attendance_rate"] == 1.0
+    assert len(client.get("/api/attendances/course/1/summaries").json()) == 1
+    assert client.get("/api/attendances/course/1/student/99/summary").status_code == 404
+
+
+def test_export_streams_joined_rows(client):
+    client.post("/api/attendances/check", json={"rfid_card_id": "A1", "room": "3-101"})
+
+    response = client.get("/api/attendances/export")
+    assert response.headers["content-type"].startswith("text/csv")
+    header, row = response.text.splitlines()
+    assert header.startswith("attendance_id,session_id,course_id,course,room,")
+    assert ",Networks,3-101," in row and ",Ana," in row
+
+    response = client.get("/api/attendances/export", params={"format": "ndjson", "gzip": "true"})
+    (line,) = gzip.decompress(response.content).decode().splitlines()
+    assert json.loads(line)["student"] == "Ana"
+    assert client.get("/api/attendances/export", params={"course_id": 99}).text.count("\n") == 1
+
+
+def test_reader_websocket_correlates_pipelined_taps(client):
+    token = reader_token(get_settings().secret_key.encode(), "lab-3-101")
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect("/api/attendances/reader-ws?reader_id=lab-3-101&token=wrong") as ws:
+            ws.receive_json()
+
+    with client.websocket_connect(f"/api/attendances/reader-ws?reader_id=lab-3-101&token={token}") as ws:
+        hello = ws.receive_json()
+        assert hello["type"] == "hello" and hello["max_in_flight"] >= 1
+        ws.send_json({"id": "a", "rfid_card_id": "A1", "room": "3-101"})
+        ws.send_json({"id": "b", "rfid_card_id": "ZZ", "room": "3-101"})
+        ws.send_json({"id": "c", "room": "3-101"})
+        replies = {reply["id"]: reply for reply in (ws.receive_json() for _ in range(3))}
+
+    assert replies["a"]["message"].startswith("Marked: ")
+    assert replies["b"] == {"id": "b", "message": "Unknown card"}
+    assert replies["c"] == {"id": "c", "error": "Invalid tap"}
+
+
+def test_reader_channel_refuses_taps_over_the_in_flight_limit():
+    class FakeWebSocket:
+        def __init__(self):
+            self.sent = []
+
+        async def send_text(self, text):
+            self.sent.append(json.loads(text))
+
+    class SlowChannel(ReaderChannel):
+        async def process(self, tap):
+            await asyncio.sleep(0.05)
+            return "Done"
+
+    async def run():
+        channel = SlowChannel(FakeWebSocket(), "lab-3-101", session_factory=None, max_in_flight=2)
+        for tap_id in range(3):
+            await channel.receive(json.dumps({"id": tap_id, "rfid_card_id": "A1", "room": "3-101"}))
+        await asyncio.gather(*channel._tasks)
+        return channel.websocket.sent
+
+    assert asyncio.run(run()) == [
+        {"id": 2, "error": "Busy"}, {"id": 0, "message": "Done"}, {"id": 1, "message": "Done"},
+    ]
+
+
+def test_reader_channel_normalizes_and_bounds_tap_times():
+    class FakeWebSocket:
+        def __init__(self):
+            self.sent = []
+
+        async def send_text(self, text):
+            self.sent.append(json.loads(text))
+
+    processed = []
+
+    class RecordingChannel(ReaderChannel):
+        async def process(self, tap):
+            processed.append(tap.tapped_at)
+            return "Done"
+
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    local = now.astimezone(timezone(timedelta(hours=3)))
+
+    async def run():
+        channel = RecordingChannel(FakeWebSocket(), "lab-3-101", session_factory=None, max_age_seconds=60)
+        await channel.receive(json.dumps({"id": 1, "rfid_card_id": "A1", "room": "3-101", "tapped_at": local.isoformat()}))
+        stale = (now - timedelta(hours=1)).isoformat()
+        await channel.receive(json.dumps({"id": 2, "rfid_card_id": "A1", "room": "3-101", "tapped_at": stale}))
+        await asyncio.gather(*channel._tasks)
+        return channel.websocket.sent
+
+    assert asyncio.run(run()) == [{"id": 2, "error": "Stale tap"}, {"id": 1, "message": "Done"}]
+    assert processed == [now.replace(tzinfo=None)]
@@ -0,0 +1,173 @@
+"""Attendance check-in tests."""
+
+import threading
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from core.card_index import card_index
+from core.db import Base
+from core.schedule_index import schedule_index
+from crud import attendance as attendance_crud
+from models.attendance import Attendance, AttendanceStatus
+from models.course import Course, CourseGroup
+from models.group import Group
+from models.session import Session as SessionModel, SessionStatus
+from models.student import Student
+
+
+def _seed(db, start: datetime, end: datetime):
+    """One student and one session in room 3-101."""
+    course = Course(name="Networks")
+    student = Student(name="Ana", rfid_card_id="A1")
+    db.add_all([course, student])
+    db.flush()
+    session = SessionModel(
+        course_id=course.course_id,
+        room="3-101",
+        date=datetime.combine(start.date(), time.min),
+        start_time=start,
+        end_time=end,
+        status=SessionStatus.not_started,
+    )
+    db.add(session)
+    db.commit()
+    return student, session
+
+
+def _whole_day():
+    today = datetime.utcnow().date()
+    return datetime.combine(today, time.min), datetime.combine(today, time.max)
+
+
+def test_tap_upgrades_absent_row(db):
+    """An absent row is upgraded in place and later taps leave it alone."""
+    start = datetime.combine(datetime.utcnow().date(), time(8))
+    student, session = _seed(db, start, start + timedelta(hours=2))
+    db.add(Attendance(session_id=session.session_id, student_id=student.student_id, status=AttendanceStatus.absent))
+    db.commit()
+
+    # Tapped at fixed offsets from the start, so the status never depends on the time of day.
+    late = attendance_crud.check_tap(db, "A1", "3-101", tapped_at=start + timedelta(minutes=30))
+    again = attendance_crud.check_tap(db, "A1", "3-101", tapped_at=start + timedelta(minutes=31))
+    assert late.message == again.message == "Marked: late"
+    assert db.query(Attendance).count() == 1
+
+
+def test_mark_attendances_never_downgrades(db):
+    """A present row stays present when a later tap would be late."""
+    start, end = _whole_day()
+    student, session = _seed(db, start, end)
+    pair = (session.session_id, student.student_id)
+
+    first = attendance_crud.mark_attendances(db, {pair: (AttendanceStatus.present, start + timedelta(minutes=1))})
+    second = attendance_crud.mark_attendances(db, {pair: (AttendanceStatus.late, start + timedelta(minutes=30))})
+    db.commit()
+    assert first[pair] == second[pair] == AttendanceStatus.present
+    assert db.query(Attendance).one().time == start + timedelta(minutes=1)
+
+
+def test_concurrent_duplicate_taps_resolve_to_one_row(tmp_path):
+    """Readers racing on the same card produce a single attendance row."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'taps.db'}", connect_args={"check_same_thread": False, "timeout": 30})
+    Base.metadata.create_all(bind=engine)
+    make_session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    start, end = _whole_day()
+    with make_session() as db:
+        _seed(db, start, end)
+        card_index.load(db)
+        schedule_index.load(db)
+
+    taps = 16
+    barrier = threading.Barrier(taps)
+    results = []
+
+    def tap():
+        with make_session() as db:
+            barrier.wait()
+            results.append(attendance_crud.check_attendance(db, rfid_card_id="A1", room="3-101"))
+
+    threads = [threading.Thread(target=tap) for _ in range(taps)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with make_session() as db:
+            assert db.query(Attendance).count() == 1
+        assert len(results) == taps
+        assert len(set(results)) == 1 and results[0].startswith("Marked: ")
+    finally:
+        card_index.clear()
+        schedule_index.clear()
+        engine.dispose()
+
+
+def test_replayed_batch_uses_tap_time_and_few_queries(db, engine):
+    """A reader's offline buffer is evaluated at tap time in a handful of statements."""
+    yesterday = datetime.utcnow().date() - timedelta(days=1)
+    start = datetime.combine(yesterday, time(9, 0))
+    _, session = _seed(db, start, start + timedelta(hours=2))
+    db.add_all([Student(name=f"Student {i}", rfid_card_id=f"C{i}") for i in range(199)])
+    db.commit()
+
+    taps = [attendance_crud.Tap("A1", "3-101", start + timedelta(minutes=30))]
+    taps += [attendance_crud.Tap(f"C{i}", "3-101", start + timedelta(minutes=5)) for i in range(198)]
+    taps += [attendance_crud.Tap("unknown", "3-101", start)]
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    results = attendance_crud.check_taps(db, taps)
+    issued = len(statements)
+
+    assert [r.message for r in results[:2]] == ["Marked: late", "Marked: present"]
+    assert results[-1].message == "Unknown card"
+    assert all(r.session_id == session.session_id for r in results[:-1])
+    assert db.query(Attendance).count() == 199
+    # card lookup, sessions, attendance upsert, summary upsert
+    assert issued <= 5
+
+
+def test_absent_rows_cover_enrolled_groups_only(db):
+    """Session start creates one absent row per enrolled student, idempotently."""
+    start, end = _whole_day()
+    student, session = _seed(db, start, end)
+    enrolled, other = Group(code="FAF-231"), Group(code="FAF-232")
+    db.add_all([enrolled, other])
+    db.flush()
+    student.group_id = enrolled.group_id
+    db.add_all([
+        CourseGroup(course_id=session.course_id, group_id=enrolled.group_id),
+        Student(name="Ion", rfid_card_id="B2", group_id=enrolled.group_id),
+        Student(name="Maria", rfid_card_id="C3", group_id=other.group_id),
+    ])
+    db.commit()
+
+    assert attendance_crud.create_absent_attendances(db, [session.session_id]) == 2
+    assert attendance_crud.create_absent_attendances(db, [session.session_id]) == 0
+    assert {a.status for a in db.query(Attendance)} == {AttendanceStatus.absent}
+
+    assert attendance_crud.check_attendance(db, rfid_card_id="A1", room="3-101").startswith("Marked: ")
+    assert db.query(Attendance).filter(Attendance.status == AttendanceStatus.absent).count() == 1
+
+
+def test_stats_are_grouped_in_sql(db):
+    start, end = _whole_day()
+    student, session = _seed(db, start, end)
+    other = SessionModel(course_id=session.course_id, room="3-102", date=session.date, start_time=start, end_time=end)
+    db.add(other)
+    db.flush()
+    db.add_all([
+        Attendance(session_id=session.session_id, student_id=student.student_id, status=AttendanceStatus.present),
+        Attendance(session_id=other.session_id, student_id=student.student_id, status=AttendanceStatus.absent),
+    ])
+    db.commit()
+
+    stats = attendance_crud.get_session_stats(db, [other.session_id, session.session_id])
+    assert list(stats) == [other.session_id, session.session_id]
+    assert stats[session.session_id] == {"total": 1, "present": 1, "late": 0, "absent": 0}
+    assert attendance_crud.get_course_stats(db, session.course_id) == {
+        "sessions": 2, "total": 2, "present": 1, "late": 0, "absent": 1,
+    }
@@ -0,0 +1,104 @@
+"""Per-student attendance summaries kept in step by every write path."""
+
+from datetime import datetime, time
+from unittest import mock
+
+from crud import attendance as attendance_crud
+from crud import attendance_summary as summary_crud
+from models.attendance import Attendance, AttendanceStatus
+from models.attendance_summary import AttendanceSummary
+from models.course import Course, CourseGroup
+from models.group import Group
+from models.session import Session as SessionModel
+from models.student import Student
+
+
+def _seed(db):
+    """A course with two enrolled students and one session running all day."""
+    today = datetime.utcnow().date()
+    group = Group(code="FAF-231")
+    course = Course(name="Networks")
+    db.add_all([group, course])
+    db.flush()
+    db.add_all([
+        CourseGroup(course_id=course.course_id, group_id=group.group_id),
+        Student(name="Ana", rfid_card_id="A1", group_id=group.group_id),
+        Student(name="Ion", rfid_card_id="B2", group_id=group.group_id),
+    ])
+    session = SessionModel(
+        course_id=course.course_id,
+        room="3-101",
+        date=datetime.combine(today, time.min),
+        start_time=datetime.combine(today, time.min),
+        end_time=datetime.combine(today, time.max),
+    )
+    db.add(session)
+    db.commit()
+    return course, session
+
+
+def _counts(db, course_id):
+    return {
+        s.student_id: (s.present, s.late, s.absent)
+        for s in summary_crud.get_course_summaries(db, course_id)
+    }
+
+
+def test_write_paths_keep_summaries_in_step(db):
+    course, session = _seed(db)
+    ana, ion = db.query(Student).order_by(Student.student_id).all()
+
+    attendance_crud.create_absent_attendances(db, [session.session_id])
+    assert _counts(db, course.course_id) == {ana.student_id: (0, 0, 1), ion.student_id: (0, 0, 1)}
+
+    # The tap upgrades Ana's absent row, which must move her count, not add one.
+    attendance_crud.check_attendance(db, rfid_card_id="A1", room="3-101")
+    assert _counts(db, course.course_id)[ana.student_id] == (0, 1, 0)
+
+    ion_row = db.query(Attendance).filter(Attendance.student_id == ion.student_id).one()
+    attendance_crud.update_attendance(db, ion_row.attendance_id, status=AttendanceStatus.present)
+    assert _counts(db, course.course_id)[ion.student_id] == (1, 0, 0)
+
+    attendance_crud.delete_attendance(db, ion_row.attendance_id)
+    assert _counts(db, course.course_id)[ion.student_id] == (0, 0, 0)
+
+    summary = summary_crud.get_summary(db, course.course_id, ana.student_id)
+    assert summary.total == 1 and summary.attendance_rate == 1.0
+
+
+def test_tap_on_new_row_inserts_summary(db):
+    course, _ = _seed(db)
+    attendance_crud.check_attendance(db, rfid_card_id="B2", room="3-101")
+    assert sum(_counts(db, course.course_id)[2]) == 1
+
+
+def test_upgrade_in_the_same_instant_as_the_absent_row_is_not_an_insert(db):
+    """Rows are told apart by whether they existed, not by their created_at."""
+    course, session = _seed(db)
+    frozen = datetime.utcnow()
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def utcnow(cls):
+            return frozen
+
+    with mock.patch.object(attendance_crud, "datetime", FrozenDatetime):
+        attendance_crud.create_absent_attendances(db, [session.session_id])
+        attendance_crud.check_attendance(db, rfid_card_id="A1", room="3-101")
+    assert _counts(db, course.course_id)[1] in {(1, 0, 0), (0, 1, 0)}
+
+
+def test_rebuild_repairs_drift(db):
+    course, session = _seed(db)
+    attendance_crud.create_absent_attendances(db, [session.session_id])
+    attendance_crud.check_attendance(db, rfid_card_id="A1", room="3-101")
+    expected = _counts(db, course.course_id)
+
+    # Drift: a row edited behind the write path's back.
+    db.query(Attendance).filter(Attendance.student_id == 2).update({"status": AttendanceStatus.present})
+    db.query(AttendanceSummary).update({"absent": 7})
+    db.commit()
+
+    assert summary_crud.rebuild_summaries(db) == 2
+    db.expire_all()
+    assert _counts(db, course.course_id) == {**expected, 2: (1, 0, 0)}
@@ -0,0 +1,46 @@
+"""Card index tests."""
+
+from core.card_index import card_index
+from crud import group as group_crud
+from crud import student as student_crud
+from models.student import Student
+
+
+def test_student_crud_keeps_index_current(db):
+    """Create, update and delete are written through to the index."""
+    group = group_crud.create_group(db, code="FAF-231")
+    student = student_crud.create_student(db, name="Ana", group_id=group.group_id, rfid_card_id="A1")
+    assert card_index.get("A1").student_id == student.student_id
+
+    student_crud.update_student(db, student.student_id, name="Ana M", rfid_card_id="B2")
+    assert card_index.get("A1") is None
+    assert card_index.get("B2").name == "Ana M"
+
+    student_crud.delete_student(db, student.student_id)
+    assert card_index.get("B2") is None
+
+
+def test_lookup_falls_back_to_database(db):
+    """A miss is resolved from the database and cached."""
+    db.add(Student(name="Ion", rfid_card_id="C3"))
+    db.commit()
+
+    assert card_index.get("C3") is None
+    assert card_index.lookup(db, "C3").name == "Ion"
+    assert card_index.get("C3") is not None
+    assert card_index.lookup(db, "missing") is None
+
+
+def test_reconcile_picks_up_external_changes(db):
+    """Reconcile reports and applies rows changed behind the index's back."""
+    db.add(Student(name="Ion", rfid_card_id="C3"))
+    db.commit()
+    card_index.load(db)
+
+    db.add(Student(name="Maria", rfid_card_id="D4"))
+    db.query(Student).filter(Student.rfid_card_id == "C3").delete()
+    db.commit()
+
+    assert card_index.reconcile(db) == 2
+    assert card_index.get("C3") is None
+    assert card_index.get("D4").name == "Maria"
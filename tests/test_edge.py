@@ -0,0 +1,115 @@
+"""Edge mode: local answers, the SQLite journal and the upstream syncer."""
+
+import asyncio
+from datetime import datetime, time
+from unittest import mock
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from api.routes.attendances import AttendanceTap, check_attendance_batch
+from core import checkin, edge
+from core.card_index import card_index
+from core.edge import EdgeJournal, EdgeNode, SyncFailed
+from core.schedule_index import schedule_index
+from crud import attendance as attendance_crud
+from models.attendance import Attendance
+from models.course import Course
+from models.session import Session as SessionModel
+from models.student import Student
+
+
+def _today_at(hour, minute=0):
+    return datetime.combine(datetime.utcnow().date(), time(hour, minute))
+
+
+@pytest.fixture
+def node(db, engine, tmp_path):
+    """Edge node over an upstream with one student and a session from 09:00 to 11:00 today."""
+    course = Course(name="Networks")
+    db.add_all([course, Student(name="Ana", rfid_card_id="A1")])
+    db.flush()
+    db.add(SessionModel(
+        course_id=course.course_id, room="3-101", date=_today_at(0),
+        start_time=_today_at(9), end_time=_today_at(11),
+    ))
+    db.commit()
+    card_index.load(db)
+    schedule_index.load(db)
+    node = EdgeNode(EdgeJournal(str(tmp_path / "journal.db")), session_factory=sessionmaker(bind=engine))
+    yield node
+    node.journal.close()
+
+
+def _tap(card="A1"):
+    # 40 minutes into the session: late whenever the test runs.
+    return attendance_crud.Tap(card, "3-101", _today_at(9, 40))
+
+
+def test_taps_are_answered_locally_and_synced_once(node, db):
+    with mock.patch.object(edge, "edge_node", node):
+        first = asyncio.run(checkin.check_in(None, _tap()))
+    assert first.message == "Marked: late" and first.session_id is not None
+    assert node.record(_tap("ZZ")).message == "Unknown card"
+    assert db.query(Attendance).count() == 0
+
+    assert node.sync_once() == 2
+    assert node.journal.backlog() == (0, None)
+    assert db.query(Attendance).count() == 1
+
+    # A batch replayed after a crash between the upstream commit and the journal delete.
+    node.record(_tap())
+    assert node.sync_once() == 1
+    assert db.query(Attendance).count() == 1
+
+
+def test_batched_taps_are_journaled_in_edge_mode(node, db):
+    taps = [AttendanceTap(rfid_card_id=card, room="3-101", tapped_at=_today_at(9, 40)) for card in ("A1", "ZZ")]
+    with mock.patch.object(edge, "edge_node", node):
+        results = asyncio.run(check_attendance_batch(taps, db=None))
+    assert [result.message for result in results] == ["Marked: late", "Unknown card"]
+    assert node.journal.backlog()[0] == 2
+    assert db.query(Attendance).count() == 0
+
+
+def test_taps_stay_journaled_while_upstream_is_down(node, tmp_path):
+    node.record(_tap())
+    unreachable = create_engine(f"sqlite:///{tmp_path / 'missing' / 'upstream.db'}")
+    node.session_factory = sessionmaker(bind=unreachable)
+    with pytest.raises(SyncFailed):
+        node.sync_once()
+    assert node.journal.backlog()[0] == 1
+    assert node.journal.dead_letters() == []
+    unreachable.dispose()
+
+
+def test_a_tap_rejected_on_its_own_is_dead_lettered(node, db):
+    check_taps = attendance_crud.check_taps
+
+    def rejecting(session, taps):
+        if any(tap.rfid_card_id == "BAD" for tap in taps):
+            return [attendance_crud.TapResult("Error processing attendance: rejected", error=True) for _ in taps]
+        return check_taps(session, taps)
+
+    node.record(_tap())
+    node.record(_tap("BAD"))
+    node.record(_tap("ZZ"))
+    with mock.patch.object(attendance_crud, "check_taps", rejecting):
+        assert node.sync_once() == 3
+    assert node.journal.backlog() == (0, None)
+    assert [(tap.rfid_card_id, error) for _, tap, error in node.journal.dead_letters()] == [
+        ("BAD", "Error processing attendance: rejected"),
+    ]
+    assert db.query(Attendance).count() == 1
+
+
+def test_snapshot_restores_indexes_without_upstream(node, tmp_path):
+    node.refresh_snapshot()
+    card_index.clear()
+    schedule_index.clear()
+
+    restarted = EdgeNode(EdgeJournal(str(tmp_path / "journal.db")), session_factory=None)
+    restarted.restore_indexes()
+    assert restarted.record(_tap()).message == "Marked: late"
+    restarted.journal.close()
@@ -0,0 +1,181 @@
+"""Event bus tests."""
+
+import asyncio
+import os
+import socket
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from core import events
+from core.events import EventBus, InProcessEventBus, PostgresEventBus, UnixSocketEventBus
+
+
+@pytest.fixture
+def received():
+    """Collects events delivered to subscribers during a test."""
+    collected = []
+
+    async def handler(event):
+        collected.append(event)
+
+    events.subscribe(handler)
+    yield collected
+    events._handlers.remove(handler)
+
+
+async def _wait_for(collected, count, timeout=2.0):
+    for _ in range(int(timeout / 0.01)):
+        if len(collected) >= count:
+            return
+        await asyncio.sleep(0.01)
+
+
+def test_in_process_bus_delivers_from_other_threads(received):
+    """Events published from a worker thread reach the loop's subscribers."""
+
+    async def scenario():
+        bus = InProcessEventBus()
+        await bus.start()
+        await asyncio.to_thread(bus.publish, {"topics": ["room:1"], "message": "tap"})
+        await _wait_for(received, 1)
+
+    asyncio.run(scenario())
+    assert received == [{"topics": ["room:1"], "message": "tap"}]
+
+
+def test_unix_socket_bus_reaches_every_worker(tmp_path, received):
+    """Two buses sharing a directory stand in for two workers on one host."""
+
+    async def scenario():
+        worker_a = UnixSocketEventBus(str(tmp_path))
+        worker_b = UnixSocketEventBus(str(tmp_path))
+        await worker_a.start()
+        await worker_b.start()
+        # A socket left behind by a crashed worker is cleaned up on publish.
+        (tmp_path / "dead.sock").touch()
+
+        worker_a.publish({"topics": ["room:1"], "message": "from a"})
+        await _wait_for(received, 2)
+        await worker_a.stop()
+        await worker_b.stop()
+
+    asyncio.run(scenario())
+    assert [event["message"] for event in received] == ["from a", "from a"]
+    assert list(tmp_path.iterdir()) == []
+
+
+class FakePostgres:
+    """Routes ``pg_notify`` to the connections that ran ``LISTEN`` on the channel."""
+
+    def __init__(self):
+        self.listeners: dict[str, list] = {}
+        self.lock = threading.Lock()
+
+    def connect(self):
+        return FakeConnection(self)
+
+    def notify(self, channel, payload):
+        with self.lock:
+            for conn in self.listeners.get(channel, []):
+                conn.deliver(payload)
+
+
+class FakeConnection:
+    """psycopg2-like connection whose socket becomes readable on a notification."""
+
+    def __init__(self, server):
+        self.server = server
+        self.autocommit = False
+        self.notifies = []
+        self._pending = []
+        self._read, self._write = socket.socketpair()
+        self._read.setblocking(False)
+
+    def fileno(self):
+        return self._read.fileno()
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def deliver(self, payload):
+        self._pending.append(SimpleNamespace(payload=payload))
+        self._write.send(b"!")
+
+    def poll(self):
+        try:
+            self._read.recv(1024)
+        except BlockingIOError:
+            pass
+        self.notifies.extend(self._pending)
+        self._pending.clear()
+
+    def close(self):
+        with self.server.lock:
+            for conns in self.server.listeners.values():
+                if self in conns:
+                    conns.remove(self)
+        self._read.close()
+        self._write.close()
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        if sql.startswith("LISTEN"):
+            with self.conn.server.lock:
+                self.conn.server.listeners.setdefault(sql.split('"')[1], []).append(self.conn)
+        elif "pg_notify" in sql:
+            self.conn.server.notify(*params)
+
+
+def test_event_bus_requires_publish():
+    with pytest.raises(TypeError):
+        EventBus()
+
+
+def test_postgres_bus_reaches_every_worker_over_a_fake_server(received):
+    """Two listeners on one channel both get an event published by either worker."""
+    server = FakePostgres()
+
+    async def scenario():
+        workers = [PostgresEventBus("postgresql://fake", channel="attendance_events_test") for _ in range(2)]
+        for bus in workers:
+            bus._connect = server.connect
+            await bus.start()
+        for _ in range(200):
+            if len(server.listeners.get("attendance_events_test", [])) == 2:
+                break
+            await asyncio.sleep(0.01)
+        workers[0].publish({"topics": ["room:1"], "message": "tap"})
+        await _wait_for(received, 2)
+        for bus in workers:
+            await bus.stop()
+
+    asyncio.run(scenario())
+    assert received == [{"topics": ["room:1"], "message": "tap"}] * 2
+
+
+@pytest.mark.skipif("TEST_POSTGRES_DSN" not in os.environ, reason="needs a Postgres server")
+def test_postgres_bus_round_trip(received):
+    """LISTEN/NOTIFY delivers published events back to the subscribers."""
+
+    async def scenario():
+        bus = PostgresEventBus(os.environ["TEST_POSTGRES_DSN"], channel="attendance_events_test")
+        await bus.start()
+        await asyncio.sleep(0.5)
+        bus.publish({"topics": ["room:1"], "message": "tap"})
+        await _wait_for(received, 1, timeout=5)
+        await bus.stop()
+
+    asyncio.run(scenario())
+    assert received == [{"topics": ["room:1"], "message": "tap"}]
@@ -0,0 +1,108 @@
+import pytest
+from sqlalchemy import MetaData, UniqueConstraint, create_engine, inspect, text
+
+from core import migrations
+from core.db import Base
+
+
+def _write(directory, name, sql):
+    (directory / name).write_text(sql)
+
+
+def test_split_statements_keeps_quoted_semicolons():
+    sql = "-- note; ignored\nINSERT INTO t VALUES ('a;b');\nDO $$ BEGIN PERFORM 1; END $$;\n"
+    assert migrations.split_statements(sql) == ["INSERT INTO t VALUES ('a;b')", "DO $$ BEGIN PERFORM 1; END $$"]
+
+
+def test_fresh_database_is_created_and_stamped(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    assert migrations.migrate(engine, Base.metadata) == []
+    assert "attendances" in inspect(engine).get_table_names()
+    with engine.connect() as connection:
+        assert migrations.applied_versions(connection) == {m.version for m in migrations.discover()}
+
+
+def test_pending_migrations_apply_once_in_order(tmp_path):
+    directory = tmp_path / "migrations"
+    directory.mkdir()
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE rooms (name TEXT)"))
+
+    # Tables without schema_migrations start at version zero.
+    _write(directory, "0001_seed.sql", "INSERT INTO rooms VALUES ('3-101');\nINSERT INTO rooms VALUES ('3;102');\n")
+    assert migrations.migrate(engine, Base.metadata, directory) == ["0001_seed"]
+
+    _write(directory, "0002_index.sql", "-- migrate: no-transaction\nCREATE INDEX CONCURRENTLY ix_rooms_name ON rooms (name);\n")
+    _write(directory, "0003_more.sql", "INSERT INTO rooms VALUES ('3-103');\n")
+    assert migrations.migrate(engine, Base.metadata, directory) == ["0002_index", "0003_more"]
+    assert migrations.migrate(engine, Base.metadata, directory) == []
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT count(*) FROM rooms")).scalar() == 3
+    assert [i["name"] for i in inspect(engine).get_indexes("rooms")] == ["ix_rooms_name"]
+
+
+def test_stamped_migrations_are_not_run(tmp_path):
+    directory = tmp_path / "migrations"
+    directory.mkdir()
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE rooms (name TEXT)"))
+    _write(directory, "0001_seed.sql", "INSERT INTO rooms VALUES ('3-101');\n")
+    _write(directory, "0002_more.sql", "INSERT INTO rooms VALUES ('3-102');\n")
+    assert migrations.stamp(engine, upto="0001", directory=directory) == ["0001_seed"]
+    assert migrations.migrate(engine, Base.metadata, directory) == ["0002_more"]
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT name FROM rooms")).scalars().all() == ["3-102"]
+
+
+def _baseline_schema(engine):
+    """The schema ``create_all`` built before migrations: no summaries, constraints or indexes of theirs."""
+    metadata = MetaData()
+    for table in Base.metadata.sorted_tables:
+        if table.name == "attendance_summaries":
+            continue
+        copy = table.to_metadata(metadata)
+        copy.indexes.clear()
+        for constraint in [c for c in copy.constraints if isinstance(c, UniqueConstraint)]:
+            copy.constraints.remove(constraint)
+    metadata.create_all(bind=engine)
+
+
+def test_baseline_database_gets_every_migration(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'baseline.db'}")
+    _baseline_schema(engine)
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO courses (course_id, name) VALUES (1, 'Networks')"))
+        connection.execute(text("INSERT INTO students (student_id, name, rfid_card_id) VALUES (1, 'Ana', 'A1')"))
+        connection.execute(text("INSERT INTO sessions (session_id, course_id, room) VALUES (1, 1, '3-101')"))
+        # A duplicate the unique constraint would have refused; the tap is kept over the absent row.
+        connection.execute(text(
+            "INSERT INTO attendances (session_id, student_id, status, time) VALUES"
+            " (1, 1, 'absent', NULL), (1, 1, 'late', '2025-01-01 09:20:00')"
+        ))
+
+    assert migrations.migrate(engine, Base.metadata) == [m.version for m in migrations.discover()]
+    schema = inspect(engine)
+    assert "uq_attendances_session_student" in {i["name"] for i in schema.get_indexes("attendances")}
+    assert "uq_students_rfid_card_id" in {i["name"] for i in schema.get_indexes("students")}
+    assert "ix_sessions_course_start_end" in {i["name"] for i in schema.get_indexes("sessions")}
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT status FROM attendances")).scalars().all() == ["late"]
+        summary = connection.execute(text("SELECT present, late, absent FROM attendance_summaries")).one()
+    assert tuple(summary) == (0, 1, 0)
+
+
+def test_failed_migration_is_rolled_back(tmp_path):
+    directory = tmp_path / "migrations"
+    directory.mkdir()
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE rooms (name TEXT)"))
+    migrations.stamp(engine, directory=directory)
+    _write(directory, "0001_broken.sql", "INSERT INTO rooms VALUES ('x');\nINSERT INTO missing VALUES (1);\n")
+    with pytest.raises(Exception):
+        migrations.migrate(engine, Base.metadata, directory)
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT count(*) FROM rooms")).scalar() == 0
+        assert migrations.applied_versions(connection) == set()
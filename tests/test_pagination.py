@@ -0,0 +1,54 @@
+"""Keyset pagination: cursor tokens, stable pages and the list endpoints."""
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from core.replicas import get_read_db
+from core.pagination import decode_cursor, encode_cursor
+from crud import group as group_crud
+from main import app
+from models.group import Group
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    """Cursors decode back to their key; anything else is a 400."""
+    assert decode_cursor(encode_cursor(42)) == 42
+    assert decode_cursor(None) is None
+    for token in ("not-a-cursor", encode_cursor("42"), encode_cursor([1]), encode_cursor(None), encode_cursor(True)):
+        with pytest.raises(HTTPException) as error:
+            decode_cursor(token)
+        assert error.value.status_code == 400
+
+
+def test_keyset_pages_are_stable_under_inserts(db):
+    """Pages continue after the last key, whatever was inserted meanwhile."""
+    db.add_all(Group(code=f"G{i}") for i in range(5))
+    db.commit()
+
+    first = group_crud.get_groups(db, limit=2)
+    # A row inserted before the cursor must not shift the next page.
+    db.add(Group(code="late"))
+    db.commit()
+    second = group_crud.get_groups(db, limit=2, after=first[-1].group_id)
+    assert [g.code for g in first + second] == ["G0", "G1", "G2", "G3"]
+
+
+def test_list_endpoint_returns_next_cursor(db):
+    """Full pages advertise a cursor, the last page does not, and bad cursors are a 400."""
+    db.add_all(Group(code=f"G{i}") for i in range(3))
+    db.commit()
+    app.dependency_overrides[get_read_db] = lambda: db
+    try:
+        client = TestClient(app)
+        page = client.get("/api/groups/", params={"limit": 2})
+        assert [g["code"] for g in page.json()] == ["G0", "G1"]
+        after = page.headers["X-Next-Cursor"]
+
+        last = client.get("/api/groups/", params={"limit": 2, "after": after})
+        assert [g["code"] for g in last.json()] == ["G2"]
+        assert "X-Next-Cursor" not in last.headers
+        assert client.get("/api/groups/", params={"after": "%%%"}).status_code == 400
+        assert client.get("/api/groups/", params={"after": encode_cursor({"id": 1})}).status_code == 400
+    finally:
+        app.dependency_overrides.pop(get_read_db)
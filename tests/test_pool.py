@@ -0,0 +1,42 @@
+import threading
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from core.metrics import metrics
+from core.pool import async_engine_options, engine_options, profile_settings
+
+
+def test_profiles_and_overrides():
+    assert profile_settings("transaction-pooler")["prepared_statements"] is False
+    assert profile_settings("direct", {"pool_size": 3})["pool_size"] == 3
+    with pytest.raises(ValueError):
+        profile_settings("pgbouncer")
+    with pytest.raises(ValueError):
+        profile_settings("direct", {"pool_sise": 3})
+
+
+def test_transaction_pooler_disables_asyncpg_prepared_statements():
+    options = async_engine_options("transaction-pooler", name="test_tx")
+    assert options["connect_args"]["statement_cache_size"] == 0
+    assert "connect_args" not in async_engine_options("session-pooler", name="test_session")
+
+
+def test_pool_reports_waits_saturation_and_timeouts(tmp_path):
+    options = engine_options("direct", {"pool_size": 1, "max_overflow": 0, "pool_timeout": 0.2}, name="test_pool")
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", **options)
+
+    held = engine.connect()
+    assert metrics.gauge("db_pool_test_pool_saturation").value == 1.0
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    assert metrics.counter("db_pool_test_pool_timeouts_total").value == 1
+
+    released = threading.Timer(0.05, held.close)
+    released.start()
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    wait = metrics.histogram("db_pool_test_pool_checkout_wait_ms").snapshot()
+    assert wait["count"] == 3 and wait["sum"] >= 200
+    assert metrics.gauge("db_pool_test_pool_checked_out").value == 0
+    engine.dispose()
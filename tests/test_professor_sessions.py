@@ -0,0 +1,88 @@
+"""Sessions listed by professor: eager loading, filters and the read routes."""
+
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from core.replicas import get_read_db
+from main import app
+from crud import session as session_crud
+from models.attendance import Attendance, AttendanceStatus
+from models.course import Course
+from models.group import Group
+from models.professor import Professor
+from models.session import Session as SessionModel
+from models.student import Student
+
+
+def _seed(db, courses: int, sessions: int, students: int):
+    """Seed ``courses`` courses of one professor plus one of another, each with
+    ``sessions`` daily sessions where every student of the group is absent."""
+    professor = Professor(name="Prof")
+    other = Professor(name="Other")
+    group = Group(code="FAF-231")
+    db.add_all([professor, other, group])
+    db.flush()
+    roster = [Student(name=f"S{i}", rfid_card_id=f"C{i}", group_id=group.group_id) for i in range(students)]
+    db.add_all(roster)
+    day = datetime(2025, 1, 1)
+    for c in range(courses + 1):
+        course = Course(name=f"Course {c}", professor_id=(professor if c < courses else other).professor_id)
+        db.add(course)
+        db.flush()
+        for s in range(sessions):
+            date = day + timedelta(days=s)
+            session = SessionModel(course_id=course.course_id, room="3-101", date=date,
+                                   start_time=date, end_time=date + timedelta(hours=1))
+            db.add(session)
+            db.flush()
+            db.add_all(Attendance(session_id=session.session_id, student_id=student.student_id,
+                                  status=AttendanceStatus.absent) for student in roster)
+    db.commit()
+    professor_id = professor.professor_id
+    db.expunge_all()
+    return professor_id
+
+
+def test_professor_sessions_load_in_constant_queries(db, engine):
+    """Sessions, courses, attendances, students and groups load in two queries."""
+    professor_id = _seed(db, courses=3, sessions=4, students=5)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    sessions = session_crud.get_sessions_by_professor(db, professor_id)
+    assert len(sessions) == 12
+    assert all(len(s.attendances) == 5 and s.attendances[0].student.group.code == "FAF-231" for s in sessions)
+    assert {s.course.name for s in sessions} == {"Course 0", "Course 1", "Course 2"}
+    # sessions + courses, then one batched load of attendances with student and group
+    assert len(statements) == 2
+
+
+def test_professor_sessions_filter_by_date_and_paginate(db):
+    """Newest first, with skip/limit and an inclusive date range."""
+    professor_id = _seed(db, courses=2, sessions=4, students=1)
+
+    page = session_crud.get_sessions_by_professor(db, professor_id, skip=1, limit=3)
+    assert [s.date for s in page] == [datetime(2025, 1, 4), datetime(2025, 1, 3), datetime(2025, 1, 3)]
+
+    ranged = session_crud.get_sessions_by_professor(
+        db, professor_id, date_from=datetime(2025, 1, 2), date_to=datetime(2025, 1, 3)
+    )
+    assert len(ranged) == 4
+    assert session_crud.get_sessions_by_professor(db, 999) == []
+
+
+def test_session_routes_return_absent_rows_without_a_time(db):
+    """Absent rows have no tap time and still serialize."""
+    professor_id = _seed(db, courses=1, sessions=1, students=2)
+    app.dependency_overrides[get_read_db] = lambda: db
+    try:
+        client = TestClient(app)
+        sessions = client.get(f"/api/sessions/professor/{professor_id}")
+        single = client.get(f"/api/sessions/{sessions.json()[0]['session_id']}")
+    finally:
+        app.dependency_overrides.pop(get_read_db)
+
+    assert sessions.status_code == single.status_code == 200
+    assert [(a["status"], a["time"]) for a in single.json()["attendances"]] == [("absent", None)] * 2
@@ -0,0 +1,92 @@
+"""Hot lookups in ``crud/`` must be served by indexes, not table scans."""
+
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, insert, text
+
+from core.db import Base
+from core.schedule_index import query_sessions
+from crud import attendance as attendance_crud
+from crud import attendance_summary as summary_crud
+from crud import course as course_crud
+from crud import professor as professor_crud
+from crud import session as session_crud
+from crud import student as student_crud
+from models.attendance import Attendance
+from models.course import Course, CourseGroup
+from models.group import Group
+from models.professor import Professor
+from models.session import Session as SessionModel
+from models.student import Student
+
+DAY = datetime(2025, 3, 3)
+
+LOOKUPS = {
+    "student by card": lambda db: student_crud.get_student_by_card(db, "C7"),
+    "professor by email": lambda db: professor_crud.get_professor_by_email(db, "p3@utm.md"),
+    "courses by professor": lambda db: course_crud.get_courses_by_professor(db, 3),
+    "sessions in rooms on a day": lambda db: query_sessions(db, DAY, DAY + timedelta(days=1), rooms={"3-101"}),
+    "sessions on a day": lambda db: query_sessions(db, DAY, DAY + timedelta(days=1)),
+    "attendances by session": lambda db: attendance_crud.get_attendances_by_session(db, 5),
+    "attendances by student": lambda db: attendance_crud.get_attendances_by_student(db, 5),
+    "session stats": lambda db: attendance_crud.get_session_stats(db, [5, 6]),
+    "course stats": lambda db: attendance_crud.get_course_stats(db, 3, DAY, DAY + timedelta(days=7)),
+    "sessions by professor": lambda db: session_crud.get_sessions_by_professor(db, 3),
+    "current sessions by professor": lambda db: session_crud.get_current_sessions_by_professor_and_time(db, 3),
+    "course of sessions": lambda db: summary_crud.session_courses(db, [5, 6]),
+    "summary by key": lambda db: summary_crud.get_summary(db, 3, 5),
+}
+
+
+@pytest.fixture
+def seeded(db):
+    db.execute(insert(Professor), [{"professor_id": i, "name": f"P{i}", "email": f"p{i}@utm.md"} for i in range(1, 21)])
+    db.execute(insert(Group), [{"group_id": i, "code": f"G{i}"} for i in range(1, 21)])
+    db.execute(insert(Student), [
+        {"student_id": i, "name": f"S{i}", "group_id": i % 20 + 1, "rfid_card_id": f"C{i}"} for i in range(1, 401)
+    ])
+    db.execute(insert(Course), [{"course_id": i, "name": f"Course {i}", "professor_id": i % 20 + 1} for i in range(1, 41)])
+    db.execute(insert(CourseGroup), [{"course_id": i, "group_id": i % 20 + 1} for i in range(1, 41)])
+    db.execute(insert(SessionModel), [
+        {
+            "session_id": i, "course_id": i % 40 + 1, "room": f"3-1{i % 30:02d}",
+            "date": DAY + timedelta(days=i % 60),
+            "start_time": DAY + timedelta(days=i % 60, hours=9), "end_time": DAY + timedelta(days=i % 60, hours=11),
+        }
+        for i in range(1, 401)
+    ])
+    db.execute(insert(Attendance), [
+        {"session_id": s, "student_id": (s * 7 + k) % 400 + 1, "status": "present"}
+        for s in range(1, 401) for k in range(20)
+    ])
+    db.commit()
+    db.execute(text("ANALYZE"))
+    return db
+
+
+@pytest.mark.parametrize("name", LOOKUPS)
+def test_lookup_uses_indexes(seeded, engine, name):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        LOOKUPS[name](seeded)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    assert statements
+    tables = set(Base.metadata.tables)
+    for statement, parameters in statements:
+        with engine.connect() as connection:
+            plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+        scans = [
+            detail for *_, detail in plan
+            if (match := re.match(r"SCAN (\w+)", detail)) and match.group(1) in tables
+        ]
+        assert not scans, f"{name}: {scans} in\n{statement}"
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from core.replicas import ReplicaRouter, async_dsn
+
+
+def _database(path, marker):
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE marker (name TEXT)"))
+        connection.execute(text("INSERT INTO marker VALUES (:name)"), {"name": marker})
+    return engine
+
+
+def _marker(db):
+    try:
+        return db.execute(text("SELECT name FROM marker")).scalar()
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def router(tmp_path):
+    primary = _database(tmp_path / "primary.db", "primary")
+    _database(tmp_path / "replica.db", "replica")
+    router = ReplicaRouter([f"sqlite:///{tmp_path / 'replica.db'}"], max_lag_seconds=5, primary=sessionmaker(bind=primary))
+    router.check()
+    return router
+
+
+def test_reads_go_to_healthy_replica(router):
+    assert _marker(router.session()) == "replica"
+
+
+def test_falls_back_to_primary_when_replica_unreachable(router, tmp_path):
+    router.replicas[0].engine.dispose()
+    (tmp_path / "replica.db").unlink()
+    (tmp_path / "replica.db").mkdir()  # a directory cannot be opened as a database
+    assert _marker(router.session()) == "primary"
+    assert not router.replicas[0].healthy
+
+
+def test_lagging_replica_leaves_rotation(router):
+    router.measure_lag = lambda connection: 30.0
+    router.check()
+    assert not router.replicas[0].healthy
+    assert _marker(router.session()) == "primary"
+
+    router.measure_lag = lambda connection: 0.5
+    router.check()
+    assert _marker(router.session()) == "replica"
+
+
+def test_async_reads_use_replica(router):
+    pytest.importorskip("aiosqlite")
+
+    async def read():
+        async with router.read_session() as db:
+            return (await db.execute(text("SELECT name FROM marker"))).scalar()
+
+    assert asyncio.run(read()) == "replica"
+
+
+def test_async_dsn():
+    assert async_dsn("postgresql://u:p@h:5432/db") == "postgresql+asyncpg://u:p@h:5432/db"
+    assert async_dsn("sqlite:///a.db") == "sqlite+aiosqlite:///a.db"
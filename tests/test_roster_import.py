@@ -0,0 +1,79 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from core.card_index import card_index
+from core.db import get_db
+from crud import roster as roster_crud
+from main import app
+from models.group import Group
+from models.student import Student
+
+
+def _groups(db):
+    db.add_all([Group(code="FAF-231"), Group(code="FAF-232")])
+    db.commit()
+
+
+def test_import_reports_invalid_rows_and_upserts_by_card(db):
+    _groups(db)
+    roster = "\n".join([
+        "name,group,rfid_card_id",
+        "Ana,FAF-231,A1",
+        "Ion,FAF-999,B2",
+        "Maria,FAF-232,C3",
+        "Dan,FAF-232,C3",
+        ",FAF-231,D4",
+        "Eva,FAF-232,",
+    ])
+    result = roster_crud.import_roster(db, roster)
+    assert (result.created, result.updated) == (1, 0)
+    assert [(e.line, e.error) for e in result.errors] == [
+        (3, "unknown group"),
+        (4, "duplicate rfid_card_id in file"),
+        (5, "duplicate rfid_card_id in file"),
+        (6, "missing name"),
+        (7, "missing rfid_card_id"),
+    ]
+    assert card_index.get("A1").name == "Ana"
+
+    result = roster_crud.import_roster(db, "name,group,rfid_card_id\nAna Popescu,FAF-232,A1\nIon,FAF-231,B2\n")
+    assert (result.created, result.updated, result.errors) == (1, 1, [])
+    ana = db.query(Student).filter(Student.rfid_card_id == "A1").one()
+    assert ana.name == "Ana Popescu" and ana.group.code == "FAF-232"
+
+
+def test_dry_run_writes_nothing(db):
+    _groups(db)
+    result = roster_crud.import_roster(db, "name,group,rfid_card_id\nAna,FAF-231,A1\n", dry_run=True)
+    assert (result.created, result.errors) == (0, [])
+    assert db.query(Student).count() == 0
+
+
+def test_import_of_an_intake_runs_set_based_statements(db, engine):
+    _groups(db)
+    rows = [f"Student {i},FAF-23{1 + i % 2},CARD{i:05d}" for i in range(5000)]
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    result = roster_crud.import_roster(db, "name,group,rfid_card_id\n" + "\n".join(rows))
+    assert result.created == 5000 and not result.errors
+    # Staging chunks plus a fixed number of validation and upsert statements, none per row.
+    assert len(statements) <= 5000 // roster_crud.STAGE_CHUNK_SIZE + 10
+    assert len(card_index) == 5000
+
+
+def test_import_endpoint(db):
+    _groups(db)
+    app.dependency_overrides[get_db] = lambda: db
+    try:
+        client = TestClient(app)
+        response = client.post(
+            "/api/students/import",
+            content="name,group,rfid_card_id\nAna,FAF-231,A1\n",
+            headers={"Content-Type": "text/csv"},
+        )
+        assert response.json() == {"created": 1, "updated": 0, "errors": []}
+        assert client.post("/api/students/import", content="name,card\n").status_code == 400
+        duplicate = {"name": "Ion", "group_id": 1, "rfid_card_id": "A1"}
+        assert client.post("/api/students/", json=duplicate).status_code == 409
+    finally:
+        app.dependency_overrides.pop(get_db)
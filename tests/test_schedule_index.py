@@ -0,0 +1,58 @@
+"""Schedule index tests."""
+
+from datetime import datetime, timedelta
+
+from core.schedule_index import schedule_index
+from crud import session as session_crud
+from models.course import Course
+from models.session import SessionStatus
+
+DAY = datetime(2025, 3, 10)
+
+
+def _create(db, course, room, start_hour, end_hour, day=DAY):
+    return session_crud.create_session(
+        db,
+        course_id=course.course_id,
+        room=room,
+        date=day,
+        start_time=day.replace(hour=start_hour),
+        end_time=day.replace(hour=end_hour),
+        status=SessionStatus.not_started,
+    )
+
+
+def test_find_active_only_sees_the_current_day(db):
+    """Sessions on other days never match, whatever their time of day."""
+    course = Course(name="Networks")
+    db.add(course)
+    db.commit()
+    morning = _create(db, course, "3-101", 8, 10)
+    noon = _create(db, course, "3-101", 10, 12)
+    _create(db, course, "3-101", 8, 18, day=DAY - timedelta(days=7))
+
+    assert schedule_index.load(db, DAY.date()) == 2
+    assert schedule_index.find_active(db, "3-101", DAY.replace(hour=9)).session_id == morning.session_id
+    assert schedule_index.find_active(db, "3-101", DAY.replace(hour=11)).session_id == noon.session_id
+    assert schedule_index.find_active(db, "3-101", DAY.replace(hour=13)) is None
+    assert schedule_index.find_active(db, "4-202", DAY.replace(hour=9)) is None
+
+
+def test_rolls_over_and_follows_crud_changes(db):
+    """The index reloads on a new day and tracks create/update/delete."""
+    course = Course(name="Networks")
+    db.add(course)
+    db.commit()
+    schedule_index.load(db, DAY.date() - timedelta(days=1))
+
+    session = _create(db, course, "3-101", 8, 10)
+    # Loaded for yesterday, so the first lookup today reloads.
+    assert schedule_index.find_active(db, "3-101", DAY.replace(hour=9)).session_id == session.session_id
+    assert schedule_index.day == DAY.date()
+
+    session_crud.update_session(db, session.session_id, room="4-202")
+    assert schedule_index.find_active(db, "3-101", DAY.replace(hour=9)) is None
+    assert schedule_index.find_active(db, "4-202", DAY.replace(hour=9)) is not None
+
+    session_crud.delete_session(db, session.session_id)
+    assert schedule_index.find_active(db, "4-202", DAY.replace(hour=9)) is None
@@ -0,0 +1,72 @@
+"""Serial gateway against a pseudo-terminal standing in for a reader."""
+
+import asyncio
+import os
+import time
+
+import pytest
+
+from core.serial_gateway import SerialPort
+
+pytest.importorskip("serial")
+
+
+@pytest.fixture
+def pty():
+    master, slave = os.openpty()
+    os.set_blocking(master, False)
+    yield master, os.ttyname(slave)
+    os.close(master)
+    os.close(slave)
+
+
+async def _read_lines(fd, count, timeout=5.0):
+    data, deadline = b"", time.monotonic() + timeout
+    while data.count(b"\n") < count and time.monotonic() < deadline:
+        try:
+            data += os.read(fd, 4096)
+        except BlockingIOError:
+            await asyncio.sleep(0.01)
+    return data.decode().splitlines()
+
+
+def test_taps_are_checked_in_and_answered_in_order(pty, async_session_factory):
+    master, path = pty
+
+    async def run():
+        port = SerialPort(path, session_factory=async_session_factory)
+        port.start()
+        await asyncio.sleep(0.1)
+        os.write(master, b"A1,3-101\nnonsense\nZZ,3-101\nA1,3-1")
+        os.write(master, b"01\n")
+        replies = await _read_lines(master, 3)
+        await port.stop()
+        return replies
+
+    replies = asyncio.run(run())
+    assert replies[0].startswith("Marked: ")
+    assert replies[1:] == ["Unknown card", replies[0]]
+
+
+def test_full_port_queue_answers_busy(pty, async_session_factory):
+    master, path = pty
+
+    class SlowPort(SerialPort):
+        async def process(self, tap):
+            await asyncio.sleep(0.2)
+            return "Done"
+
+    async def run():
+        port = SlowPort(path, queue_size=1, session_factory=async_session_factory)
+        port.start()
+        await asyncio.sleep(0.1)
+        os.write(master, b"A1,3-101\n")
+        await asyncio.sleep(0.05)
+        os.write(master, b"A1,3-101\nA1,3-101\n")
+        replies = await _read_lines(master, 3)
+        await port.stop()
+        return replies
+
+    # The first tap is being processed, the second waits, the third is refused
+    # but answered after them, so replies line up with the taps.
+    assert asyncio.run(run()) == ["Done", "Done", "Busy"]
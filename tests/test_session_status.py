@@ -0,0 +1,96 @@
+"""Read-time session status tests."""
+
+from datetime import datetime, timedelta
+from unittest import mock
+
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from core import session_scheduler
+from crud import session as session_crud
+from models.attendance import Attendance
+from models.course import Course, CourseGroup
+from models.group import Group
+from models.session import Session as SessionModel, SessionStatus
+from models.student import Student
+
+
+def _session(start: datetime, end: datetime, stored=SessionStatus.not_started):
+    return SessionModel(room="3-101", date=start, start_time=start, end_time=end, status=stored)
+
+
+def test_reads_derive_status_without_writing(db, engine):
+    """Getters report the current status and issue no writes."""
+    now = datetime.utcnow()
+    db.add_all([
+        _session(now - timedelta(hours=3), now - timedelta(hours=2)),
+        _session(now - timedelta(minutes=5), now + timedelta(hours=1)),
+        _session(now + timedelta(hours=1), now + timedelta(hours=2)),
+    ])
+    db.commit()
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    sessions = session_crud.get_sessions(db)
+    single = session_crud.get_session(db, sessions[1].session_id)
+
+    assert [s.status for s in sessions] == [SessionStatus.ended, SessionStatus.active, SessionStatus.not_started]
+    assert single.status == SessionStatus.active
+    assert all(statement.lstrip().upper().startswith("SELECT") for statement in statements)
+    assert db.query(SessionModel).filter(SessionModel.status == SessionStatus.active).count() == 1
+
+
+def test_transitions_are_persisted_once(db):
+    """Only sessions that crossed a boundary are written, and only once."""
+    now = datetime.utcnow()
+    ended = _session(now - timedelta(hours=3), now - timedelta(hours=2), stored=SessionStatus.active)
+    started = _session(now - timedelta(minutes=5), now + timedelta(hours=1))
+    upcoming = _session(now + timedelta(hours=1), now + timedelta(hours=2))
+    db.add_all([ended, started, upcoming])
+    db.commit()
+
+    changed = dict(session_crud.persist_session_transitions(db))
+    assert changed == {ended.session_id: SessionStatus.ended, started.session_id: SessionStatus.active}
+    assert session_crud.persist_session_transitions(db) == []
+
+
+def test_transitions_skip_sessions_ended_before_the_lookback(db):
+    """A first run on an old database leaves long-ended sessions alone."""
+    now = datetime.utcnow()
+    old = _session(now - timedelta(days=30, hours=1), now - timedelta(days=30))
+    recent = _session(now - timedelta(hours=3), now - timedelta(hours=2))
+    db.add_all([old, recent])
+    db.commit()
+
+    changed = session_crud.persist_session_transitions(db, ended_after=now - timedelta(hours=24))
+    assert changed == [(recent.session_id, SessionStatus.ended)]
+
+
+def test_started_sessions_get_a_roster_whatever_status_they_were_created_with(db, engine):
+    """Absent rows follow the start time, not a change of the stored status."""
+    now = datetime.utcnow()
+    group = Group(code="FAF-231")
+    course = Course(name="Networks")
+    db.add_all([group, course])
+    db.flush()
+    db.add_all([
+        CourseGroup(course_id=course.course_id, group_id=group.group_id),
+        Student(name="Ana", rfid_card_id="A1", group_id=group.group_id),
+    ])
+    sessions = [
+        _session(now - timedelta(minutes=5), now + timedelta(hours=1), stored=SessionStatus.active),
+        _session(now - timedelta(hours=2), now - timedelta(hours=1), stored=SessionStatus.ended),
+        _session(now - timedelta(days=3), now - timedelta(days=3) + timedelta(hours=1)),
+        _session(now + timedelta(hours=1), now + timedelta(hours=2)),
+    ]
+    for session in sessions:
+        session.course_id = course.course_id
+    db.add_all(sessions)
+    db.commit()
+
+    with mock.patch.object(session_scheduler, "SessionLocal", sessionmaker(bind=engine)):
+        since = session_scheduler.run_session_transitions(lookback_hours=24)
+        assert session_scheduler.run_session_transitions(lookback_hours=24, since=since) > since
+
+    rostered = {session_id for (session_id,) in db.query(Attendance.session_id)}
+    assert rostered == {sessions[0].session_id, sessions[1].session_id}
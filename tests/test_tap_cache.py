@@ -0,0 +1,110 @@
+"""Repeated reads and idempotent retries answered from the tap cache."""
+
+import asyncio
+from unittest import mock
+
+import pytest
+
+from core import checkin
+from core.checkin import IdempotencyKeyReused, TapCache, check_in
+from crud import attendance as attendance_crud
+from models.attendance import AttendanceStatus
+
+MARKED = attendance_crud.TapResult("Marked: present", status=AttendanceStatus.present, student_id=1)
+
+
+@pytest.fixture
+def processed():
+    """Replace the database check-in with a slow stub recording each processed tap."""
+    taps = []
+
+    async def fake_check_in(db, tap):
+        taps.append(tap)
+        await asyncio.sleep(0.01)
+        return MARKED
+
+    with mock.patch.object(checkin, "tap_cache", TapCache(window=0.05, max_entries=2, idempotency_ttl=60)), \
+            mock.patch.object(checkin, "_check_in", fake_check_in):
+        yield taps
+
+
+def test_repeated_reads_are_answered_without_checking_in(processed):
+    async def run():
+        tap = attendance_crud.Tap("A1", "3-101")
+        # The second read arrives while the first is still being checked in.
+        return await asyncio.gather(check_in(None, tap), check_in(None, tap), check_in(None, tap._replace(room="3-102")))
+
+    first, repeat, other_room = asyncio.run(run())
+    assert len(processed) == 2
+    assert first == MARKED and not first.repeat
+    assert repeat == MARKED._replace(repeat=True)
+    assert not other_room.repeat
+
+
+def test_repeats_after_the_window_are_checked_in_again(processed):
+    async def run():
+        tap = attendance_crud.Tap("A1", "3-101")
+        await check_in(None, tap)
+        await asyncio.sleep(0.1)
+        return await check_in(None, tap)
+
+    assert not asyncio.run(run()).repeat
+    assert len(processed) == 2
+
+
+def test_idempotency_key_replays_the_first_answer(processed):
+    async def run():
+        first = await check_in(None, attendance_crud.Tap("A1", "3-101"), idempotency_key="k1")
+        checkin.tap_cache.window = 0
+        retry = await check_in(None, attendance_crud.Tap("A1", "3-101"), idempotency_key="k1")
+        other = await check_in(None, attendance_crud.Tap("A1", "3-101"), idempotency_key="k2")
+        return first, retry, other
+
+    first, retry, other = asyncio.run(run())
+    assert retry == first._replace(repeat=True)
+    assert not other.repeat
+    assert len(processed) == 2
+
+
+def test_idempotency_key_reused_for_another_tap_is_refused(processed):
+    async def run():
+        await check_in(None, attendance_crud.Tap("A1", "3-101"), idempotency_key="k1")
+        with pytest.raises(IdempotencyKeyReused):
+            await check_in(None, attendance_crud.Tap("B2", "3-101"), idempotency_key="k1")
+        with pytest.raises(IdempotencyKeyReused):
+            await check_in(None, attendance_crud.Tap("A1", "3-102"), idempotency_key="k1")
+
+    asyncio.run(run())
+    assert len(processed) == 1
+
+
+def test_errors_are_not_cached(processed):
+    failures = [attendance_crud.TapResult("Error processing attendance: boom", error=True)]
+
+    async def flaky(db, tap):
+        processed.append(tap)
+        return failures.pop() if failures else MARKED
+
+    async def run():
+        tap = attendance_crud.Tap("A1", "3-101")
+        with mock.patch.object(checkin, "_check_in", flaky):
+            return [await check_in(None, tap), await check_in(None, tap), await check_in(None, tap)]
+
+    failed, retried, repeat = asyncio.run(run())
+    assert failed.error and retried == MARKED and repeat.repeat
+    assert len(processed) == 2
+
+
+def test_cache_is_bounded_lru():
+    cache = TapCache(max_entries=2)
+
+    async def run():
+        future = asyncio.get_running_loop().create_future()
+        for key in ("a", "b"):
+            cache.put(key, future, ttl=60)
+        cache.get("a")
+        cache.put("c", future, ttl=60)
+
+    asyncio.run(run())
+    assert len(cache) == 2
+    assert cache.get("b") is None and cache.get("a") is not None
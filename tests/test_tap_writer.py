@@ -0,0 +1,53 @@
+"""Group-commit tap writer tests."""
+
+from datetime import datetime, time
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from core.metrics import metrics
+from core.tap_writer import TapQueueFull, TapWriter
+from crud import attendance as attendance_crud
+from models.attendance import Attendance
+from models.course import Course
+from models.session import Session as SessionModel
+from models.student import Student
+
+
+def test_taps_are_committed_in_batches_with_individual_results(db, engine):
+    """Every caller gets its own result while writes are grouped."""
+    today = datetime.utcnow().date()
+    course = Course(name="Networks")
+    db.add(course)
+    db.add_all([Student(name=f"Student {i}", rfid_card_id=f"C{i}") for i in range(50)])
+    db.flush()
+    db.add(SessionModel(
+        course_id=course.course_id,
+        room="3-101",
+        date=datetime.combine(today, time.min),
+        start_time=datetime.combine(today, time.min),
+        end_time=datetime.combine(today, time.max),
+    ))
+    db.commit()
+
+    batches = metrics.histogram("tap_writer_batch_size")
+    batches_before = batches.count
+    writer = TapWriter(batch_size=20, max_latency_ms=50, session_factory=sessionmaker(bind=engine))
+    futures = [writer.submit(attendance_crud.Tap(f"C{i}", "3-101", datetime.utcnow())) for i in range(50)]
+    futures.append(writer.submit(attendance_crud.Tap("unknown", "3-101", datetime.utcnow())))
+    writer.start()
+    results = [future.result(timeout=10) for future in futures]
+    writer.stop()
+
+    assert all(result.message.startswith("Marked: ") for result in results[:-1])
+    assert results[-1].message == "Unknown card"
+    assert db.query(Attendance).count() == 50
+    assert batches.count - batches_before == 3
+
+
+def test_full_queue_rejects_taps():
+    """Submitting past the queue depth fails fast instead of blocking."""
+    writer = TapWriter(queue_depth=1)
+    writer.submit(attendance_crud.Tap("A1", "3-101"))
+    with pytest.raises(TapQueueFull):
+        writer.submit(attendance_crud.Tap("A1", "3-101"))
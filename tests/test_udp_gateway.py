@@ -0,0 +1,163 @@
+"""UDP gateway over a loopback socket."""
+
+import asyncio
+import socket
+from datetime import datetime
+
+import pytest
+
+from core import udp_gateway
+from core.udp_gateway import ReplayWindow, UDPGateway, decode_reply, encode_tap
+
+
+KEY = b"test-key"
+
+
+def _tap(reader_id, seq, card, room="3-101", key=KEY, tapped_at=None):
+    tapped_at = tapped_at or datetime.utcnow()
+    return encode_tap(key, reader_id, seq, card, room, int((tapped_at - datetime(1970, 1, 1)).total_seconds() * 1000))
+
+
+async def _exchange(gateway, datagrams, expected, timeout=2.0):
+    """Send ``datagrams`` to the gateway and collect ``expected`` decoded replies."""
+    client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    client.setblocking(False)
+    loop = asyncio.get_running_loop()
+    try:
+        for datagram in datagrams:
+            client.sendto(datagram, gateway.address)
+            await asyncio.sleep(0.02)
+        replies = []
+        while len(replies) < expected:
+            data = await asyncio.wait_for(loop.sock_recv(client, 1024), timeout)
+            replies.append(decode_reply(KEY, data))
+        return replies
+    finally:
+        client.close()
+
+
+def test_replay_window():
+    window = ReplayWindow(size=4)
+    assert window.accept(10) is True
+    assert window.accept(10) is False
+    assert window.accept(8) is True
+    assert window.accept(8) is False
+    assert window.accept(6) is None
+    assert window.accept(12) is True
+    assert window.accept(9) is True
+    assert window.accept(8) is None
+    window.release(9)
+    assert window.accept(9) is True
+
+
+def test_tap_is_checked_in_once_and_retransmissions_get_the_same_reply(async_session_factory):
+    async def run():
+        gateway = UDPGateway(KEY, session_factory=async_session_factory)
+        await gateway.start("127.0.0.1", 0)
+        tap = _tap(7, 1, "A1")
+        # Workers answer concurrently, so replies are matched by sequence number.
+        replies = sorted(await _exchange(gateway, [tap, _tap(7, 2, "ZZ")], 2))
+        replies += await _exchange(gateway, [tap], 1)
+        await gateway.stop()
+        return replies
+
+    marked, unknown, retransmitted = asyncio.run(run())
+    assert marked[:3] == (7, 1, udp_gateway.MARKED)
+    assert marked[3].startswith("Marked: ")
+    assert unknown == (7, 2, udp_gateway.NOT_MARKED, "Unknown card")
+    assert retransmitted == marked
+
+
+def test_forged_and_replayed_datagrams_are_dropped(async_session_factory):
+    processed = []
+
+    class CountingGateway(UDPGateway):
+        async def process(self, tap):
+            processed.append(tap)
+            return udp_gateway.MARKED, "Done"
+
+    async def run():
+        gateway = CountingGateway(KEY, window=4, session_factory=async_session_factory)
+        await gateway.start("127.0.0.1", 0)
+        forged = _tap(7, 1, "A1", key=b"wrong-key")
+        replies = await _exchange(gateway, [
+            forged,
+            _tap(7, 10, "A1"),
+            _tap(7, 3, "A1"),  # older than the window
+            _tap(8, 3, "A1"),  # another reader's sequence
+        ], 2)
+        with pytest.raises(asyncio.TimeoutError):
+            await _exchange(gateway, [], 1, timeout=0.2)
+        await gateway.stop()
+        return replies
+
+    replies = asyncio.run(run())
+    assert [(reader, seq) for reader, seq, _, _ in replies] == [(7, 10), (8, 3)]
+    assert len(processed) == 2
+
+
+def test_busy_taps_can_be_retransmitted(async_session_factory):
+    class SlowGateway(UDPGateway):
+        async def process(self, tap):
+            await asyncio.sleep(0.2)
+            return udp_gateway.MARKED, "Done"
+
+    async def run():
+        gateway = SlowGateway(KEY, queue_size=1, workers=1, session_factory=async_session_factory)
+        await gateway.start("127.0.0.1", 0)
+        taps = [_tap(7, seq, "A1") for seq in (1, 2, 3)]
+        first = await _exchange(gateway, taps, 3)
+        again = await _exchange(gateway, [taps[2]], 1)
+        await gateway.stop()
+        return first, again
+
+    first, again = asyncio.run(run())
+    # The first tap is being processed, the second waits, the third is refused.
+    assert [(seq, code) for _, seq, code, _ in first] == [
+        (3, udp_gateway.BUSY), (1, udp_gateway.MARKED), (2, udp_gateway.MARKED),
+    ]
+    assert again[0][1:3] == (3, udp_gateway.MARKED)
+
+
+def test_failed_taps_answer_error_and_can_be_retransmitted(tmp_path):
+    pytest.importorskip("aiosqlite")
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    # No tables, so every check-in fails inside the database.
+    empty = async_sessionmaker(bind=create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'empty.db'}"))
+
+    async def run():
+        gateway = UDPGateway(KEY, session_factory=empty)
+        await gateway.start("127.0.0.1", 0)
+        tap = _tap(7, 1, "A1")
+        replies = await _exchange(gateway, [tap], 1)
+        replies += await _exchange(gateway, [tap], 1)
+        await gateway.stop()
+        return replies
+
+    assert asyncio.run(run()) == [(7, 1, udp_gateway.ERROR, "Error")] * 2
+
+
+def test_taps_without_a_recent_tap_time_are_refused(async_session_factory):
+    processed = []
+
+    class CountingGateway(UDPGateway):
+        async def process(self, tap):
+            processed.append(tap)
+            return udp_gateway.MARKED, "Done"
+
+    async def run():
+        gateway = CountingGateway(KEY, max_age_seconds=60, session_factory=async_session_factory)
+        await gateway.start("127.0.0.1", 0)
+        replies = sorted(await _exchange(gateway, [
+            encode_tap(KEY, 7, 1, "A1", "3-101"),
+            _tap(7, 2, "A1", tapped_at=datetime(2020, 1, 1)),
+        ], 2))
+        await gateway.stop()
+        return replies
+
+    assert asyncio.run(run()) == [
+        (7, 1, udp_gateway.NOT_MARKED, "Missing tap time"),
+        (7, 2, udp_gateway.NOT_MARKED, "Stale tap"),
+    ]
+    assert processed == []
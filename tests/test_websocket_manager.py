@@ -0,0 +1,141 @@
+"""WebSocket fan-out tests."""
+
+import asyncio
+import time
+
+from core.metrics import metrics
+from core.websocket_manager import WebSocketManager
+
+
+class FakeWebSocket:
+    """Stand-in client; ``delay=None`` never completes a send."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.received = []
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message):
+        if self.delay is None:
+            await asyncio.Event().wait()
+        await asyncio.sleep(self.delay)
+        self.received.append(message)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+def test_slow_clients_do_not_delay_broadcast_and_are_evicted():
+    """Hundreds of clients: broadcasts return at once and stuck clients are dropped."""
+    evicted = metrics.counter("websocket_evicted_total")
+    evicted_before = evicted.value
+
+    async def scenario():
+        manager = WebSocketManager(queue_size=10)
+        fast = [FakeWebSocket(delay=0.001) for _ in range(300)]
+        stuck = [FakeWebSocket(delay=None) for _ in range(5)]
+        for websocket in fast + stuck:
+            await manager.connect(websocket)
+
+        elapsed = 0.0
+        for i in range(20):
+            started = time.monotonic()
+            await manager.broadcast(f"event {i}")
+            elapsed = max(elapsed, time.monotonic() - started)
+            # Taps arrive as separate requests, giving writers a chance to run.
+            await asyncio.sleep(0.005)
+
+        for _ in range(200):
+            if all(len(websocket.received) == 20 for websocket in fast):
+                break
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0)
+        return manager, fast, stuck, elapsed
+
+    manager, fast, stuck, elapsed = asyncio.run(scenario())
+
+    assert elapsed < 0.05
+    assert all(websocket.received == [f"event {i}" for i in range(20)] for websocket in fast)
+    assert all(websocket.closed_with == 1013 for websocket in stuck)
+    assert len(manager.active_connections) == 300
+    assert evicted.value - evicted_before == 5
+
+
+def test_failed_send_disconnects_client():
+    """A client whose send raises is removed without affecting others."""
+
+    class BrokenWebSocket(FakeWebSocket):
+        async def send_text(self, message):
+            raise RuntimeError("connection reset")
+
+    async def scenario():
+        manager = WebSocketManager()
+        ok, broken = FakeWebSocket(), BrokenWebSocket()
+        await manager.connect(ok)
+        await manager.connect(broken)
+        await manager.broadcast("hello")
+        await asyncio.sleep(0.01)
+        return manager, ok
+
+    manager, ok = asyncio.run(scenario())
+    assert ok.received == ["hello"]
+    assert list(manager.active_connections) == [ok]
+
+
+def test_publish_only_reaches_topic_subscribers():
+    """Each subscriber of any published topic gets the message exactly once."""
+
+    async def scenario():
+        manager = WebSocketManager()
+        room = FakeWebSocket()
+        professor = FakeWebSocket()
+        both = FakeWebSocket()
+        other_room = FakeWebSocket()
+        everything = FakeWebSocket()
+        await manager.connect(room, topics=["room:3-101"])
+        await manager.connect(professor, topics=["professor:4"])
+        await manager.connect(both, topics=["room:3-101", "professor:4"])
+        await manager.connect(other_room, topics=["room:4-202"])
+        await manager.connect(everything)
+
+        await manager.publish(["room:3-101", "session:7", "professor:4"], "tap")
+        manager.unsubscribe(room, ["room:3-101"])
+        await manager.publish(["room:3-101"], "second tap")
+        await asyncio.sleep(0.01)
+        manager.disconnect(both)
+        return manager, room, professor, both, other_room, everything
+
+    manager, room, professor, both, other_room, everything = asyncio.run(scenario())
+    assert room.received == ["tap"]
+    assert professor.received == ["tap"]
+    assert both.received == ["tap", "second tap"]
+    assert other_room.received == []
+    assert everything.received == ["tap", "second tap"]
+    assert "room:3-101" not in manager.subscribers
+
+
+def test_first_subscribe_replaces_the_implicit_all_topics():
+    """A client connected without topics stops getting everything once it subscribes."""
+
+    async def scenario():
+        manager = WebSocketManager()
+        default = FakeWebSocket()
+        explicit = FakeWebSocket()
+        await manager.connect(default)
+        await manager.connect(explicit, topics=[WebSocketManager.ALL_TOPICS])
+
+        manager.subscribe(default, ["room:3-101"])
+        manager.subscribe(default, ["professor:4"])
+        manager.subscribe(explicit, ["room:3-101"])
+        await manager.publish(["room:4-202"], "other room")
+        await manager.publish(["room:3-101"], "tap")
+        await asyncio.sleep(0.01)
+        return manager, default, explicit
+
+    manager, default, explicit = asyncio.run(scenario())
+    assert default.received == ["tap"]
+    assert manager.active_connections[default].topics == {"room:3-101", "professor:4"}
+    assert explicit.received == ["other room", "tap"]